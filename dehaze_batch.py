@@ -0,0 +1,518 @@
+#  Procesarea in lot (fara interfata grafica) a mai multor imagini
+#
+#  Exemplu:
+#      python dehaze_batch.py poze/ "arhiva/*.jpg" -o rezultate --format png \
+#          --kernel-size 15 --omega 0.95 --t-min 0.85 --workers 8
+#      python dehaze_batch.py poze/ -o rezultate --report   # + figura 3 (PNG) pentru fiecare imagine
+#      python dehaze_batch.py poze/ -o rezultate --pipeline --readers 4 --writers 4
+#      python dehaze_batch.py poze/ -o rezultate --overwrite --cache ~/.cache/dehaze   # reexport rapid
+#
+#  Iesirea pastreaza directorul sursei: poze/a.jpg -> rezultate/poze/a.png,
+#  arhiva/b.jpg -> rezultate/arhiva/b.png (vezi collect_inputs()).
+
+import argparse
+import glob
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing import Pool
+from pathlib import Path
+
+import cv2
+
+from dehaze_cache import ResultCache
+from dehaze_morphology import (
+    PRECISIONS,
+    REFINEMENT_ENGINES,
+    DehazeWorkspace,
+    decode_image,
+    dehaze_image,
+    odd_kernel_size,
+)
+
+# extensiile considerate imagini cand primim un director
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".bmp", ".tif", ".tiff", ".webp"}
+
+
+def collect_inputs(patterns, recursive=False):
+    """
+    Construieste lista de imagini de procesat.
+
+    Fiecare element din `patterns` poate fi un director, un fisier sau un
+    model glob. Intoarce perechi (cale_imagine, cale_relativa), unde
+    cale_relativa este folosita pentru numele fisierului de iesire: numele
+    directorului dat urmat de calea din el pentru imaginile gasite intr-un
+    director, numele directorului parinte urmat de numele fisierului in
+    celelalte cazuri (ex. cam1/f.jpg). Astfel imaginile cu acelasi nume din
+    directoare diferite nu ajung in acelasi fisier de iesire, iar calea de
+    iesire a unei imagini nu depinde de celelalte intrari (reluarea gaseste
+    mereu aceleasi fisiere).
+    """
+    found = {}
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            root = Path(pattern)
+            prefix = Path(root.resolve().name)
+            walker = root.rglob("*") if recursive else root.glob("*")
+            for path in walker:
+                if path.is_file() and path.suffix.lower() in IMAGE_EXTENSIONS:
+                    found.setdefault(path.resolve(), prefix / path.relative_to(root))
+        else:
+            for name in glob.glob(pattern, recursive=recursive):
+                path = Path(name)
+                if path.is_file():
+                    path = path.resolve()
+                    found.setdefault(path, Path(path.parent.name, path.name))
+    return sorted(found.items())
+
+
+def output_path(out_dir, rel_path, fmt):
+    """Calea fisierului de iesire; fmt = extensia dorita sau None (aceeasi ca intrarea)."""
+    suffix = rel_path.suffix if fmt is None else "." + fmt.lstrip(".").lower()
+    return Path(out_dir) / rel_path.with_suffix(suffix)
+
+
+def output_paths(inputs, out_dir, fmt):
+    """
+    Caile fisierelor de iesire pentru imaginile din `inputs` (ca cele intoarse
+    de collect_inputs()), in aceeasi ordine. Ridica ValueError daca doua
+    imagini ar fi scrise in acelasi fisier (ex. a.jpg si a.png exportate ca
+    PNG, sau doua directoare cu acelasi nume).
+    """
+    dsts = [output_path(out_dir, rel, fmt) for _, rel in inputs]
+    sources = {}
+    for (src, _), dst in zip(inputs, dsts):
+        if dst in sources:
+            raise ValueError(f"Imaginile {sources[dst]} si {src} ar fi scrise in acelasi "
+                             f"fisier de iesire: {dst}")
+        sources[dst] = src
+    return dsts
+
+
+def _encode_params(suffix, quality):
+    """Parametrii de codare OpenCV pentru formatul de iesire."""
+    if quality is None:
+        return []
+    if suffix in (".jpg", ".jpeg"):
+        return [cv2.IMWRITE_JPEG_QUALITY, quality]
+    if suffix == ".webp":
+        return [cv2.IMWRITE_WEBP_QUALITY, quality]
+    return []
+
+
+def write_image(path, img_bgr, quality=None):
+    """
+    Scrie imaginea atomic: intai intr-un fisier temporar, apoi il redenumim.
+    Astfel o rulare intrerupta nu lasa fisiere incomplete care ar fi
+    considerate deja procesate la reluare.
+    """
+    path = Path(path)
+    ok, buf = cv2.imencode(path.suffix, img_bgr, _encode_params(path.suffix.lower(), quality))
+    if not ok:
+        raise ValueError(f"Imaginea nu a putut fi codata ca {path.suffix}")
+    _write_atomic(path, buf)
+
+
+def _write_atomic(path, data):
+    """Scrie continutul (bytes sau tablou) intr-un fisier temporar, apoi il redenumim."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def report_path(dst):
+    """Calea figurii de raport (PNG) pentru imaginea de iesire `dst`."""
+    dst = Path(dst)
+    return dst.with_name(f"{dst.stem}_raport.png")
+
+
+# cache-ul de rezultate al procesului din pool (vezi _init_worker)
+_worker_cache = None
+
+
+def _init_worker(cv_threads, cache=None, cache_bytes=None):
+    global _worker_cache
+    # fiecare proces are deja o imagine de lucru; limitam firele OpenCV
+    # ca sa nu suprasolicitam procesorul
+    cv2.setNumThreads(cv_threads)
+    if cache is not None:
+        _worker_cache = ResultCache(cache, cache_bytes)
+
+
+def _build_tasks(inputs, out_dir, params, fmt, quality, overwrite, report):
+    """Sarcinile (src, dst, params, quality, report) si numarul de imagini sarite."""
+    tasks = []
+    skipped = 0
+    for (src, _), dst in zip(inputs, output_paths(inputs, out_dir, fmt)):
+        if not overwrite and dst.exists():
+            skipped += 1
+            continue
+        tasks.append((str(src), str(dst), params, quality, report))
+    return tasks, skipped
+
+
+def _report_keep(report):
+    # doar imaginea restaurata, direct in BGR; rezultatele de diagnostic
+    # sunt pastrate doar pentru raport
+    return ("ImgRGB", "dark_channel", "t1", "t_refined", "J_restored_rgb") if report else ()
+
+
+def _write_result(dst, result, params, quality, report):
+    """Scrie imaginea restaurata si, optional, figura de raport."""
+    write_image(dst, result.restored, quality)
+    if report:
+        # matplotlib se importa doar cand chiar desenam rapoarte
+        from dehaze_plots import figure_dehaze_results, render_png
+
+        # figura 3, randata fara interfata grafica (Agg)
+        fig = figure_dehaze_results(result.ImgRGB, result.dark_channel, result.t1,
+                                    result.t_refined, result.J_restored_rgb, params["t_min"])
+        _write_atomic(report_path(dst), render_png(fig))
+
+
+def _process_one(task):
+    """Proceseaza o singura imagine (ruleaza intr-un proces din pool)."""
+    src, dst, params, quality, report = task
+    try:
+        keep = _report_keep(report)
+        if _worker_cache is None:
+            result, cached = dehaze_image(decode_image(src), keep=keep, **params), None
+        else:
+            hits = _worker_cache.hits
+            result = _worker_cache.dehaze(src, keep=keep, **params)
+            cached = _worker_cache.hits > hits
+        _write_result(dst, result, params, quality, report)
+        return src, None, cached
+    except Exception as e:
+        return src, f"{type(e).__name__}: {e}", None
+
+
+def _cache_summary(flags):
+    """Rezumatul cache-ului: cate imagini au fost luate din cache / calculate."""
+    return {"hits": sum(1 for f in flags if f), "misses": sum(1 for f in flags if f is False)}
+
+
+def run_batch(inputs, out_dir, params, fmt=None, quality=None, workers=None,
+              chunksize=4, overwrite=False, cv_threads=1, report=False, cache=None,
+              cache_bytes=1 << 30, log=print):
+    """
+    Proceseaza o lista de imagini (ca cea intoarsa de collect_inputs()) in
+    paralel, pe un pool de procese.
+
+    Parametri:
+        params    : parametrii algoritmului (kernel_size, omega, t_min, ...)
+        fmt       : formatul de iesire (ex. "png", "jpg"); None = ca intrarea
+        quality   : calitatea JPEG/WebP (0-100) sau None
+        workers   : numarul de procese (implicit numarul de procesoare)
+        chunksize : cate imagini primeste un proces la o trimitere
+        overwrite : daca este False, imaginile deja procesate sunt sarite
+        report    : scrie si figura cu rezultatele intermediare (PNG) langa
+                    fiecare imagine de iesire, vezi report_path()
+        cache     : directorul unui ResultCache (dehaze_cache.py) comun tuturor
+                    proceselor; imaginile deja procesate cu aceiasi parametri
+                    nu mai sunt recalculate
+        cache_bytes: dimensiunea maxima a cache-ului
+
+    Returneaza:
+        dictionar cu numarul de imagini procesate / sarite / esuate, timpul
+        total si debitul (imagini pe secunda); cu cache, si "cache": numarul
+        de imagini luate din cache (hits) si calculate (misses)
+    """
+    tasks, skipped = _build_tasks(inputs, out_dir, params, fmt, quality, overwrite, report)
+    failed = []
+    cached_flags = []
+    start = time.perf_counter()
+    if tasks:
+        with Pool(workers, initializer=_init_worker,
+                  initargs=(cv_threads, cache, cache_bytes)) as pool:
+            for done, (src, error, cached) in enumerate(
+                    pool.imap_unordered(_process_one, tasks, chunksize=chunksize), 1):
+                cached_flags.append(cached)
+                if error:
+                    failed.append((src, error))
+                    log(f"[{done}/{len(tasks)}] EROARE {src}: {error}")
+                else:
+                    log(f"[{done}/{len(tasks)}] {src}")
+    elapsed = time.perf_counter() - start
+
+    processed = len(tasks) - len(failed)
+    return {
+        "processed": processed,
+        "skipped": skipped,
+        "failed": failed,
+        "elapsed": elapsed,
+        "images_per_second": processed / elapsed if elapsed > 0 else 0.0,
+        **({"cache": _cache_summary(cached_flags)} if cache is not None else {}),
+    }
+
+
+def _load_source(src, params, keep, cache):
+    """
+    Decodeaza imaginea; cu cache, intai cauta rezultatul (fara decodare).
+    Intoarce (imagine decodata sau None, rezultat din cache sau None, cheia din cache).
+    """
+    if cache is None:
+        return decode_image(src), None, None
+    result, key, data = cache.lookup(src, keep, **params)
+    if result is not None:
+        return None, result, key
+    return decode_image(data), None, key
+
+
+def _write_and_store(dst, result, params, quality, report, cache, key):
+    _write_result(dst, result, params, quality, report)
+    if cache is not None and key is not None:
+        cache.store(key, result, _report_keep(report))
+
+
+def _timed_call(function, *args, **kwargs):
+    """Ruleaza function(*args, **kwargs) si intoarce (rezultat, eroare, durata_s)."""
+    start = time.perf_counter()
+    try:
+        value, error = function(*args, **kwargs), None
+    except Exception as e:
+        value, error = None, f"{type(e).__name__}: {e}"
+    return value, error, time.perf_counter() - start
+
+
+def run_pipeline(inputs, out_dir, params, fmt=None, quality=None, readers=2, writers=2,
+                 prefetch=4, pending_writes=4, overwrite=False, report=False, cache=None,
+                 cache_bytes=1 << 30, log=print):
+    """
+    Ca run_batch(), dar intr-un singur proces organizat ca banda de
+    productie: un pool de fire decodeaza imaginile in avans, firul curent
+    aplica algoritmul (cu un DehazeWorkspace refolosit intre imagini), iar un
+    alt pool de fire codeaza si scrie rezultatele (si figurile de raport).
+    Decodarea, calculul si codarea se suprapun (OpenCV elibereaza GIL-ul).
+
+    Cozile sunt limitate: cel mult `prefetch` imagini decodate asteapta
+    calculul si cel mult `pending_writes` rezultate asteapta scrierea, deci
+    memoria nu depinde de numarul de imagini din lot. Cand o coada este
+    plina, etapa dinainte asteapta.
+
+    Cu `cache`, firele de citire cauta intai rezultatul in cache (imaginile
+    gasite nu mai sunt decodate si nici calculate), iar rezultatele noi sunt
+    pastrate de firele de scriere.
+
+    Returneaza acelasi rezumat ca run_batch(), plus "stages": timpul total
+    petrecut in fiecare etapa (decode / compute / encode), care poate depasi
+    durata totala tocmai pentru ca etapele se suprapun.
+    """
+    tasks, skipped = _build_tasks(inputs, out_dir, params, fmt, quality, overwrite, report)
+    failed = []
+    stages = {"decode": 0.0, "compute": 0.0, "encode": 0.0}
+    workspace = DehazeWorkspace()
+    result_cache = None if cache is None else ResultCache(cache, cache_bytes)
+    cached_flags = []
+    done = 0
+
+    def finish(src, write):
+        nonlocal done
+        _, error, seconds = write.result()
+        stages["encode"] += seconds
+        done += 1
+        if error:
+            failed.append((src, error))
+            log(f"[{done}/{len(tasks)}] EROARE {src}: {error}")
+        else:
+            log(f"[{done}/{len(tasks)}] {src}")
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(readers) as read_pool, ThreadPoolExecutor(writers) as write_pool:
+        pending = iter(tasks)
+        decoded = deque()
+        writing = deque()
+
+        def read(task):
+            src, _, task_params, _, task_report = task
+            return read_pool.submit(_timed_call, _load_source, src, task_params,
+                                    _report_keep(task_report), result_cache)
+
+        for task in pending:
+            decoded.append((task, read(task)))
+            if len(decoded) >= prefetch:
+                break
+
+        while decoded:
+            (src, dst, task_params, task_quality, task_report), future = decoded.popleft()
+            # eliberam un loc in coada de decodare
+            for task in pending:
+                decoded.append((task, read(task)))
+                break
+
+            loaded, error, seconds = future.result()
+            stages["decode"] += seconds
+            ImgIn, result, key = loaded if error is None else (None, None, None)
+            if result_cache is not None and error is None:
+                cached_flags.append(result is not None)
+            if result is not None:
+                # luat din cache: nu se mai calculeaza si nici nu se mai scrie inapoi
+                key = None
+            elif error is None:
+                # rezultatele intermediare pentru raport sunt calculate abia in firul de
+                # scriere, deci nu pot sta in bufferele refolosite ale spatiului de lucru
+                result, error, seconds = _timed_call(
+                    dehaze_image, ImgIn, keep=_report_keep(task_report),
+                    workspace=None if task_report else workspace, **task_params)
+                stages["compute"] += seconds
+            del ImgIn
+            if error is not None:
+                done += 1
+                failed.append((src, error))
+                log(f"[{done}/{len(tasks)}] EROARE {src}: {error}")
+                continue
+
+            # asteptam scrierea cea mai veche daca prea multe rezultate sunt in asteptare
+            while len(writing) >= pending_writes:
+                finish(*writing.popleft())
+            writing.append((src, write_pool.submit(
+                _timed_call, _write_and_store, dst, result, task_params, task_quality,
+                task_report, result_cache, key)))
+            del result
+
+        while writing:
+            finish(*writing.popleft())
+    elapsed = time.perf_counter() - start
+
+    processed = len(tasks) - len(failed)
+    return {
+        "processed": processed,
+        "skipped": skipped,
+        "failed": failed,
+        "elapsed": elapsed,
+        "images_per_second": processed / elapsed if elapsed > 0 else 0.0,
+        "stages": stages,
+        **({"cache": _cache_summary(cached_flags)} if cache is not None else {}),
+    }
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description="Eliminarea cetii dintr-un lot de imagini, in paralel."
+    )
+    parser.add_argument("inputs", nargs="+",
+                        help="directoare, fisiere sau modele glob (ex. 'poze/*.jpg')")
+    parser.add_argument("-o", "--output", required=True, help="directorul de iesire")
+    parser.add_argument("--format", default=None,
+                        help="formatul imaginilor de iesire (png, jpg, ...); implicit ca intrarea")
+    parser.add_argument("--quality", type=int, default=None,
+                        help="calitatea JPEG/WebP (0-100)")
+    parser.add_argument("-r", "--recursive", action="store_true",
+                        help="cauta imagini si in subdirectoare (si '**' in modele glob)")
+    parser.add_argument("--kernel-size", type=int, default=15,
+                        help="dimensiunea elementului structurant (impar)")
+    parser.add_argument("--omega", type=float, default=0.95)
+    parser.add_argument("--t-min", type=float, default=0.85)
+    parser.add_argument("--precision", choices=PRECISIONS, default="float64")
+    parser.add_argument("--refinement", choices=list(REFINEMENT_ENGINES), default="morph",
+                        help="motorul de rafinare a transmisiei (implicit morph)")
+    parser.add_argument("-j", "--workers", type=int, default=None,
+                        help="numarul de procese (implicit numarul de procesoare)")
+    parser.add_argument("--chunksize", type=int, default=4,
+                        help="cate imagini se trimit odata unui proces")
+    parser.add_argument("--cv-threads", type=int, default=1,
+                        help="fire OpenCV pentru fiecare proces")
+    parser.add_argument("--overwrite", action="store_true",
+                        help="reproceseaza si imaginile care exista deja in iesire")
+    parser.add_argument("--pipeline", action="store_true",
+                        help="un singur proces: decodare in avans, calcul si scriere asincrona "
+                             "suprapuse (vezi run_pipeline)")
+    parser.add_argument("--readers", type=int, default=2,
+                        help="fire pentru decodare (cu --pipeline)")
+    parser.add_argument("--writers", type=int, default=2,
+                        help="fire pentru codare si scriere (cu --pipeline)")
+    parser.add_argument("--prefetch", type=int, default=4,
+                        help="imagini decodate in avans, cel mult (cu --pipeline)")
+    parser.add_argument("--cache", metavar="DIR",
+                        help="cache pe disc pentru rezultate (imaginile procesate deja cu "
+                             "aceiasi parametri nu se mai recalculeaza)")
+    parser.add_argument("--cache-size-mb", type=int, default=1024,
+                        help="dimensiunea maxima a cache-ului (MiB)")
+    parser.add_argument("--report", action="store_true",
+                        help="scrie si figura cu rezultatele intermediare (<nume>_raport.png)")
+    parser.add_argument("-q", "--quiet", action="store_true",
+                        help="afiseaza doar rezumatul final")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+
+    params = {
+        # ne asiguram ca kernel-ul este impar (la fel ca in interfata grafica)
+        "kernel_size": odd_kernel_size(args.kernel_size),
+        "omega": args.omega,
+        "t_min": args.t_min,
+        "precision": args.precision,
+        "refinement": args.refinement,
+    }
+
+    inputs = collect_inputs(args.inputs, recursive=args.recursive)
+    if not inputs:
+        print("Nu a fost gasita nicio imagine.", file=sys.stderr)
+        return 1
+    try:
+        output_paths(inputs, args.output, args.format)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 1
+
+    log = (lambda *a, **k: None) if args.quiet else print
+    if args.pipeline:
+        summary = run_pipeline(
+            inputs,
+            args.output,
+            params,
+            fmt=args.format,
+            quality=args.quality,
+            readers=args.readers,
+            writers=args.writers,
+            prefetch=args.prefetch,
+            pending_writes=args.writers * 2,
+            overwrite=args.overwrite,
+            report=args.report,
+            cache=args.cache,
+            cache_bytes=args.cache_size_mb << 20,
+            log=log,
+        )
+    else:
+        summary = run_batch(
+            inputs,
+            args.output,
+            params,
+            fmt=args.format,
+            quality=args.quality,
+            workers=args.workers,
+            chunksize=args.chunksize,
+            overwrite=args.overwrite,
+            cv_threads=args.cv_threads,
+            report=args.report,
+            cache=args.cache,
+            cache_bytes=args.cache_size_mb << 20,
+            log=log,
+        )
+
+    if args.quiet:
+        # chiar si in modul silentios raportam imaginile esuate
+        for src, error in summary["failed"]:
+            print(f"EROARE {src}: {error}", file=sys.stderr)
+    print(
+        f"Procesate: {summary['processed']}, sarite: {summary['skipped']}, "
+        f"esuate: {len(summary['failed'])} | "
+        f"{summary['elapsed']:.2f} s, {summary['images_per_second']:.2f} imagini/s"
+    )
+    if "cache" in summary:
+        print(f"Cache: {summary['cache']['hits']} imagini din cache, "
+              f"{summary['cache']['misses']} calculate")
+    if "stages" in summary and not args.quiet:
+        print("Timp pe etape: " + ", ".join(f"{stage} {seconds:.2f} s"
+                                            for stage, seconds in summary["stages"].items()))
+    return 1 if summary["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
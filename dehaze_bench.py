@@ -0,0 +1,352 @@
+#  Benchmark pe etape pentru algoritmul de dehazing, cu comparare fata de o referinta
+#
+#  Exemple:
+#      python dehaze_bench.py -o bench.json                       # masurare
+#      python dehaze_bench.py --sizes 0.3 2 8 --kernel-sizes 3 15 51 -o bench.json
+#      python dehaze_bench.py -o nou.json --compare bench.json    # regresii fata de referinta
+#      python dehaze_bench.py --import-time --startup-command "python main.py"  # bugetele de pornire
+
+import argparse
+import glob
+import json
+import os
+import platform
+import shlex
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import cv2
+import numpy as np
+
+from dehaze_morphology import PRECISIONS, REFINEMENT_ENGINES, _run_stages, decode_image
+
+# imaginile de exemplu livrate cu proiectul
+SAMPLES_GLOB = os.path.join(os.path.dirname(os.path.abspath(__file__)), "poza_ex*.*")
+
+# dimensiunile implicite ale imaginilor sintetice (megapixeli) si kernel-urile
+DEFAULT_SIZES = (0.3, 2, 8, 20, 50)
+DEFAULT_KERNEL_SIZES = (3, 15, 31, 51)
+
+# bugetul (s) pentru importul modulului de algoritm, intr-un proces nou
+IMPORT_BUDGET_S = 0.5
+# bugetul (s) de la lansarea aplicatiei grafice pana la afisarea ferestrei
+# (pentru executabilul "onefile" include si dezarhivarea in directorul temporar)
+FIRST_WINDOW_BUDGET_S = 3.0
+# modulele care nu trebuie incarcate de importul algoritmului
+HEAVY_MODULES = ("matplotlib", "tkinter")
+
+_IMPORT_PROBE = ("import json, sys, time; t = time.perf_counter(); import {module}; "
+                 "t = time.perf_counter() - t; "
+                 "print(json.dumps([t, [m for m in {heavy!r} if m in sys.modules]]))")
+
+
+def synthetic_hazy_image(megapixels, seed=0):
+    """
+    Genereaza o imagine cu ceata (BGR, uint8, raport 4:3) dupa modelul
+    I = J * t + A * (1 - t): o scena texturata J, o harta de adancime care
+    creste spre partea de sus a imaginii si lumina atmosferica A.
+    """
+    width = int(round(np.sqrt(megapixels * 1e6 * 4 / 3)))
+    height = int(round(width * 3 / 4))
+    rng = np.random.default_rng(seed)
+
+    # scena: zgomot la rezolutie mica, marit (pete netede de culoare) + detalii fine
+    coarse = rng.random((max(height // 64, 2), max(width // 64, 2), 3)).astype(np.float32)
+    scene = cv2.resize(coarse, (width, height), interpolation=cv2.INTER_CUBIC)
+    scene += rng.normal(0, 0.05, (height, width, 1)).astype(np.float32)
+
+    # adancimea creste spre orizont; transmisia t = exp(-beta * d)
+    depth = np.linspace(2.0, 0.2, height, dtype=np.float32)[:, None]
+    transmission = np.exp(-1.2 * depth)
+    A = np.array([0.9, 0.92, 0.95], dtype=np.float32)
+    hazy = scene * transmission[..., None] + A * (1 - transmission[..., None])
+    return np.clip(hazy * 255, 0, 255).astype(np.uint8)
+
+
+def _run_once(ImgIn, params, trace):
+    """
+    Ruleaza toate etapele o data si intoarce {etapa: (timp_s, memorie_varf_octeti)}.
+    Memoria se masoara doar daca `trace` este True (tracemalloc incetineste calculul).
+
+    Timpul unei etape nu include etapele calculate in interiorul ei (ex.
+    imaginea gri ceruta de rafinarea "guided"); memoria de varf le include.
+    """
+    stages = {}
+    # etapele in curs, de la rularea completa spre interior:
+    # [timpul etapelor imbricate, varful memoriei inaintea lor]
+    running = [[0.0, 0]]
+
+    def memo(stage, _params, compute):
+        frame = [0.0, 0]
+        if trace:
+            base, peak = tracemalloc.get_traced_memory()
+            # reset_peak() sterge si varful etapei parinte: il pastram
+            running[-1][1] = max(running[-1][1], peak)
+            tracemalloc.reset_peak()
+        running.append(frame)
+        start = time.perf_counter()
+        value = compute()
+        elapsed = time.perf_counter() - start
+        running.pop()
+        running[-1][0] += elapsed
+        peak = max(frame[1], tracemalloc.get_traced_memory()[1]) - base if trace else None
+        stages[stage] = (elapsed - frame[0], peak)
+        return value
+
+    if trace:
+        tracemalloc.start()
+    start = time.perf_counter()
+    _run_stages(ImgIn, memo, **params)
+    total = time.perf_counter() - start
+    if trace:
+        peak_total = max(running[0][1], tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    stages["total"] = (total, peak_total if trace else None)
+    return stages
+
+
+def bench_image(ImgIn, params, repeat=3):
+    """
+    Timpul minim (din `repeat` rulari) si memoria de varf pentru fiecare etapa.
+    """
+    best = {}
+    for _ in range(repeat):
+        for stage, (elapsed, _) in _run_once(ImgIn, params, trace=False).items():
+            best[stage] = min(best.get(stage, elapsed), elapsed)
+    traced = _run_once(ImgIn, params, trace=True)
+    return {
+        stage: {"time_s": best[stage], "peak_bytes": traced[stage][1]}
+        for stage in best
+    }
+
+
+def _bench_decode(path, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        ImgIn = decode_image(path)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return ImgIn, best
+
+
+def run_benchmarks(sizes, kernel_sizes, precisions, include_samples=True, repeat=3,
+                   omega=0.95, t_min=0.85, refinements=("morph",), log=print):
+    """Ruleaza toate combinatiile si intoarce lista de rezultate (dictionare)."""
+    images = []
+    for mp in sizes:
+        images.append((f"synthetic_{mp}mp", lambda mp=mp: (synthetic_hazy_image(mp), None)))
+    if include_samples:
+        for path in sorted(glob.glob(SAMPLES_GLOB)):
+            images.append((os.path.basename(path), lambda path=path: _bench_decode(path, repeat)))
+
+    results = []
+    for name, load in images:
+        ImgIn, decode_time = load()
+        height, width = ImgIn.shape[:2]
+        for precision in precisions:
+            for kernel_size in kernel_sizes:
+                for refinement in refinements:
+                    params = {"kernel_size": kernel_size, "omega": omega, "t_min": t_min,
+                              "precision": precision, "refinement": refinement}
+                    stages = bench_image(ImgIn, params, repeat)
+                    if decode_time is not None:
+                        stages["decode"] = {"time_s": decode_time, "peak_bytes": None}
+                    results.append({
+                        "image": name,
+                        "width": width,
+                        "height": height,
+                        "megapixels": round(width * height / 1e6, 2),
+                        "kernel_size": kernel_size,
+                        "precision": precision,
+                        "refinement": refinement,
+                        "stages": stages,
+                    })
+                    total = stages["total"]
+                    log(f"{name:>20} {width}x{height} k={kernel_size:<3} {precision} "
+                        f"{refinement}: {total['time_s'] * 1000:9.1f} ms, "
+                        f"varf {total['peak_bytes'] / 2**20:8.1f} MiB")
+        del ImgIn
+    return results
+
+
+def _result_key(result):
+    # referintele mai vechi nu au motorul de rafinare (erau toate "morph")
+    return (result["image"], result["kernel_size"], result["precision"],
+            result.get("refinement", "morph"))
+
+
+def compare(results, baseline, time_tolerance=0.15, memory_tolerance=0.10, min_time_s=0.002):
+    """
+    Compara rezultatele cu o referinta. O etapa este regresie daca timpul
+    creste cu mai mult de `time_tolerance` (si etapa dureaza cel putin
+    `min_time_s`, ca sa ignoram zgomotul etapelor foarte scurte) sau memoria
+    de varf creste cu mai mult de `memory_tolerance`.
+
+    Returneaza lista de regresii (dictionare).
+    """
+    reference = {_result_key(r): r for r in baseline["results"]}
+    regressions = []
+    for result in results:
+        base = reference.get(_result_key(result))
+        if base is None:
+            continue
+        for stage, now in result["stages"].items():
+            before = base["stages"].get(stage)
+            if before is None:
+                continue
+            if (now["time_s"] >= min_time_s
+                    and now["time_s"] > before["time_s"] * (1 + time_tolerance)):
+                regressions.append({"key": _result_key(result), "stage": stage, "metric": "time_s",
+                                    "baseline": before["time_s"], "current": now["time_s"]})
+            if (now["peak_bytes"] is not None and before["peak_bytes"]
+                    and now["peak_bytes"] > before["peak_bytes"] * (1 + memory_tolerance)):
+                regressions.append({"key": _result_key(result), "stage": stage,
+                                    "metric": "peak_bytes",
+                                    "baseline": before["peak_bytes"], "current": now["peak_bytes"]})
+    return regressions
+
+
+def import_time(module="dehaze_morphology", repeat=5):
+    """
+    Timpul de import al unui modul, masurat in procese Python noi (minimul
+    din `repeat` rulari, deci fara compilarea .pyc de la prima rulare).
+
+    Returneaza un dictionar cu timpul (time_s) si modulele din HEAVY_MODULES
+    incarcate de import (heavy_modules, ar trebui sa fie gol).
+    """
+    code = _IMPORT_PROBE.format(module=module, heavy=HEAVY_MODULES)
+    best, heavy = None, set()
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, "-c", code], check=True, capture_output=True,
+                                text=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout
+        elapsed, loaded = json.loads(output)
+        best = elapsed if best is None else min(best, elapsed)
+        heavy.update(loaded)
+    return {"module": module, "time_s": best, "heavy_modules": sorted(heavy)}
+
+
+def startup_time(command, repeat=3, timeout=120):
+    """
+    Timpul de pornire al aplicatiei grafice (main.py sau executabilul
+    construit cu main.spec). Aplicatia este lansata cu variabila de mediu
+    DEHAZE_STARTUP_PROBE, scrie momentele la care fereastra a aparut si la
+    care a devenit utilizabila, apoi se inchide singura.
+
+    Returneaza minimul din `repeat` rulari pentru: first_window_s (de la
+    lansare pana la prima fereastra), ready_s (pana la incarcarea
+    algoritmului si a Matplotlib) si wall_s (pana la terminarea procesului).
+    """
+    if isinstance(command, str):
+        command = shlex.split(command)
+    best = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        probe = os.path.join(tmp, "startup.json")
+        env = dict(os.environ, DEHAZE_STARTUP_PROBE=probe)
+        for _ in range(repeat):
+            launched = time.time()
+            start = time.perf_counter()
+            subprocess.run(command, env=env, check=True, timeout=timeout)
+            wall = time.perf_counter() - start
+            with open(probe, encoding="utf-8") as f:
+                times = json.load(f)
+            run = {"first_window_s": times["first_window_at"] - launched,
+                   "ready_s": times["ready_at"] - launched, "wall_s": wall}
+            for name, value in run.items():
+                best[name] = min(best.get(name, value), value)
+    return {"command": command, **best}
+
+
+def check_startup(import_module=None, startup_command=None, import_budget=IMPORT_BUDGET_S,
+                  first_window_budget=FIRST_WINDOW_BUDGET_S, repeat=3):
+    """Masoara bugetele de pornire; intoarce (rezultate, lista depasirilor)."""
+    results, failures = {}, []
+    if import_module:
+        imp = results["import"] = import_time(import_module, max(repeat, 3))
+        print(f"import {imp['module']}: {imp['time_s'] * 1000:.0f} ms "
+              f"(buget {import_budget * 1000:.0f} ms)")
+        if imp["time_s"] > import_budget:
+            failures.append(f"importul {imp['module']} dureaza {imp['time_s']:.3f} s")
+        if imp["heavy_modules"]:
+            failures.append(f"importul {imp['module']} incarca {', '.join(imp['heavy_modules'])}")
+    if startup_command:
+        st = results["startup"] = startup_time(startup_command, repeat)
+        print(f"pornire: fereastra in {st['first_window_s']:.2f} s "
+              f"(buget {first_window_budget:.2f} s), utilizabila in {st['ready_s']:.2f} s")
+        if st["first_window_s"] > first_window_budget:
+            failures.append(f"fereastra apare dupa {st['first_window_s']:.2f} s")
+    return results, failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark pe etape pentru dehazing.")
+    parser.add_argument("--sizes", type=float, nargs="*", default=list(DEFAULT_SIZES),
+                        help="dimensiunile imaginilor sintetice, in megapixeli")
+    parser.add_argument("--kernel-sizes", type=int, nargs="+", default=list(DEFAULT_KERNEL_SIZES))
+    parser.add_argument("--precision", nargs="+", choices=PRECISIONS, default=list(PRECISIONS))
+    parser.add_argument("--refinement", nargs="+", choices=list(REFINEMENT_ENGINES),
+                        default=["morph"], help="motoarele de rafinare comparate")
+    parser.add_argument("--no-samples", action="store_true",
+                        help="nu include imaginile poza_ex* livrate cu proiectul")
+    parser.add_argument("--repeat", type=int, default=3, help="rulari pe combinatie (se pastreaza minimul)")
+    parser.add_argument("-o", "--output", help="fisierul JSON cu rezultatele")
+    parser.add_argument("--compare", metavar="BASELINE", help="fisierul JSON de referinta")
+    parser.add_argument("--time-tolerance", type=float, default=0.15)
+    parser.add_argument("--memory-tolerance", type=float, default=0.10)
+    parser.add_argument("--import-time", nargs="?", const="dehaze_morphology", metavar="MODULE",
+                        help="verifica bugetul de import al modulului (implicit dehaze_morphology)")
+    parser.add_argument("--startup-command", metavar="CMD",
+                        help='verifica timpul pana la prima fereastra, ex. "python main.py"')
+    parser.add_argument("--import-budget", type=float, default=IMPORT_BUDGET_S)
+    parser.add_argument("--first-window-budget", type=float, default=FIRST_WINDOW_BUDGET_S)
+    args = parser.parse_args(argv)
+
+    if args.import_time or args.startup_command:
+        # doar bugetele de pornire, fara benchmark-ul pe etape
+        results, failures = check_startup(args.import_time, args.startup_command,
+                                          args.import_budget, args.first_window_budget,
+                                          args.repeat)
+        if args.output:
+            with open(args.output, "w", encoding="utf-8") as f:
+                json.dump(results, f, indent=2)
+        for failure in failures:
+            print(f"DEPASIRE: {failure}")
+        return 1 if failures else 0
+
+    results = run_benchmarks(args.sizes, args.kernel_sizes, args.precision,
+                             include_samples=not args.no_samples, repeat=args.repeat,
+                             refinements=args.refinement)
+    report = {
+        "meta": {
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "opencv": cv2.__version__,
+            "machine": platform.machine(),
+            "cpu_count": os.cpu_count(),
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.time_tolerance, args.memory_tolerance)
+        for r in regressions:
+            name, kernel_size, precision, refinement = r["key"]
+            print(f"REGRESIE {name} k={kernel_size} {precision} {refinement} "
+                  f"[{r['stage']}] {r['metric']}: "
+                  f"{r['baseline']:.4g} -> {r['current']:.4g}")
+        print(f"{len(regressions)} regresii fata de {args.compare}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,306 @@
+#  Cache persistent (pe disc) pentru rezultatele algoritmului de dehazing
+#
+#  Cheia unei intrari este amprenta continutului imaginii (octetii fisierului
+#  sau pixelii unui tablou), toti parametrii algoritmului si
+#  ALGORITHM_VERSION. Fiecare intrare este un fisier .npz cu imaginea
+#  restaurata, A si, optional, rezultatele intermediare cerute prin `keep`.
+#
+#  Cache-ul poate fi folosit simultan din mai multe procese: fiecare intrare
+#  este scrisa intr-un fisier temporar si apoi redenumita (atomic), iar o
+#  intrare stearsa de alt proces intre timp este tratata ca lipsa. Cand
+#  dimensiunea totala depaseste limita, sunt sterse intrarile folosite cel
+#  mai de demult (data modificarii fisierului este actualizata la fiecare
+#  citire).
+#
+#  Exemplu:
+#      cache = ResultCache("~/.cache/dehaze", max_bytes=2 << 30)
+#      result = cache.dehaze("poza.jpg", omega=0.9, keep=("dark_channel",))
+#      print(cache.stats())
+
+import argparse
+import hashlib
+import inspect
+import json
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+from zipfile import BadZipFile
+
+import numpy as np
+
+from dehaze_morphology import (
+    ALGORITHM_VERSION,
+    DehazeResult,
+    _check_keep,
+    dehaze_image,
+    image_digest,
+)
+
+# argumentele dehaze_image() care nu schimba rezultatul (nu intra in cheie)
+_NOT_IN_KEY = {"image", "instrument", "keep", "workspace", "out"}
+
+# dupa depasirea limitei stergem pana la aceasta fractiune din ea, ca sa nu
+# reparcurgem directorul la fiecare scriere
+_EVICT_TARGET = 0.9
+
+# fisierele temporare mai vechi de atat (s) raman de la procese intrerupte
+_STALE_TMP_SECONDS = 3600
+
+
+def source_digest(image):
+    """
+    Amprenta unei surse de imagine: a octetilor pentru fisiere si imagini
+    codate (fara decodare), a pixelilor pentru tablourile deja decodate.
+    Intoarce (amprenta, sursa), unde pentru o cale sursa este continutul
+    fisierului deja citit (ca sa nu fie citit inca o data la decodare).
+    """
+    if isinstance(image, np.ndarray) and image.ndim >= 2:
+        return "pixels:" + image_digest(image), image
+    if isinstance(image, (str, os.PathLike)):
+        image = Path(image).expanduser().read_bytes()
+    h = hashlib.blake2b(digest_size=16)
+    h.update(memoryview(image).cast("B"))
+    return "bytes:" + h.hexdigest(), image
+
+
+def _canonical_params(params):
+    """Toti parametrii dehaze_image() care influenteaza rezultatul, cu valorile implicite completate."""
+    bound = inspect.signature(dehaze_image).bind(None, **params)
+    bound.apply_defaults()
+    canonical = {}
+    for name, value in bound.arguments.items():
+        if name in _NOT_IN_KEY:
+            continue
+        if isinstance(value, np.ndarray):
+            value = value.tolist()
+        elif isinstance(value, str):
+            value = value.upper() if name == "channel_order" else value
+        canonical[name] = value
+    return canonical
+
+
+class ResultCache:
+    """
+    Cache pe disc pentru rezultatele dehaze_image(), limitat la `max_bytes`
+    octeti, cu eliminarea celor mai vechi intrari (LRU).
+
+    Statisticile (hits, misses, stores, evictions) sunt ale acestei instante;
+    stats() adauga numarul de intrari si spatiul ocupat pe disc de toate
+    procesele care folosesc directorul.
+    """
+
+    def __init__(self, directory, max_bytes=1 << 30):
+        self.directory = Path(directory).expanduser()
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        # estimarea spatiului ocupat; recalculata exact doar la depasirea limitei
+        self._approx_bytes = sum(size for _, size, _ in self._entries())
+
+    def key(self, source_key, params):
+        """Cheia (hex) pentru amprenta imaginii si parametrii algoritmului."""
+        description = json.dumps({"image": source_key, "params": _canonical_params(params),
+                                  "version": ALGORITHM_VERSION}, sort_keys=True)
+        return hashlib.blake2b(description.encode(), digest_size=20).hexdigest()
+
+    def _path(self, key):
+        return self.directory / key[:2] / f"{key}.npz"
+
+    def get(self, key, fields=()):
+        """
+        Tablourile intrarii (restored, A si `fields`) ca dictionar, sau None
+        daca intrarea lipseste sau nu contine toate campurile cerute.
+        """
+        path = self._path(key)
+        try:
+            with np.load(path, allow_pickle=False) as entry:
+                if not {"restored", "A", *fields} <= set(entry.files):
+                    arrays = None
+                else:
+                    arrays = {name: entry[name] for name in ("restored", "A", *fields)}
+            if arrays is not None:
+                # marcam intrarea ca folosita recent (pentru LRU)
+                os.utime(path)
+        except (FileNotFoundError, BadZipFile, ValueError, EOFError):
+            arrays = None
+        with self._lock:
+            if arrays is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return arrays
+
+    def _load(self, key):
+        """Toate tablourile intrarii, fara statistici, sau None daca lipseste sau este corupta."""
+        try:
+            with np.load(self._path(key), allow_pickle=False) as entry:
+                return {name: entry[name] for name in entry.files}
+        except (FileNotFoundError, BadZipFile, ValueError, EOFError):
+            return None
+
+    def put(self, key, arrays):
+        """Scrie atomic o intrare (dictionar nume -> tablou)."""
+        size = sum(np.asarray(a).nbytes for a in arrays.values())
+        if size > self.max_bytes:
+            return
+        path = self._path(key)
+        path.parent.mkdir(exist_ok=True)
+        tmp_path = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp_path, "wb") as f:
+            np.savez(f, **arrays)
+        os.replace(tmp_path, path)
+        with self._lock:
+            self.stores += 1
+            self._approx_bytes += path.stat().st_size
+            over = self._approx_bytes > self.max_bytes
+        if over:
+            self._evict()
+
+    def _entries(self):
+        """(cale, dimensiune, ultima folosire) pentru toate intrarile de pe disc."""
+        entries = []
+        now = time.time()
+        for sub in self.directory.iterdir():
+            if not sub.is_dir():
+                continue
+            for path in sub.iterdir():
+                try:
+                    st = path.stat()
+                    if path.suffix == ".npz":
+                        entries.append((path, st.st_size, st.st_mtime))
+                    elif path.suffix == ".tmp" and now - st.st_mtime > _STALE_TMP_SECONDS:
+                        path.unlink()
+                except FileNotFoundError:
+                    # sters intre timp de alt proces
+                    continue
+        return entries
+
+    def _evict(self):
+        """Sterge intrarile folosite cel mai de demult pana sub limita."""
+        entries = sorted(self._entries(), key=lambda e: e[2])
+        total = sum(size for _, size, _ in entries)
+        evicted = 0
+        for path, size, _ in entries:
+            if total <= self.max_bytes * _EVICT_TARGET:
+                break
+            try:
+                path.unlink()
+                evicted += 1
+            except FileNotFoundError:
+                pass
+            total -= size
+        with self._lock:
+            self.evictions += evicted
+            self._approx_bytes = total
+
+    def clear(self):
+        """Sterge toate intrarile."""
+        for path, _, _ in self._entries():
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+        with self._lock:
+            self._approx_bytes = 0
+
+    def stats(self):
+        """Statisticile cache-ului (dictionar serializabil JSON)."""
+        entries = self._entries()
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "stores": self.stores,
+                "evictions": self.evictions,
+                "entries": len(entries),
+                "bytes": sum(size for _, size, _ in entries),
+                "max_bytes": self.max_bytes,
+            }
+
+    def lookup(self, image, keep=(), image_key=None, **params):
+        """
+        Cauta rezultatul in cache, fara sa il calculeze. Intoarce
+        (rezultat, cheie, sursa): rezultatul este un DehazeResult sau None
+        (lipsa), cheia se foloseste apoi la store(), iar sursa este imaginea
+        de dat mai departe lui dehaze_image() (pentru o cale, continutul
+        fisierului deja citit).
+        """
+        keep = tuple(keep)
+        _check_keep(keep)
+        if image_key is None:
+            image_key, image = source_digest(image)
+        key = self.key(image_key, params)
+        arrays = self.get(key, keep)
+        if arrays is None:
+            return None, key, image
+        channel_order = params.get("channel_order", "BGR").upper()
+        fields = {name: (lambda value=arrays[name]: value) for name in keep}
+        return DehazeResult(arrays["restored"], arrays["A"], channel_order, fields), key, image
+
+    def store(self, key, result, keep=()):
+        """
+        Pastreaza in cache imaginea restaurata, A si rezultatele intermediare
+        `keep`. Rezultatele intermediare deja pastrate in intrare (cerute la
+        un apel anterior cu alt `keep`) raman in ea.
+        """
+        entry = self._load(key) or {}
+        entry.update(restored=result.restored, A=np.asarray(result.A))
+        for name in keep:
+            entry[name] = getattr(result, name)
+        self.put(key, entry)
+
+    def dehaze(self, image, keep=(), image_key=None, **params):
+        """
+        La fel ca dehaze_image(), dar rezultatul este luat din cache daca
+        imaginea a mai fost procesata cu aceiasi parametri; altfel este
+        calculat si pastrat.
+
+        Parametri:
+            image    : orice sursa acceptata de decode_image(); caile si
+                       imaginile codate sunt identificate dupa octeti, fara
+                       decodare
+            keep     : rezultatele intermediare pastrate (si in cache); o
+                       intrare fara unul dintre ele este recalculata
+            image_key: amprenta imaginii, daca este deja cunoscuta (altfel se
+                       calculeaza cu source_digest())
+            params   : parametrii dehaze_image() (kernel_size, omega, ...)
+        """
+        options = {name: params.pop(name) for name in ("instrument", "workspace", "out")
+                   if name in params}
+        result, key, image = self.lookup(image, keep, image_key, **params)
+        if result is not None:
+            out = options.get("out")
+            if out is not None:
+                np.copyto(out, result.restored)
+                result.restored = out
+            return result
+
+        result = dehaze_image(image, keep=keep, **params, **options)
+        self.store(key, result, keep)
+        return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Statisticile / golirea cache-ului de rezultate.")
+    parser.add_argument("directory", help="directorul cache-ului")
+    parser.add_argument("--clear", action="store_true", help="sterge toate intrarile")
+    args = parser.parse_args(argv)
+
+    cache = ResultCache(args.directory)
+    if args.clear:
+        cache.clear()
+    stats = cache.stats()
+    print(f"{stats['entries']} intrari, {stats['bytes'] / 2**20:.1f} MiB")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
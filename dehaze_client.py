@@ -0,0 +1,88 @@
+#  Client minimal pentru serviciul de dehazing (dehaze_server.py)
+#
+#  Foloseste doar biblioteca standard, deci un script care trimite imagini
+#  serviciului nu mai plateste importul numpy / OpenCV.
+#
+#  Exemplu:
+#      python dehaze_client.py poza.jpg -o rezultat.png --omega 0.9
+
+import argparse
+import json
+import sys
+import time
+from urllib.error import HTTPError
+from urllib.parse import urlencode
+from urllib.request import Request, urlopen
+
+DEFAULT_URL = "http://127.0.0.1:8765"
+
+
+def dehaze_remote(data, url=DEFAULT_URL, content_type="application/octet-stream",
+                  retries=3, timeout=120.0, **params):
+    """
+    Trimite o imagine codata (bytes, ex. continutul unui JPEG) serviciului
+    si intoarce imaginea restaurata codata (PNG implicit, vezi parametrul
+    `format`). Parametrii algoritmului (kernel_size, omega, t_min, ...) si
+    `format` / `quality` se dau ca argumente cu nume.
+
+    Daca serviciul este ocupat (503), cererea este reluata de cel mult
+    `retries` ori, dupa pauza ceruta de serviciu (Retry-After).
+    """
+    request_url = f"{url.rstrip('/')}/dehaze?{urlencode(params)}"
+    for attempt in range(retries + 1):
+        request = Request(request_url, data=data, headers={"Content-Type": content_type})
+        try:
+            with urlopen(request, timeout=timeout) as response:
+                return response.read()
+        except HTTPError as e:
+            if e.code != 503 or attempt == retries:
+                raise
+            time.sleep(float(e.headers.get("Retry-After", 1)))
+
+
+def service_stats(url=DEFAULT_URL, timeout=10.0):
+    """Statisticile serviciului (GET /stats), ca dictionar."""
+    with urlopen(f"{url.rstrip('/')}/stats", timeout=timeout) as response:
+        return json.load(response)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Trimite o imagine serviciului de dehazing.")
+    parser.add_argument("input", nargs="?", help="imaginea cu ceata")
+    parser.add_argument("-o", "--output", help="imaginea restaurata")
+    parser.add_argument("--url", default=DEFAULT_URL)
+    parser.add_argument("--kernel-size", type=int)
+    parser.add_argument("--omega", type=float)
+    parser.add_argument("--t-min", type=float)
+    parser.add_argument("--refinement", help="motorul de rafinare a transmisiei (morph, box, guided)")
+    parser.add_argument("--format", help="formatul raspunsului (png, jpg, ...)")
+    parser.add_argument("--stats", action="store_true", help="afiseaza statisticile serviciului")
+    args = parser.parse_args(argv)
+
+    if args.stats:
+        print(json.dumps(service_stats(args.url), indent=2))
+        return 0
+    if not args.input or not args.output:
+        parser.error("sunt necesare imaginea de intrare si -o/--output (sau --stats)")
+
+    params = {name: value for name, value in (("kernel_size", args.kernel_size),
+                                              ("omega", args.omega), ("t_min", args.t_min),
+                                              ("refinement", args.refinement),
+                                              ("format", args.format))
+              if value is not None}
+    if "format" not in params and "." in args.output:
+        params["format"] = args.output.rsplit(".", 1)[1]
+    with open(args.input, "rb") as f:
+        data = f.read()
+    try:
+        result = dehaze_remote(data, args.url, **params)
+    except HTTPError as e:
+        print(f"Eroare {e.code}: {e.read().decode('utf-8', 'replace')}", file=sys.stderr)
+        return 1
+    with open(args.output, "wb") as f:
+        f.write(result)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,140 @@
+#  Instrumentare pe etape pentru algoritmul de dehazing
+#
+#  Exemplu:
+#      metrics = StageMetrics()
+#      for path in imagini:
+#          dehaze_with_morphology(path, instrument=metrics)
+#      metrics.export("dehaze.prom")     # format text Prometheus (textfile collector)
+#      metrics.export("dehaze.json")     # sau JSON
+
+import json
+import os
+import threading
+
+import numpy as np
+
+# limitele (in secunde) ale histogramei de durate pe etapa
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _arrays(value):
+    """Tablourile numpy dintr-un rezultat de etapa (tablou, tuplu, lista)."""
+    if isinstance(value, np.ndarray):
+        return [value]
+    if isinstance(value, (tuple, list)):
+        return [a for v in value for a in _arrays(v)]
+    return []
+
+
+class StageMetrics:
+    """
+    Agregator de metrici pe etape, folosit ca `instrument` la dehaze_image() /
+    DehazePipeline.run(). Pentru fiecare etapa tine:
+      - numarul de rulari si timpul total
+      - histograma duratelor (limitele din `buckets`)
+      - numarul de tablouri produse si octetii alocati pentru ele
+      - forma si tipul ultimului rezultat
+
+    Inregistrarea costa doar cateva operatii pe dictionare, deci poate ramane
+    activa in productie. Este sigura la apeluri din mai multe fire.
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        self._stages = {}
+
+    def __call__(self, stage, seconds, value):
+        arrays = _arrays(value)
+        with self._lock:
+            entry = self._stages.get(stage)
+            if entry is None:
+                entry = self._stages[stage] = {
+                    "count": 0,
+                    "seconds": 0.0,
+                    "bucket_counts": [0] * len(self.buckets),
+                    "arrays": 0,
+                    "bytes": 0,
+                    "shape": None,
+                    "dtype": None,
+                }
+            entry["count"] += 1
+            entry["seconds"] += seconds
+            for i, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    entry["bucket_counts"][i] += 1
+                    break
+            entry["arrays"] += len(arrays)
+            entry["bytes"] += sum(a.nbytes for a in arrays)
+            if arrays:
+                entry["shape"] = list(arrays[0].shape)
+                entry["dtype"] = str(arrays[0].dtype)
+
+    def reset(self):
+        """Sterge toate metricile adunate."""
+        with self._lock:
+            self._stages.clear()
+
+    def summary(self):
+        """Metricile agregate, ca dictionar {etapa: {...}} (histograma cumulativa)."""
+        with self._lock:
+            result = {}
+            for stage, entry in self._stages.items():
+                cumulative, running = {}, 0
+                for bound, count in zip(self.buckets, entry["bucket_counts"]):
+                    running += count
+                    cumulative[str(bound)] = running
+                cumulative["+Inf"] = entry["count"]
+                result[stage] = {
+                    "count": entry["count"],
+                    "seconds_total": entry["seconds"],
+                    "seconds_mean": entry["seconds"] / entry["count"],
+                    "histogram": cumulative,
+                    "arrays_total": entry["arrays"],
+                    "bytes_total": entry["bytes"],
+                    "last_shape": entry["shape"],
+                    "last_dtype": entry["dtype"],
+                }
+            return result
+
+    def to_prometheus(self, prefix="dehaze"):
+        """Metricile in formatul text Prometheus (pentru node_exporter textfile collector)."""
+        summary = self.summary()
+        lines = [
+            f"# HELP {prefix}_stage_seconds Durata etapelor algoritmului de dehazing.",
+            f"# TYPE {prefix}_stage_seconds histogram",
+        ]
+        for stage, s in summary.items():
+            for bound, count in s["histogram"].items():
+                lines.append(f'{prefix}_stage_seconds_bucket{{stage="{stage}",le="{bound}"}} {count}')
+            lines.append(f'{prefix}_stage_seconds_sum{{stage="{stage}"}} {s["seconds_total"]:.6f}')
+            lines.append(f'{prefix}_stage_seconds_count{{stage="{stage}"}} {s["count"]}')
+
+        lines += [
+            f"# HELP {prefix}_stage_output_arrays_total Tablourile produse de fiecare etapa.",
+            f"# TYPE {prefix}_stage_output_arrays_total counter",
+        ]
+        lines += [f'{prefix}_stage_output_arrays_total{{stage="{stage}"}} {s["arrays_total"]}'
+                  for stage, s in summary.items()]
+        lines += [
+            f"# HELP {prefix}_stage_output_bytes_total Octetii alocati pentru rezultatele fiecarei etape.",
+            f"# TYPE {prefix}_stage_output_bytes_total counter",
+        ]
+        lines += [f'{prefix}_stage_output_bytes_total{{stage="{stage}"}} {s["bytes_total"]}'
+                  for stage, s in summary.items()]
+        return "\n".join(lines) + "\n"
+
+    def export(self, path):
+        """
+        Scrie metricile intr-un fisier: JSON pentru extensia .json, altfel
+        format text Prometheus. Scrierea este atomica (fisier temporar +
+        redenumire), deci un colector nu citeste niciodata un fisier partial.
+        """
+        if str(path).lower().endswith(".json"):
+            content = json.dumps(self.summary(), indent=2)
+        else:
+            content = self.to_prometheus()
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(content)
+        os.replace(tmp_path, path)
@@ -1,21 +1,219 @@
-#  Implementarea algoritmului de dehazing si functiile de afisare
+#  Implementarea algoritmului de dehazing (fara dependente de afisare; figurile
+#  sunt in dehaze_plots.py)
+
+import hashlib
+import time
+from collections import OrderedDict
 
 import cv2
 import numpy as np
-import matplotlib.pyplot as plt
 
+from dehaze_filters import MORPHOLOGY_ENGINES, close_open_rect, erode_rect
+
+
+def _to_bgr(img, channel_order="BGR"):
+    """
+    Aduce un tablou deja decodat (gri, 3 sau 4 canale, uint8) la formatul
+    BGR pe 3 canale folosit intern de algoritm.
+    """
+    order = channel_order.upper()
+    if order not in ("BGR", "RGB"):
+        raise ValueError(f"Ordine a canalelor necunoscuta: {channel_order}")
+    if img.dtype != np.uint8:
+        raise TypeError(f"Imaginea trebuie sa fie de tip uint8, nu {img.dtype}")
+
+    if img.ndim == 2:
+        return cv2.cvtColor(img, cv2.COLOR_GRAY2BGR)
+    if img.ndim == 3 and img.shape[2] == 4:
+        code = cv2.COLOR_BGRA2BGR if order == "BGR" else cv2.COLOR_RGBA2BGR
+        return cv2.cvtColor(img, code)
+    if img.ndim == 3 and img.shape[2] == 3:
+        if order == "RGB":
+            return cv2.cvtColor(img, cv2.COLOR_RGB2BGR)
+        return img
+    raise ValueError(f"Forma imaginii nu este suportata: {img.shape}")
+
+
+# factorii de reducere pe care decodorul OpenCV ii poate aplica direct
+# (pentru JPEG, la decodarea DCT – mult mai rapid decat decodare + redimensionare)
+_REDUCED_DECODE_FLAGS = (
+    (8, cv2.IMREAD_REDUCED_COLOR_8),
+    (4, cv2.IMREAD_REDUCED_COLOR_4),
+    (2, cv2.IMREAD_REDUCED_COLOR_2),
+)
 
-def dehaze_with_morphology(img_path, kernel_size=15, omega=0.95, t_min=0.85):
+
+def _check_scale(scale):
+    if scale is not None and not 0 < scale <= 1:
+        raise ValueError(f"Scara de previzualizare trebuie sa fie in (0, 1], nu {scale}")
+
+
+def downscale_image(img, scale):
+    """Micsoreaza imaginea cu factorul `scale` (in (0, 1]); None sau 1 -> neschimbata."""
+    if scale is None or scale >= 1:
+        return img
+    height, width = img.shape[:2]
+    size = (max(int(round(width * scale)), 1), max(int(round(height * scale)), 1))
+    return cv2.resize(img, size, interpolation=cv2.INTER_AREA)
+
+
+def odd_kernel_size(kernel_size):
+    """Kernel-ul impar folosit pentru `kernel_size`: cel par este marit cu 1."""
+    return kernel_size if kernel_size % 2 == 1 else kernel_size + 1
+
+
+def preview_kernel_size(kernel_size, scale):
+    """
+    Dimensiunea kernel-ului echivalenta la scara `scale`, ca previzualizarea
+    sa aiba acelasi efect morfologic relativ (impara, minim 1).
     """
-    Aplica algoritmul de dehazing pe o imagine.
+    if scale is None or scale >= 1:
+        return kernel_size
+    return odd_kernel_size(max(int(round(kernel_size * scale)), 1))
+
+
+def decode_image(source, channel_order="BGR", scale=None):
+    """
+    Incarca / decodeaza o imagine si o intoarce in formatul BGR (uint8)
+    folosit intern de algoritm.
+
+    Parametri:
+        source       : una dintre
+                         - calea catre imagine (string sau PathLike)
+                         - imaginea codata in memorie (bytes, bytearray,
+                           memoryview sau ndarray uint8 1D, ex. continutul
+                           unui fisier JPEG/PNG)
+                         - imaginea deja decodata (ndarray H x W, H x W x 3
+                           sau H x W x 4, uint8)
+        channel_order: ordinea canalelor pentru un ndarray deja decodat
+                       ("BGR" sau "RGB"); ignorat pentru cai si buffere
+        scale        : daca este dat (in (0, 1]), imaginea este intoarsa
+                       micsorata; cai si buffere sunt decodate direct la
+                       rezolutie redusa (cv2.IMREAD_REDUCED_*) cand se poate
+
+    Returneaza:
+        ImgIn - imaginea in format BGR, uint8, H x W x 3
+    """
+    _check_scale(scale)
+
+    # imagine deja decodata -> doar aducem canalele la BGR
+    if isinstance(source, np.ndarray) and source.ndim >= 2:
+        return downscale_image(_to_bgr(source, channel_order), scale)
+
+    # cel mai mare factor de reducere suportat de decodor care nu depaseste 1/scale
+    factor, flag = 1, cv2.IMREAD_COLOR
+    if scale is not None:
+        for f, reduced_flag in _REDUCED_DECODE_FLAGS:
+            if f * scale <= 1 + 1e-9:
+                factor, flag = f, reduced_flag
+                break
+    remaining = None if scale is None else scale * factor
+
+    # imagine codata aflata in memorie -> o decodam fara a trece prin disc
+    if isinstance(source, (bytes, bytearray, memoryview, np.ndarray)):
+        buf = np.frombuffer(source, dtype=np.uint8)
+        ImgIn = cv2.imdecode(buf, flag) if buf.size else None
+        if ImgIn is None:
+            raise ValueError("Bufferul nu contine o imagine valida.")
+        return downscale_image(ImgIn, remaining)
+
+    # altfel, consideram ca este o cale catre un fisier de pe disc
+    ImgIn = cv2.imread(str(source), flag)
+    if ImgIn is None:
+        raise FileNotFoundError(f"Imaginea nu a fost gasita la calea: {source}")
+    return downscale_image(ImgIn, remaining)
+
+
+# moduri de precizie suportate:
+#   "float64" – calculul original, in double (implicit)
+#   "float32" – morfologia DCP exacta pe uint8, restul in float32
+#               (aprox. de 3-6 ori mai putina memorie si mai rapid)
+PRECISIONS = ("float64", "float32")
+
+
+# rezultatele de diagnostic ale algoritmului, in ordinea in care le intorcea
+# dehaze_image() (ca tuplu) vezi DehazeResult
+RESULT_FIELDS = ("ImgRGB", "ImgGray", "dark_channel", "t1", "t_refined", "J_restored_rgb")
+
+# versiunea algoritmului; se incrementeaza la orice modificare care schimba
+# rezultatele, ca sa invalideze rezultatele pastrate pe disc (dehaze_cache.py)
+ALGORITHM_VERSION = 1
+
+
+def dehaze_with_morphology(img_path, kernel_size=15, omega=0.95, t_min=0.85,
+                           precision="float64", **options):
+    """
+    Aplica algoritmul de dehazing pe o imagine de pe disc.
+
+    Este un simplu inlocuitor peste dehaze_image(): citeste imaginea si
+    apeleaza algoritmul pe tabloul decodat (la previzualizare, decodarea se
+    face direct la rezolutie redusa).
 
     Parametri:
         img_path   : calea catre imagine (string)
         kernel_size: dimensiunea elementului structurant (impar)
         omega      : parametru (0-1) care controleaza cat de agresiv se scoate ceata
         t_min      : transmisia minima (0-1), previne intunecarea excesiva
+        precision  : "float64" (implicit) sau "float32", vezi PRECISIONS
+        options    : optiunile suplimentare ale dehaze_image()
 
     Returneaza:
+        aceleasi valori ca dehaze_image()
+    """
+    return dehaze_image(
+        img_path,
+        kernel_size=kernel_size,
+        omega=omega,
+        t_min=t_min,
+        precision=precision,
+        **options,
+    )
+
+
+def dehaze_image(image, kernel_size=15, omega=0.95, t_min=0.85, channel_order="BGR",
+                 precision="float64", atmospheric_light=None, light_method="select",
+                 light_stride=1, morphology="auto", refinement="morph", preview_scale=None,
+                 instrument=None, keep=RESULT_FIELDS, workspace=None, out=None):
+    """
+    Aplica algoritmul de dehazing pe o imagine aflata deja in memorie.
+
+    Parametri:
+        image        : imaginea decodata (ndarray uint8, BGR sau RGB), imaginea
+                       codata (bytes / buffer) sau calea ei, vezi decode_image()
+        kernel_size  : dimensiunea elementului structurant (impar)
+        omega        : parametru (0-1) care controleaza cat de agresiv se scoate ceata
+        t_min        : transmisia minima (0-1), previne intunecarea excesiva
+        channel_order: ordinea canalelor pentru un ndarray ("BGR" sau "RGB");
+                       imaginea restaurata (result.restored) are aceeasi ordine
+        precision    : "float64" (implicit) sau "float32", vezi PRECISIONS
+        atmospheric_light: A fix / estimat anterior (3 valori BGR in [0, 1]);
+                       daca este dat, etapa de estimare a lui A este sarita
+        light_method : metoda de estimare a lui A, vezi ATMOSPHERIC_LIGHT_METHODS
+        light_stride : pas de subesantionare pentru estimarea lui A (previzualizari)
+        morphology   : motorul operatiilor morfologice, vezi MORPHOLOGY_ENGINES
+                       (toate dau acelasi rezultat, difera doar viteza)
+        refinement   : motorul de rafinare a transmisiei, vezi REFINEMENT_ENGINES
+                       ("morph" implicit; "box" / "guided" sunt mai rapide la
+                       kernel-uri mari, dar dau alt rezultat)
+        preview_scale: daca este dat (in (0, 1]), algoritmul ruleaza pe imaginea
+                       micsorata cu acest factor, cu kernel_size scalat
+                       proportional (vezi preview_kernel_size()); omega si
+                       t_min se pastreaza, deci valorile gasite la
+                       previzualizare se aplica direct la rezolutie completa
+        instrument   : functie instrument(etapa, secunde, rezultat) apelata dupa
+                       fiecare etapa calculata (inclusiv "decode"), ex. un
+                       dehaze_metrics.StageMetrics; None = fara niciun cost
+        keep         : rezultatele de diagnostic care raman disponibile (vezi
+                       RESULT_FIELDS); keep=() pastreaza doar imaginea
+                       restaurata si elibereaza imediat rezultatele intermediare
+        workspace    : un DehazeWorkspace refolosit intre apeluri (imagini de
+                       aceeasi rezolutie), ca sa nu se mai aloce tablouri noi
+        out          : tabloul (H x W x 3, uint8) in care se scrie imaginea
+                       restaurata, in ordinea `channel_order`
+
+    Returneaza:
+        un DehazeResult cu imaginea restaurata (`restored`) si, la cerere,
+        rezultatele de diagnostic; se poate despacheta ca tuplul
         ImgRGB         - imaginea originala, in format RGB
         ImgGray        - imaginea originala, in tonuri de gri
         dark_channel   - canalul intunecat (Dark Channel Prior)
@@ -24,168 +222,747 @@ def dehaze_with_morphology(img_path, kernel_size=15, omega=0.95, t_min=0.85):
         J_restored_rgb - imaginea restaurata, fara ceata (RGB)
     """
 
-    # 1. Citirea imaginii de pe disc (OpenCV o incarca in BGR)
-    ImgIn = cv2.imread(img_path)
-    if ImgIn is None:
-        raise FileNotFoundError(f"Imaginea nu a fost gasita la calea: {img_path}")
+    # 1. Aducem imaginea la formatul BGR (ca in OpenCV), fara acces la disc
+    ImgIn = _timed(instrument, "decode",
+                   lambda: decode_image(image, channel_order, scale=preview_scale))
+    kernel_size = preview_kernel_size(kernel_size, preview_scale)
 
-    # 2. Conversii de baza
-    ImgRGB = cv2.cvtColor(ImgIn, cv2.COLOR_BGR2RGB)      # pentru afisare corecta
-    ImgGray = cv2.cvtColor(ImgIn, cv2.COLOR_BGR2GRAY)    # imagine pe un singur canal
-    ImgFloat = ImgIn.astype(np.float64) / 255.0          # 0–255 -> 0–1 (double)
+    # fara memorare: fiecare etapa se calculeaza direct
+    memo = _instrumented(lambda stage, params, compute: compute(), instrument)
+    return _run_stages(ImgIn, memo,
+                       kernel_size, omega, t_min, precision,
+                       atmospheric_light, light_method, light_stride, morphology,
+                       channel_order, keep, workspace, out, refinement)
 
-    # 3. Elementul structurant folosit in operatiile morfologice
-    kernel_morph = cv2.getStructuringElement(
+
+def _timed(instrument, stage, compute):
+    """Calculeaza o etapa si, daca exista instrumentare, ii raporteaza durata."""
+    if instrument is None:
+        return compute()
+    start = time.perf_counter()
+    value = compute()
+    instrument(stage, time.perf_counter() - start, value)
+    return value
+
+
+def _instrumented(memo, instrument):
+    """
+    Invelis peste memo() care raporteaza catre `instrument` fiecare etapa
+    calculata efectiv (cele venite din cache nu sunt raportate). Fara
+    instrumentare intoarce memo() neschimbat, deci nu adauga niciun cost.
+
+    Timpii sunt exclusivi: o etapa calculata in interiorul alteia (ex. imaginea
+    gri ceruta de rafinarea "guided") este scazuta din timpul etapei parinte,
+    astfel incat suma etapelor nu depaseste timpul total.
+    """
+    if instrument is None:
+        return memo
+    # timpul etapelor imbricate, pentru fiecare etapa in curs de calcul
+    nested = []
+
+    def timed(stage, compute):
+        nested.append(0.0)
+        start = time.perf_counter()
+        value = compute()
+        elapsed = time.perf_counter() - start
+        inner = nested.pop()
+        if nested:
+            nested[-1] += elapsed
+        instrument(stage, elapsed - inner, value)
+        return value
+
+    def instrumented_memo(stage, params, compute):
+        return memo(stage, params, lambda: timed(stage, compute))
+
+    return instrumented_memo
+
+
+class DehazeWorkspace:
+    """
+    Buffere preallocate pentru procesarea repetata a imaginilor de aceeasi
+    rezolutie (ex. cadrele unui flux video).
+
+    Fiecare etapa isi scrie rezultatele intermediare in bufferele spatiului
+    de lucru (prin parametrii `workspace=` / `out=` / `dst=`), asa ca dupa
+    primul cadru nu se mai aloca niciun tablou de dimensiunea imaginii.
+    Bufferele sunt create la prima folosire si realocate doar daca se
+    schimba rezolutia sau precizia.
+
+    Atentie: rezultatele intermediare intoarse de un apel (ex. t1) sunt chiar
+    aceste buffere, deci sunt suprascrise la urmatorul apel cu acelasi
+    spatiu de lucru. Un spatiu de lucru nu se foloseste din mai multe fire.
+    """
+
+    def __init__(self):
+        self._buffers = {}
+
+    def get(self, name, shape, dtype):
+        """Bufferul `name` cu forma si tipul cerute (refolosit daca exista)."""
+        shape, dtype = tuple(shape), np.dtype(dtype)
+        buf = self._buffers.get(name)
+        if buf is None or buf.shape != shape or buf.dtype != dtype:
+            buf = self._buffers[name] = np.empty(shape, dtype=dtype)
+        return buf
+
+    @property
+    def nbytes(self):
+        """Memoria ocupata de toate bufferele."""
+        return sum(buf.nbytes for buf in self._buffers.values())
+
+    def clear(self):
+        """Elibereaza toate bufferele."""
+        self._buffers.clear()
+
+
+def _buffer(workspace, name, shape, dtype):
+    """Bufferul din spatiul de lucru, sau None (tablou nou) daca nu exista spatiu de lucru."""
+    if workspace is None:
+        return None
+    return workspace.get(name, shape, dtype)
+
+
+def structuring_element(kernel_size):
+    """Elementul structurant (patrat kernel_size x kernel_size) folosit in operatiile morfologice."""
+    return cv2.getStructuringElement(
         cv2.MORPH_RECT,
         (kernel_size, kernel_size)
     )
 
-    # Pasul 1 – Canalul intunecat (Dark Channel Prior - DCP)
+
+def compute_dark_channel(img, kernel_morph, morphology="auto", workspace=None):
+    """
+    Pasul 1 – Canalul intunecat (Dark Channel Prior - DCP).
+    Depinde doar de imagine si de kernel_size.
+
+    Minimul si eroziunea sunt monotone, deci pe o imagine uint8 rezultatul
+    este exact canalul intunecat al imaginii in [0, 1], inmultit cu 255.
+    """
+    shape = img.shape[:2]
     # luam minimul pe cele 3 canale pentru fiecare pixel
-    min_channel = np.min(ImgFloat, axis=2)
+    min_channel = np.min(img, axis=2, out=_buffer(workspace, "dark_min", shape, img.dtype))
     # aplicam o eroziune (minim local intr-o fereastra kernel_size x kernel_size)
-    dark_channel = cv2.erode(min_channel, kernel_morph)
+    return erode_rect(min_channel, kernel_morph.shape[0], morphology,
+                      dst=_buffer(workspace, "dark", shape, img.dtype))
+
+
+# metode de estimare a luminii atmosferice A:
+#   "select" – selectie partiala O(n) (histograma pe uint8 / partition pe double),
+#              cu egalitatile departajate ca la o sortare stabila (implicit)
+#   "sort"   – sortarea completa O(n log n) din varianta initiala (np.argsort)
+ATMOSPHERIC_LIGHT_METHODS = ("select", "sort")
+
+
+def _top_indices(flat_dc, num_brightest):
+    """
+    Indicii celor mai mari num_brightest valori, in ordinea in care i-ar da
+    np.argsort(flat_dc, kind="stable")[-num_brightest:], dar in O(n).
+    """
+    n = flat_dc.size
+    # pragul = a num_brightest-a cea mai mare valoare
+    if flat_dc.dtype == np.uint8:
+        # histograma cu 256 de niveluri, parcursa de la valorile mari spre cele mici
+        counts_from_top = np.cumsum(np.bincount(flat_dc, minlength=256)[::-1])
+        threshold = 255 - int(np.searchsorted(counts_from_top, num_brightest))
+    else:
+        threshold = np.partition(flat_dc, n - num_brightest)[n - num_brightest]
+
+    above = np.flatnonzero(flat_dc > threshold)
+    # dintre pixelii egali cu pragul, o sortare stabila i-ar pastra pe ultimii
+    ties = np.flatnonzero(flat_dc == threshold)
+    ties = ties[len(ties) - (num_brightest - len(above)):]
+    indices = np.concatenate((ties, above))
+
+    # ordonam candidatii (putini) dupa valoare, apoi dupa pozitie
+    return indices[np.lexsort((indices, flat_dc[indices]))]
+
+
+def estimate_atmospheric_light(img, dark_channel, method="select", stride=1):
+    """
+    Pasul 2 – Estimarea luminii atmosferice A (vector cu 3 valori, BGR, in [0, 1]).
+    Depinde doar de imagine si de canalul intunecat (ambele double sau ambele uint8).
+
+    Parametri:
+        method: "select" (implicit, O(n)) sau "sort", vezi ATMOSPHERIC_LIGHT_METHODS
+        stride: pas de subesantionare (>1 pentru previzualizari rapide: se
+                folosesc doar pixelii de pe o grila cu pasul `stride`)
+    """
+    if stride > 1:
+        img = img[::stride, ::stride]
+        dark_channel = dark_channel[::stride, ::stride]
 
-    # Pasul 2 – Estimarea luminii atmosferice A
     num_pixels = dark_channel.size
     # consideram cei mai luminosi 0.1% pixeli din canalul intunecat
     num_brightest = int(max(num_pixels * 0.001, 1))
 
     flat_dc = dark_channel.ravel()
-    # sortam valorile si luam indicii celor mai mari valori
-    indices = np.argsort(flat_dc)[-num_brightest:]
-
-    flat_img = ImgFloat.reshape(-1, 3)
-    candidate_pixels = flat_img[indices]
+    if method == "select":
+        # selectam direct indicii celor mai mari valori, fara sortare completa
+        indices = _top_indices(flat_dc, num_brightest)
+    elif method == "sort":
+        # sortam valorile si luam indicii celor mai mari valori
+        indices = np.argsort(flat_dc)[-num_brightest:]
+    else:
+        raise ValueError(f"Metoda necunoscuta pentru A: {method} "
+                         f"(posibil: {', '.join(ATMOSPHERIC_LIGHT_METHODS)})")
+
+    rows, cols = np.divmod(indices, dark_channel.shape[1])
+    candidate_pixels = img[rows, cols]
 
     # calculam luminozitatea fiecarui pixel candidat (B+G+R)
     brightness = np.sum(candidate_pixels, axis=1)
     brightest_pixel_index = np.argmax(brightness)
     # alegem pixelul cu luminozitate maxima ca estimare pentru A
     A = candidate_pixels[brightest_pixel_index]
+    if img.dtype == np.uint8:
+        A = A / 255.0
+    return A
+
+
+def normalized_dark_channel(img, A, kernel_morph, morphology="auto", workspace=None):
+    """
+    Canalul intunecat al imaginii normalizate prin A (I_min), din care se
+    obtine transmisia initiala t1 = 1 - omega * I_min. Nu depinde de omega,
+    deci poate fi refolosit pentru mai multe valori omega.
+
+    Pentru o imagine double se foloseste formula originala; pentru o imagine
+    uint8 calculul se face in float32. In ambele cazuri imaginea este
+    normalizata canal cu canal (fara temporare H x W x 3).
+    """
+    shape = img.shape[:2]
+    if img.dtype == np.uint8:
+        # factorul de normalizare pe fiecare canal: 1 / (255 * A)
+        scale = (1.0 / (255.0 * np.asarray(A, dtype=np.float64))).astype(np.float32)
+        dtype = np.float32
+    else:
+        # normalizam imaginea prin A (pe fiecare canal)
+        scale = np.asarray(A, dtype=np.float64)
+        dtype = np.float64
+    normalize = np.multiply if img.dtype == np.uint8 else np.divide
 
-    # Pasul 3 – Transmisia initiala t1
-    # normalizam imaginea prin A (pe fiecare canal)
-    normalized_img = ImgFloat / A
     # luam minimul pe canale din imaginea normalizata
-    min_channel_normalized = np.min(normalized_img, axis=2)
+    min_channel_normalized = normalize(img[..., 0], scale[0],
+                                       out=_buffer(workspace, "t1_min", shape, dtype))
+    channel = _buffer(workspace, "t1_channel", shape, dtype)
+    for c in (1, 2):
+        np.minimum(min_channel_normalized, normalize(img[..., c], scale[c], out=channel),
+                   out=min_channel_normalized)
+
     # aplicam din nou eroziune pentru a obtine minimul local
-    I_min = cv2.erode(min_channel_normalized, kernel_morph)
-    # transmisia initiala conform formulei din articol
-    t1 = 1.0 - (omega * I_min)
-
-    # Pasul 4 – Rafinarea transmisiei (morfologic)
-    # Closing: umple gauri mici intunecate din harta de transmisie
-    t2 = cv2.morphologyEx(t1, cv2.MORPH_CLOSE, kernel_morph)
-    # Opening: elimina pete albe izolate
-    t_refined = cv2.morphologyEx(t2, cv2.MORPH_OPEN, kernel_morph)
-    # impunem un prag minim pentru a evita valori prea mici (care ar intuneca imaginea)
-    t_refined = np.maximum(t_refined, t_min)
-
-    # Pasul 5 – Restaurarea imaginii J
-    # extindem harta de transmisie de la 1 canal la 3 canale
-    transmission_map_3d = np.stack([t_refined] * 3, axis=-1)
-    # aplicam formula inversa a modelului de ceata
-    J = (ImgFloat - A) / transmission_map_3d + A
+    return erode_rect(min_channel_normalized, kernel_morph.shape[0], morphology,
+                      dst=_buffer(workspace, "t1", shape, dtype))
 
-    # convertim inapoi la intervalul 0–255 si la tip uint8
-    J_restored = np.clip(J * 255, 0, 255).astype(np.uint8)
-    # convertim BGR -> RGB pentru afisare
-    J_restored_rgb = cv2.cvtColor(J_restored, cv2.COLOR_BGR2RGB)
 
-    return ImgRGB, ImgGray, dark_channel, t1, t_refined, J_restored_rgb
+def transmission_from_dark(I_min, omega):
+    """
+    t = 1 - omega * I_min, calculat pe loc in tabloul I_min
+    (-omega * I_min + 1 da exact aceleasi valori).
+    """
+    dtype = I_min.dtype.type
+    I_min *= -dtype(omega)
+    I_min += dtype(1.0)
+    return I_min
+
 
+def initial_transmission(img, A, omega, kernel_morph, morphology="auto", workspace=None):
+    """
+    Pasul 3 – Transmisia initiala t1.
+    Depinde de imagine, A, kernel_size si omega.
+    """
+    I_min = normalized_dark_channel(img, A, kernel_morph, morphology, workspace)
+    # transmisia initiala conform formulei din articol
+    return transmission_from_dark(I_min, omega)
 
-# Functii de vizualizare (folosite de GUI)
 
-def plot_morph_ops(ImgGray, kernel_size):
+def refine_transmission(t1, kernel_morph, morphology="auto", workspace=None):
     """
-    Figura 1 – operatii morfologice de baza:
-      - eroziune
-      - dilatare
-      - opening
-      - closing
-    aplicate imaginii in tonuri de gri.
+    Pasul 4 – Rafinarea transmisiei (morfologic), inainte de pragul t_min.
+
+    Closing (umple gauri mici intunecate din harta de transmisie) urmat de
+    opening (elimina pete albe izolate), calculate combinat, vezi
+    dehaze_filters.close_open_rect().
     """
-    kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (kernel_size, kernel_size))
+    return close_open_rect(t1, kernel_morph.shape[0], morphology,
+                           dst=_buffer(workspace, "refined", t1.shape, t1.dtype))
+
 
-    ImgErosion = cv2.erode(ImgGray, kernel)
-    ImgDilation = cv2.dilate(ImgGray, kernel)
-    ImgOpening = cv2.morphologyEx(ImgGray, cv2.MORPH_OPEN, kernel)
-    ImgClosing = cv2.morphologyEx(ImgGray, cv2.MORPH_CLOSE, kernel)
+# fereastra filtrului ghidat, ca multiplu al lui kernel_size (He et al. folosesc
+# o fereastra de cateva ori mai mare decat cea a canalului intunecat)
+GUIDED_WINDOW_FACTOR = 4
+# regularizarea filtrului ghidat: cu cat este mai mare, cu atat rezultatul
+# seamana mai mult cu o medie simpla (transmisia este in [0, 1])
+GUIDED_EPS = 1e-3
 
-    titles = ['Original', 'Eroziune', 'Dilatare', 'Opening', 'Closing']
-    images = [ImgGray, ImgErosion, ImgDilation, ImgOpening, ImgClosing]
 
-    fig, axes = plt.subplots(1, 5, figsize=(15, 4))
-    for i in range(5):
-        axes[i].imshow(images[i], cmap='gray')
-        axes[i].set_title(titles[i])
-        axes[i].axis('off')
-    fig.suptitle('Figura 1 – Operatii morfologice de baza aplicate imaginii cu ceata',
-                 fontsize=12)
-    plt.show()
+def refine_transmission_box(t1, kernel_morph, workspace=None):
+    """
+    Pasul 4, varianta "box" – media transmisiei pe o fereastra
+    kernel_size x kernel_size. cv2.boxFilter foloseste sume glisante, deci
+    costul pe pixel nu depinde de dimensiunea ferestrei.
+    """
+    return cv2.boxFilter(t1, -1, kernel_morph.shape[::-1],
+                         dst=_buffer(workspace, "refined", t1.shape, t1.dtype))
 
 
-def plot_gray_hist(ImgGray):
+def refine_transmission_guided(t1, guide, kernel_morph, eps=GUIDED_EPS, workspace=None):
     """
-    Figura 2 – afiseaza imaginea in tonuri de gri si histograma
-    distributiei nivelurilor de gri.
+    Pasul 4, varianta "guided" – filtrul ghidat (He, Sun, Tang), cu imaginea
+    gri (uint8) drept ghid: transmisia este netezita, dar urmeaza marginile
+    obiectelor din imagine. Foloseste doar medii pe ferestre (cv2.boxFilter),
+    deci costul pe pixel nu depinde de dimensiunea ferestrei
+    (GUIDED_WINDOW_FACTOR * kernel_size).
     """
-    fig, axes = plt.subplots(1, 2, figsize=(12, 4))
+    dtype = t1.dtype.type
+    size = kernel_morph.shape[0] * GUIDED_WINDOW_FACTOR
+    size = (size, size)
+
+    def mean(x):
+        return cv2.boxFilter(x, -1, size)
+
+    I = np.multiply(guide, dtype(1.0 / 255.0), dtype=t1.dtype)
+    mean_I = mean(I)
+    mean_t = mean(t1)
+    # coeficientii modelului liniar local t ~ a * I + b
+    a = mean(I * t1)
+    a -= mean_I * mean_t
+    var_I = mean(I * I)
+    var_I -= mean_I * mean_I
+    var_I += dtype(eps)
+    a /= var_I
+    b = mean_t
+    b -= a * mean_I
+    # media coeficientilor pe ferestre, aplicata pe ghid
+    q = np.multiply(mean(a), I, out=_buffer(workspace, "refined", t1.shape, t1.dtype))
+    q += mean(b)
+    # transmisia ramane cel mult 1 (limita de jos o impune t_min)
+    return np.minimum(q, dtype(1.0), out=q)
+
+
+def _refine_morph(t1, kernel_morph, guide, morphology="auto", workspace=None):
+    return refine_transmission(t1, kernel_morph, morphology, workspace)
+
+
+def _refine_box(t1, kernel_morph, guide, morphology="auto", workspace=None):
+    return refine_transmission_box(t1, kernel_morph, workspace)
+
+
+def _refine_guided(t1, kernel_morph, guide, morphology="auto", workspace=None):
+    return refine_transmission_guided(t1, guide(), kernel_morph, workspace=workspace)
+
+
+# motoarele pentru rafinarea transmisiei (Pasul 4):
+#   "morph"  – closing urmat de opening (implicit, varianta din articol)
+#   "box"    – medie pe fereastra kernel_size x kernel_size (cost constant pe pixel)
+#   "guided" – filtru ghidat de imaginea gri (cost constant pe pixel), vezi
+#              refine_transmission_guided()
+# Fiecare motor este o functie engine(t1, kernel_morph, guide, morphology,
+# workspace) care intoarce transmisia rafinata (inainte de pragul t_min);
+# guide() intoarce imaginea gri (uint8), calculata doar daca este ceruta.
+REFINEMENT_ENGINES = {
+    "morph": _refine_morph,
+    "box": _refine_box,
+    "guided": _refine_guided,
+}
+
+
+def register_refinement(name, engine):
+    """
+    Adauga (sau inlocuieste) un motor de rafinare a transmisiei, selectabil
+    apoi prin parametrul `refinement` al dehaze_image(). Vezi
+    REFINEMENT_ENGINES pentru semnatura functiei `engine`.
+    """
+    REFINEMENT_ENGINES[name] = engine
+
+
+def threshold_transmission(t_morph, t_min, workspace=None):
+    """
+    Impune pragul minim t_min pe harta de transmisie rafinata, pentru a evita
+    valori prea mici (care ar intuneca imaginea).
+    """
+    return np.maximum(t_morph, np.asarray(t_min, dtype=t_morph.dtype),
+                      out=_buffer(workspace, "t_refined", t_morph.shape, t_morph.dtype))
+
 
-    axes[0].imshow(ImgGray, cmap='gray', vmin=0, vmax=255)
-    axes[0].axis('off')
-    axes[0].set_title('Imagine initiala (gri)')
+def restore_image(img, A, t_refined, channel_order="BGR", out=None, workspace=None):
+    """
+    Pasul 5 – Restaurarea imaginii J (uint8) din harta de transmisie
+    rafinata (cu pragul t_min deja aplicat).
 
-    axes[1].hist(ImgGray.ravel(), 256, range=[0, 255], density=True)
-    axes[1].set_title('Histograma nivelelor de gri - imagine originală')
+    Imaginea de intrare si A sunt BGR; J este scrisa direct in ordinea
+    `channel_order` ("BGR" sau "RGB"), fara o conversie separata, in tabloul
+    `out` (H x W x 3, uint8) daca este dat.
+    Pentru o imagine uint8 calculul se face in float32, canal cu canal.
+    """
+    if out is not None and (out.shape != img.shape or out.dtype != np.uint8):
+        raise ValueError(f"Tabloul de iesire trebuie sa fie {img.shape} uint8, "
+                         f"nu {out.shape} {out.dtype}")
+    rgb = channel_order.upper() == "RGB"
+    if img.dtype == np.uint8:
+        A32 = np.asarray(A, dtype=np.float32)
+        J_restored = np.empty_like(img) if out is None else out
+        channel = _buffer(workspace, "restore_channel", img.shape[:2], np.float32)
+        for c in range(3):
+            J = np.multiply(img[..., c], np.float32(1.0 / 255.0), out=channel)
+            J -= A32[c]
+            J /= t_refined
+            J += A32[c]
+            J *= np.float32(255.0)
+            np.clip(J, 0, 255, out=J)
+            # atribuirea trunchiaza la uint8, la fel ca astype()
+            J_restored[..., 2 - c if rgb else c] = J
+        return J_restored
+
+    if rgb:
+        # lucram pe vederi cu canalele inversate -> rezultatul iese direct RGB
+        img = img[..., ::-1]
+        A = np.asarray(A)[::-1]
+
+    # aplicam formula inversa a modelului de ceata, J = (I - A) / t + A;
+    # harta de transmisie (1 canal) se extinde la 3 canale prin broadcasting
+    J = np.subtract(img, A, out=_buffer(workspace, "restore", img.shape, np.float64))
+    J /= t_refined[..., None]
+    J += A
 
-    fig.suptitle('Figura 2 – Imagine gri și histograma corespunzatoare', fontsize=12)
-    plt.tight_layout(rect=[0, 0.03, 1, 0.95])
-    plt.show()
+    # convertim inapoi la intervalul 0–255 si la tip uint8
+    J *= 255
+    np.clip(J, 0, 255, out=J)
+    if out is None:
+        return J.astype(np.uint8)
+    # copierea trunchiaza la uint8, la fel ca astype()
+    np.copyto(out, J, casting="unsafe")
+    return out
 
 
-def plot_dehaze_results(ImgRGB, dark_channel, t1, t_refined, J_restored_rgb, t_min):
+class DehazeResult:
     """
-    Figura 3 – afiseaza pe aceeasi figura:
-      - imaginea originala
-      - canalul intunecat (DCP)
-      - transmisia initiala
-      - transmisia rafinata
-      - imaginea restaurata
-      - histograma imaginii restaurate
+    Rezultatul algoritmului de dehazing.
+
+    `restored` (imaginea fara ceata, uint8, in ordinea canalelor ceruta de
+    apelant) si `A` sunt calculate mereu. Campurile de diagnostic din
+    RESULT_FIELDS sunt calculate abia la primul acces si apoi pastrate;
+    cele care nu au fost cerute prin parametrul `keep` nu sunt disponibile
+    (iar rezultatele intermediare de care depind sunt eliberate).
+
+    Pentru compatibilitate, obiectul se comporta ca tuplul de 6 valori
+    intors anterior:
+        ImgRGB, ImgGray, dark_channel, t1, t_refined, J_restored_rgb = result
+        J_restored_rgb = result[-1]
     """
-    fig, axes = plt.subplots(2, 3, figsize=(18, 10))
-    fig.suptitle('Figura 3 – Rezultatele implementării intermediare (Dehazing)',
-                 fontsize=16)
 
-    axes[0, 0].imshow(ImgRGB)
-    axes[0, 0].set_title('Imagine originala (I)')
-    axes[0, 0].axis('off')
+    def __init__(self, restored, A, channel_order, fields):
+        self.restored = restored
+        self.A = A
+        self.channel_order = channel_order
+        # campurile inca necalculate: {nume: functie}
+        self._pending = fields
+
+    def __getattr__(self, name):
+        # apelat doar pentru atributele care nu exista inca
+        if name not in RESULT_FIELDS:
+            raise AttributeError(f"{type(self).__name__} nu are atributul {name}")
+        compute = self.__dict__.get("_pending", {}).pop(name, None)
+        if compute is None:
+            raise AttributeError(f"Rezultatul {name} nu a fost pastrat (vezi parametrul keep)")
+        value = compute()
+        setattr(self, name, value)
+        return value
 
-    axes[0, 1].imshow(dark_channel, cmap='gray')
-    axes[0, 1].set_title('Canalul intunecat (DCP)')
-    axes[0, 1].axis('off')
+    def __iter__(self):
+        return (getattr(self, name) for name in RESULT_FIELDS)
 
-    axes[0, 2].imshow(t1, cmap='gray', vmin=0, vmax=1)
-    axes[0, 2].set_title('Transmisia initiala (t1)')
-    axes[0, 2].axis('off')
+    def __len__(self):
+        return len(RESULT_FIELDS)
 
-    axes[1, 0].imshow(t_refined, cmap='gray', vmin=0, vmax=1)
-    axes[1, 0].set_title(f'Transmisia rafinată (t_min = {t_min:.2f})')
-    axes[1, 0].axis('off')
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return tuple(getattr(self, name) for name in RESULT_FIELDS[index])
+        return getattr(self, RESULT_FIELDS[index])
 
-    axes[1, 1].imshow(J_restored_rgb)
-    axes[1, 1].set_title('Imagine restaurată (J)')
-    axes[1, 1].axis('off')
 
-    axes[1, 2].hist(J_restored_rgb.ravel(), 256, range=[0, 255], density=True)
-    axes[1, 2].set_title('Histograma imaginii restaurate')
+def _check_precision(precision):
+    if precision not in PRECISIONS:
+        raise ValueError(f"Precizie necunoscuta: {precision} (posibil: {', '.join(PRECISIONS)})")
 
-    plt.tight_layout(rect=[0, 0.03, 1, 0.95])
-    plt.show()
 
+def _check_keep(keep):
+    unknown = set(keep) - set(RESULT_FIELDS)
+    if unknown:
+        raise ValueError(f"Rezultate necunoscute in keep: {', '.join(sorted(unknown))} "
+                         f"(posibil: {', '.join(RESULT_FIELDS)})")
+
+
+def _run_stages(ImgIn, memo, kernel_size, omega, t_min, precision,
+                atmospheric_light=None, light_method="select", light_stride=1,
+                morphology="auto", channel_order="BGR", keep=RESULT_FIELDS,
+                workspace=None, out=None, refinement="morph"):
+    """
+    Graful etapelor algoritmului. Fiecare rezultat intermediar trece prin
+    memo(etapa, parametri, functie), unde `parametri` sunt doar parametrii de
+    care depinde etapa respectiva (pe langa imagine), sau None pentru etapele
+    care nu se memoreaza.
+
+    Se calculeaza doar etapele necesare pentru imaginea restaurata; etapele
+    folosite doar la afisare (conversiile RGB / gri, canalul intunecat ca
+    double) sunt calculate la cerere, vezi DehazeResult.
+    """
+    _check_precision(precision)
+    if refinement not in REFINEMENT_ENGINES:
+        raise ValueError(f"Motor de rafinare necunoscut: {refinement} "
+                         f"(posibil: {', '.join(REFINEMENT_ENGINES)})")
+    _check_keep(keep)
+
+    # 2. Imaginea de lucru
+    if precision == "float64":
+        # 0–255 -> 0–1 (double)
+        ImgWork = memo("float", (), lambda: np.divide(
+            ImgIn, 255.0, out=_buffer(workspace, "float", ImgIn.shape, np.float64)))
+    else:
+        # in modul float32 lucram direct pe uint8, fara copie a imaginii
+        ImgWork = ImgIn
+
+    # 3. Elementul structurant folosit in operatiile morfologice
+    kernel_morph = structuring_element(kernel_size)
+
+    # imaginea gri si canalul intunecat sunt si campuri de diagnostic: odata
+    # calculate (ca ghid pentru rafinarea "guided", respectiv pentru A), sunt
+    # pastrate pentru campul din keep, nu recalculate
+    gray_image = None
+    dark = None
+
+    def gray():
+        nonlocal gray_image
+        if gray_image is None:
+            gray_image = memo("gray", (), lambda: cv2.cvtColor(ImgIn, cv2.COLOR_BGR2GRAY))
+        return gray_image
+
+    # Pasii 1-4 – depind doar de kernel_size si (de la t1 incolo) de omega
+    # (motorul morfologic nu intra in chei: toate motoarele dau acelasi rezultat)
+    def dark_work():
+        nonlocal dark
+        if dark is None:
+            dark = memo("dark", (kernel_size, precision),
+                        lambda: compute_dark_channel(ImgWork, kernel_morph, morphology, workspace))
+        return dark
+
+    if atmospheric_light is None:
+        # canalul intunecat este o etapa separata, calculata inaintea lui A
+        dark_work()
+        A = memo("A", (kernel_size, precision, light_method, light_stride),
+                 lambda: estimate_atmospheric_light(ImgWork, dark, light_method, light_stride))
+    else:
+        # A dat din exterior (fix sau estimat anterior) -> sarim etapa
+        A = np.asarray(atmospheric_light, dtype=np.float64).reshape(3)
+    # t1 si rafinarea depind de valoarea lui A, nu de felul in care a fost obtinut
+    A_key = tuple(float(a) for a in A)
+    t1 = memo("t1", (kernel_size, omega, precision, A_key),
+              lambda: initial_transmission(ImgWork, A, omega, kernel_morph, morphology, workspace))
+    # spre deosebire de motorul morfologic, motorul de rafinare schimba rezultatul
+    refine = REFINEMENT_ENGINES[refinement]
+    t_morph = memo("refined", (kernel_size, omega, precision, A_key, refinement),
+                   lambda: refine(t1, kernel_morph, gray, morphology, workspace))
+
+    # doar pragul si restaurarea depind de t_min
+    t_refined = threshold_transmission(t_morph, t_min, workspace)
+
+    # Pasul 5 – Restaurarea imaginii J, direct in ordinea canalelor ceruta
+    J_restored = memo("restore", None,
+                      lambda: restore_image(ImgWork, A, t_refined, channel_order, out, workspace))
+    rgb = channel_order.upper() == "RGB"
+
+    def dark_channel():
+        dark_exact = dark_work()
+        if dark_exact.dtype != np.uint8:
+            return dark_exact
+        # canalul intunecat exact (uint8) adus in [0, 1] pentru afisare
+        return memo("dark_float", (kernel_size, precision),
+                    lambda: dark_exact.astype(np.float32) * np.float32(1.0 / 255.0))
+
+    # campurile de diagnostic, calculate doar la cerere
+    fields = {
+        "ImgRGB": lambda: memo("rgb", (), lambda: cv2.cvtColor(ImgIn, cv2.COLOR_BGR2RGB)),
+        "ImgGray": gray,
+        "dark_channel": dark_channel,
+        "t1": lambda: t1,
+        "t_refined": lambda: t_refined,
+        # convertim BGR -> RGB pentru afisare (daca nu este deja RGB)
+        "J_restored_rgb": (lambda: J_restored) if rgb
+                          else (lambda: cv2.cvtColor(J_restored, cv2.COLOR_BGR2RGB)),
+    }
+    return DehazeResult(J_restored, A, "RGB" if rgb else "BGR",
+                        {name: fields[name] for name in keep})
+
+
+def image_digest(ImgIn):
+    """Amprenta (hash) continutului unei imagini decodate, folosita drept cheie de cache."""
+    img = np.ascontiguousarray(ImgIn)
+    h = hashlib.blake2b(digest_size=16)
+    h.update(f"{img.shape}{img.dtype}".encode())
+    h.update(memoryview(img).cast("B"))
+    return h.hexdigest()
+
+
+def _nbytes(value):
+    """Memoria ocupata de un rezultat intermediar (tablou sau tuplu de tablouri)."""
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, (tuple, list)):
+        return sum(_nbytes(v) for v in value)
+    return 0
+
+
+class DehazePipeline:
+    """
+    Pipeline pe etape cu memorarea rezultatelor intermediare.
+
+    Rezultatele etapelor sunt pastrate intr-un cache LRU limitat ca memorie,
+    cu cheia (imagine, etapa, parametrii de care depinde etapa). Astfel, la o
+    schimbare de parametru se recalculeaza doar etapele din aval:
+      - t_min       -> doar pragul si restaurarea
+      - omega       -> t1, rafinarea, restaurarea
+      - kernel_size -> tot, mai putin conversiile imaginii
+    """
+
+    def __init__(self, max_bytes=1 << 30):
+        # memoria maxima (in octeti) ocupata de rezultatele pastrate
+        self.max_bytes = max_bytes
+        self._cache = OrderedDict()
+        self._cached_bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def clear(self):
+        """Goleste cache-ul de rezultate intermediare."""
+        self._cache.clear()
+        self._cached_bytes = 0
+
+    def _memo(self, key, compute):
+        if key in self._cache:
+            self._cache.move_to_end(key)
+            self.hits += 1
+            return self._cache[key][0]
+
+        self.misses += 1
+        value = compute()
+        size = _nbytes(value)
+        if size > self.max_bytes:
+            # prea mare pentru cache, nu il pastram
+            return value
+
+        # rezultatele din cache sunt partajate intre apeluri -> doar citire
+        for arr in (value if isinstance(value, (tuple, list)) else (value,)):
+            if isinstance(arr, np.ndarray):
+                arr.flags.writeable = False
+
+        self._cache[key] = (value, size)
+        self._cached_bytes += size
+        # eliminam cele mai vechi rezultate pana incapem in limita de memorie
+        while self._cached_bytes > self.max_bytes:
+            _, (_, old_size) = self._cache.popitem(last=False)
+            self._cached_bytes -= old_size
+        return value
+
+    def run(self, image, kernel_size=15, omega=0.95, t_min=0.85, channel_order="BGR",
+            precision="float64", image_key=None, progress=None, preview_scale=None,
+            instrument=None, **options):
+        """
+        La fel ca dehaze_image(), dar refoloseste rezultatele intermediare
+        calculate la apelurile anterioare.
+
+        Parametri suplimentari:
+            image_key: cheia imaginii in cache (ex. calea fisierului); daca
+                       lipseste, se calculeaza din continut cu image_digest()
+            progress : functie apelata cu numele etapei inainte de fiecare etapa
+                       care chiar se calculeaza (nu vine din cache); o exceptie
+                       ridicata de ea opreste procesarea (ex. pentru anulare)
+            preview_scale: ca la dehaze_image(); imaginea micsorata este si ea
+                       pastrata in cache, deci previzualizarile repetate nu
+                       mai redimensioneaza imaginea
+            instrument: ca la dehaze_image(); doar etapele calculate efectiv
+                       (nu cele din cache) sunt raportate
+            options  : optiunile suplimentare ale dehaze_image(), mai putin
+                       `workspace` (rezultatele din cache ar fi suprascrise)
+        """
+        if options.get("workspace") is not None:
+            raise ValueError("DehazePipeline pastreaza rezultatele intermediare si nu poate "
+                             "folosi un DehazeWorkspace")
+        ImgIn = _timed(instrument, "decode", lambda: decode_image(image, channel_order))
+        if image_key is None:
+            image_key = _timed(instrument, "digest", lambda: image_digest(ImgIn))
+
+        _check_scale(preview_scale)
+        if preview_scale is not None and preview_scale < 1:
+            full = ImgIn
+            ImgIn = self._memo((image_key, "preview", preview_scale),
+                               lambda: _timed(instrument, "preview",
+                                              lambda: downscale_image(full, preview_scale)))
+            # rezultatele previzualizarii au propriile chei in cache
+            image_key = (image_key, preview_scale)
+            kernel_size = preview_kernel_size(kernel_size, preview_scale)
+
+        def memo(stage, params, compute):
+            key = None if params is None else (image_key, stage) + tuple(params)
+            if progress is not None and key not in self._cache:
+                progress(stage)
+            if key is None:
+                return compute()
+            return self._memo(key, compute)
+
+        return _run_stages(ImgIn, _instrumented(memo, instrument),
+                           kernel_size, omega, t_min, precision,
+                           channel_order=channel_order, **options)
+
+
+# Functii ajutatoare pentru vizualizare (folosite de GUI si de dehaze_plots.py)
+
+# latura maxima (pixeli) a imaginilor desenate in figuri; imaginile mai mari
+# sunt micsorate inainte de imshow (figurile nu au oricum rezolutie mai mare)
+DISPLAY_MAX_SIDE = 1024
+
+# cate elemente numara cv2.calcHist odata (contoarele float32 sunt exacte
+# pana la 2**24)
+_HIST_CHUNK = 1 << 24
+
+
+def display_image(img, max_side=DISPLAY_MAX_SIDE):
+    """Imaginea micsorata (INTER_AREA) astfel incat latura maxima sa fie cel mult max_side."""
+    scale = max_side / max(img.shape[:2])
+    if scale >= 1:
+        return img
+    return downscale_image(img, scale)
+
+
+def histogram_256(img):
+    """
+    Histograma cu 256 de niveluri a unui tablou uint8 (toate canalele
+    impreuna), ca tablou de contoare int64. Numararea se face pe bucati cu
+    cv2.calcHist, fara temporare de dimensiunea imaginii.
+    """
+    flat = np.ascontiguousarray(img).reshape(-1, 1)
+    counts = np.zeros(256, dtype=np.int64)
+    for start in range(0, flat.shape[0], _HIST_CHUNK):
+        chunk = flat[start:start + _HIST_CHUNK]
+        counts += cv2.calcHist([chunk], [0], None, [256], [0, 256]).ravel().astype(np.int64)
+    return counts
+
+
+# Functiile de desenare (figurile 1-3) sunt in dehaze_plots.py, ca importul
+# algoritmului sa nu incarce matplotlib. Numele raman accesibile si din acest
+# modul, dar matplotlib se importa abia la prima lor folosire.
+_PLOT_FUNCTIONS = (
+    "figure_morph_ops",
+    "figure_gray_hist",
+    "figure_dehaze_results",
+    "render_png",
+    "plot_morph_ops",
+    "plot_gray_hist",
+    "plot_dehaze_results",
+)
+
+
+def __getattr__(name):
+    if name in _PLOT_FUNCTIONS:
+        import dehaze_plots
+        return getattr(dehaze_plots, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 if __name__ == "__main__":
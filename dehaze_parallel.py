@@ -0,0 +1,226 @@
+#  Dehazing paralel pentru o singura imagine mare, pe benzi de linii
+#
+#  Imaginea este impartita in benzi orizontale (latime completa), fiecare cu
+#  o margine (halo) suficienta pentru ca morfologia sa dea exact acelasi
+#  rezultat ca pe imaginea intreaga (vezi dehaze_tiled.py). Toate etapele
+#  numpy (minimul pe canale, selectia candidatilor pentru A, normalizarea,
+#  formula de restaurare, clip / conversia la uint8) ruleaza pe benzi in
+#  paralel, in doua treceri:
+#    1. candidatii pentru A din fiecare banda, combinati apoi global
+#    2. transmisia si restaurarea fiecarei benzi, scrise direct in iesire
+#
+#  In modul "thread" benzile lucreaza pe aceleasi tablouri (numpy si OpenCV
+#  elibereaza GIL-ul in calculele mari). In modul "process" imaginea si
+#  iesirea stau in memorie partajata (multiprocessing.shared_memory), deci
+#  pixelii nu sunt niciodata serializati intre procese.
+#
+#  Exemplu:
+#      python dehaze_parallel.py poza_mare.jpg -o poza_mare_fara_ceata.png --workers 8
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing import shared_memory
+
+import cv2
+import numpy as np
+
+from dehaze_batch import write_image
+from dehaze_morphology import (
+    PRECISIONS,
+    _check_precision,
+    decode_image,
+    odd_kernel_size,
+    structuring_element,
+)
+from dehaze_tiled import (
+    _light_from_candidates,
+    _merge_candidates,
+    _restore_tile,
+    _tile_candidates,
+)
+
+# modurile de executie
+PARALLEL_MODES = ("thread", "process")
+
+# inaltimea minima a unei benzi (liniile de halo se calculeaza de doua ori,
+# deci benzile prea subtiri ar face mai mult calcul redundant decat util)
+MIN_BAND_ROWS = 64
+
+# tablourile partajate, deschise o singura data in fiecare proces din pool
+_shared = {}
+
+
+def _bands(height, count, min_rows=MIN_BAND_ROWS):
+    """Benzile (r0, r1) care acopera imaginea: `count` benzi de inaltimi egale."""
+    count = max(min(count, height // min_rows), 1)
+    edges = np.linspace(0, height, count + 1).round().astype(int)
+    return list(zip(edges[:-1], edges[1:]))
+
+
+def _band_candidates(arrays, r0, r1, kernel_size, num_brightest, channel_order, precision,
+                     morphology):
+    image = arrays[0]
+    return _tile_candidates(image, r0, r1, 0, image.shape[1], structuring_element(kernel_size),
+                            num_brightest, channel_order, precision, morphology)
+
+
+def _band_restore(arrays, r0, r1, A, kernel_size, omega, t_min, channel_order, precision,
+                  morphology):
+    image, out = arrays
+    _restore_tile(image, out, r0, r1, 0, image.shape[1], A, structuring_element(kernel_size),
+                  omega, t_min, channel_order, precision, morphology)
+
+
+def _attach(name, shape):
+    segment = shared_memory.SharedMemory(name=name)
+    return segment, np.ndarray(shape, dtype=np.uint8, buffer=segment.buf)
+
+
+def _init_process(image_name, out_name, shape, cv_threads):
+    # un singur fir OpenCV pe proces: paralelismul vine din benzi
+    cv2.setNumThreads(cv_threads)
+    _shared["segments"] = [_attach(image_name, shape), _attach(out_name, shape)]
+    _shared["arrays"] = [array for _, array in _shared["segments"]]
+
+
+def _in_process(function, *args):
+    """Ruleaza o etapa pe o banda, in procesul din pool, pe tablourile partajate."""
+    return function(_shared["arrays"], *args)
+
+
+def _run_bands(pool, arrays, function, bands, *args):
+    """Ruleaza `function` pe toate benzile si intoarce rezultatele in ordinea benzilor."""
+    if arrays is None:
+        futures = [pool.submit(_in_process, function, r0, r1, *args) for r0, r1 in bands]
+    else:
+        futures = [pool.submit(function, arrays, r0, r1, *args) for r0, r1 in bands]
+    return [f.result() for f in futures]
+
+
+def _dehaze_bands(pool, arrays, shape, kernel_size, omega, t_min, bands, channel_order,
+                  precision, atmospheric_light, morphology):
+    height, width = shape[:2]
+    if atmospheric_light is None:
+        # Pasul 2 – candidatii fiecarei benzi, combinati global (acelasi A
+        # ca pe imaginea intreaga, vezi estimate_atmospheric_light_tiled())
+        num_brightest = int(max(height * width * 0.001, 1))
+        best = None
+        for candidates in _run_bands(pool, arrays, _band_candidates, bands, kernel_size,
+                                     num_brightest, channel_order, precision, morphology):
+            best = _merge_candidates(best, candidates, num_brightest)
+        A = _light_from_candidates(best)
+    else:
+        A = np.asarray(atmospheric_light, dtype=np.float64).reshape(3)
+
+    # Pasii 3-5 pe benzi, scrisi direct in iesire
+    _run_bands(pool, arrays, _band_restore, bands, A, kernel_size, omega, t_min,
+               channel_order, precision, morphology)
+    return A
+
+
+def dehaze_parallel(image, kernel_size=15, omega=0.95, t_min=0.85, workers=None,
+                    mode="thread", out=None, channel_order="BGR", precision="float64",
+                    atmospheric_light=None, morphology="auto"):
+    """
+    Aplica algoritmul de dehazing pe o singura imagine, impartita pe benzi de
+    linii prelucrate in paralel. Rezultatul este identic cu cel al
+    dehaze_image() (si cu cel al dehaze_tiled()).
+
+    Parametri:
+        image        : ndarray H x W x 3 (uint8) sau orice sursa acceptata de
+                       decode_image()
+        kernel_size, omega, t_min: ca la dehaze_image()
+        workers      : numarul de fire / procese (implicit numarul de procesoare)
+        mode         : "thread" (implicit) sau "process", vezi PARALLEL_MODES
+        out          : tabloul de iesire (H x W x 3, uint8); implicit unul nou
+        channel_order: ordinea canalelor intrarii; iesirea are aceeasi ordine
+        precision    : "float64" (implicit) sau "float32", vezi PRECISIONS
+        atmospheric_light: A fix / estimat anterior (3 valori BGR in [0, 1])
+        morphology   : motorul pentru morfologie, vezi MORPHOLOGY_ENGINES
+
+    In modul "thread", OpenCV este limitat la un fir pe durata apelului
+    (setare globala, restaurata la final), ca firele sale sa nu concureze
+    cu benzile.
+
+    Returneaza:
+        J_restored - imaginea restaurata (tabloul `out`)
+        A          - lumina atmosferica folosita (BGR)
+    """
+    _check_precision(precision)
+    if mode not in PARALLEL_MODES:
+        raise ValueError(f"Mod necunoscut: {mode} (posibil: {', '.join(PARALLEL_MODES)})")
+
+    if not isinstance(image, np.ndarray):
+        image, channel_order = decode_image(image), "BGR"
+    shape = image.shape
+    if out is None:
+        out = np.empty(shape, dtype=np.uint8)
+    elif out.shape != shape or out.dtype != np.uint8:
+        raise ValueError(f"Tabloul de iesire trebuie sa fie {shape} uint8, "
+                         f"nu {out.shape} {out.dtype}")
+
+    workers = workers or os.cpu_count() or 1
+    bands = _bands(shape[0], workers)
+    params = (kernel_size, omega, t_min, bands, channel_order, precision, atmospheric_light,
+              morphology)
+
+    if mode == "thread":
+        cv_threads = cv2.getNumThreads()
+        cv2.setNumThreads(1)
+        try:
+            with ThreadPoolExecutor(workers) as pool:
+                A = _dehaze_bands(pool, [image, out], shape, *params)
+        finally:
+            cv2.setNumThreads(cv_threads)
+        return out, A
+
+    # modul "process": imaginea este copiata o singura data in memoria
+    # partajata, iar benzile restaurate sunt scrise direct in iesirea partajata
+    size = int(np.prod(shape))
+    image_shm = shared_memory.SharedMemory(create=True, size=size)
+    out_shm = shared_memory.SharedMemory(create=True, size=size)
+    try:
+        np.copyto(np.ndarray(shape, dtype=np.uint8, buffer=image_shm.buf), image)
+        with ProcessPoolExecutor(workers, initializer=_init_process,
+                                 initargs=(image_shm.name, out_shm.name, shape, 1)) as pool:
+            A = _dehaze_bands(pool, None, shape, *params)
+        np.copyto(out, np.ndarray(shape, dtype=np.uint8, buffer=out_shm.buf))
+    finally:
+        for segment in (image_shm, out_shm):
+            segment.close()
+            segment.unlink()
+    return out, A
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Dehazing paralel (pe benzi de linii) pentru o singura imagine mare.")
+    parser.add_argument("input", help="imaginea cu ceata")
+    parser.add_argument("-o", "--output", required=True, help="imaginea restaurata")
+    parser.add_argument("--kernel-size", type=int, default=15)
+    parser.add_argument("--omega", type=float, default=0.95)
+    parser.add_argument("--t-min", type=float, default=0.85)
+    parser.add_argument("--workers", type=int, default=None,
+                        help="numarul de fire / procese (implicit numarul de procesoare)")
+    parser.add_argument("--mode", choices=PARALLEL_MODES, default="thread")
+    parser.add_argument("--precision", choices=PRECISIONS, default="float64")
+    args = parser.parse_args(argv)
+
+    # ne asiguram ca kernel-ul este impar (la fel ca in interfata grafica)
+    kernel_size = odd_kernel_size(args.kernel_size)
+    ImgIn = decode_image(args.input)
+    start = time.perf_counter()
+    J_restored, A = dehaze_parallel(ImgIn, kernel_size, args.omega, args.t_min, args.workers,
+                                    args.mode, precision=args.precision)
+    elapsed = time.perf_counter() - start
+    write_image(args.output, J_restored)
+    print(f"{ImgIn.shape[1]}x{ImgIn.shape[0]} in {elapsed:.2f} s "
+          f"(A = {', '.join(f'{a:.3f}' for a in A)})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
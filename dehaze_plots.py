@@ -0,0 +1,170 @@
+#  Figurile algoritmului de dehazing (folosite de GUI si pentru rapoarte)
+#
+#  Functiile figure_* construiesc figuri matplotlib independente de pyplot
+#  (randare fara ecran, vezi render_png()); functiile plot_* le afiseaza in
+#  ferestre pyplot. pyplot (si backend-ul grafic) se importa abia in plot_*.
+
+import io
+
+import numpy as np
+from matplotlib.figure import Figure
+
+from dehaze_filters import dilate_rect, erode_rect
+from dehaze_morphology import display_image, histogram_256
+
+
+def _plot_histogram(ax, img, title):
+    """
+    Histograma nivelurilor de gri, desenata la fel ca
+    ax.hist(img.ravel(), 256, range=[0, 255], density=True), dar din
+    contoarele calculate de histogram_256().
+    """
+    edges = np.linspace(0, 255, 257)
+    density = histogram_256(img) / (img.size * (edges[1] - edges[0]))
+    ax.stairs(density, edges, fill=True)
+    ax.set_title(title)
+
+
+def _draw_morph_ops(fig, ImgGray, kernel_size, morphology="auto"):
+    # opening = eroziune + dilatare, closing = dilatare + eroziune:
+    # refolosim eroziunea si dilatarea deja calculate (4 operatii in loc de 6)
+    ImgErosion = erode_rect(ImgGray, kernel_size, morphology)
+    ImgDilation = dilate_rect(ImgGray, kernel_size, morphology)
+    ImgOpening = dilate_rect(ImgErosion, kernel_size, morphology)
+    ImgClosing = erode_rect(ImgDilation, kernel_size, morphology)
+
+    titles = ['Original', 'Eroziune', 'Dilatare', 'Opening', 'Closing']
+    images = [ImgGray, ImgErosion, ImgDilation, ImgOpening, ImgClosing]
+
+    axes = fig.subplots(1, 5)
+    for i in range(5):
+        axes[i].imshow(display_image(images[i]), cmap='gray')
+        axes[i].set_title(titles[i])
+        axes[i].axis('off')
+    fig.suptitle('Figura 1 – Operatii morfologice de baza aplicate imaginii cu ceata',
+                 fontsize=12)
+
+
+def _draw_gray_hist(fig, ImgGray):
+    axes = fig.subplots(1, 2)
+
+    axes[0].imshow(display_image(ImgGray), cmap='gray', vmin=0, vmax=255)
+    axes[0].axis('off')
+    axes[0].set_title('Imagine initiala (gri)')
+
+    _plot_histogram(axes[1], ImgGray, 'Histograma nivelelor de gri - imagine originală')
+
+    fig.suptitle('Figura 2 – Imagine gri și histograma corespunzatoare', fontsize=12)
+    fig.tight_layout(rect=[0, 0.03, 1, 0.95])
+
+
+def _draw_dehaze_results(fig, ImgRGB, dark_channel, t1, t_refined, J_restored_rgb, t_min):
+    axes = fig.subplots(2, 3)
+    fig.suptitle('Figura 3 – Rezultatele implementării intermediare (Dehazing)',
+                 fontsize=16)
+
+    axes[0, 0].imshow(display_image(ImgRGB))
+    axes[0, 0].set_title('Imagine originala (I)')
+    axes[0, 0].axis('off')
+
+    axes[0, 1].imshow(display_image(dark_channel), cmap='gray')
+    axes[0, 1].set_title('Canalul intunecat (DCP)')
+    axes[0, 1].axis('off')
+
+    axes[0, 2].imshow(display_image(t1), cmap='gray', vmin=0, vmax=1)
+    axes[0, 2].set_title('Transmisia initiala (t1)')
+    axes[0, 2].axis('off')
+
+    axes[1, 0].imshow(display_image(t_refined), cmap='gray', vmin=0, vmax=1)
+    axes[1, 0].set_title(f'Transmisia rafinată (t_min = {t_min:.2f})')
+    axes[1, 0].axis('off')
+
+    axes[1, 1].imshow(display_image(J_restored_rgb))
+    axes[1, 1].set_title('Imagine restaurată (J)')
+    axes[1, 1].axis('off')
+
+    _plot_histogram(axes[1, 2], J_restored_rgb, 'Histograma imaginii restaurate')
+
+    fig.tight_layout(rect=[0, 0.03, 1, 0.95])
+
+
+# Figurile ca obiecte Figure independente de pyplot (fara fereastra), pentru
+# randare fara interfata grafica (ex. rapoarte la procesarea in lot)
+
+def figure_morph_ops(ImgGray, kernel_size, morphology="auto"):
+    """Figura 1 (vezi plot_morph_ops()), fara a o afisa."""
+    fig = Figure(figsize=(15, 4))
+    _draw_morph_ops(fig, ImgGray, kernel_size, morphology)
+    return fig
+
+
+def figure_gray_hist(ImgGray):
+    """Figura 2 (vezi plot_gray_hist()), fara a o afisa."""
+    fig = Figure(figsize=(12, 4))
+    _draw_gray_hist(fig, ImgGray)
+    return fig
+
+
+def figure_dehaze_results(ImgRGB, dark_channel, t1, t_refined, J_restored_rgb, t_min):
+    """Figura 3 (vezi plot_dehaze_results()), fara a o afisa."""
+    fig = Figure(figsize=(18, 10))
+    _draw_dehaze_results(fig, ImgRGB, dark_channel, t1, t_refined, J_restored_rgb, t_min)
+    return fig
+
+
+def render_png(fig, path=None, dpi=100):
+    """
+    Randeaza o figura cu backend-ul Agg (nu necesita ecran) in format PNG.
+    Scrie fisierul `path`, daca este dat, altfel intoarce continutul PNG (bytes).
+    """
+    if path is not None:
+        fig.savefig(str(path), format="png", dpi=dpi)
+        return path
+    buf = io.BytesIO()
+    fig.savefig(buf, format="png", dpi=dpi)
+    return buf.getvalue()
+
+
+def plot_morph_ops(ImgGray, kernel_size):
+    """
+    Figura 1 – operatii morfologice de baza:
+      - eroziune
+      - dilatare
+      - opening
+      - closing
+    aplicate imaginii in tonuri de gri.
+    """
+    import matplotlib.pyplot as plt
+
+    fig = plt.figure(figsize=(15, 4))
+    _draw_morph_ops(fig, ImgGray, kernel_size)
+    plt.show()
+
+
+def plot_gray_hist(ImgGray):
+    """
+    Figura 2 – afiseaza imaginea in tonuri de gri si histograma
+    distributiei nivelurilor de gri.
+    """
+    import matplotlib.pyplot as plt
+
+    fig = plt.figure(figsize=(12, 4))
+    _draw_gray_hist(fig, ImgGray)
+    plt.show()
+
+
+def plot_dehaze_results(ImgRGB, dark_channel, t1, t_refined, J_restored_rgb, t_min):
+    """
+    Figura 3 – afiseaza pe aceeasi figura:
+      - imaginea originala
+      - canalul intunecat (DCP)
+      - transmisia initiala
+      - transmisia rafinata
+      - imaginea restaurata
+      - histograma imaginii restaurate
+    """
+    import matplotlib.pyplot as plt
+
+    fig = plt.figure(figsize=(18, 10))
+    _draw_dehaze_results(fig, ImgRGB, dark_channel, t1, t_refined, J_restored_rgb, t_min)
+    plt.show()
@@ -0,0 +1,236 @@
+#  Metrici de calitate fara referinta si alegerea automata a parametrilor
+#
+#  Metricile compara imaginea restaurata cu imaginea cu ceata (nu este nevoie
+#  de o imagine "corecta" de referinta):
+#    - contrast_gain      : cresterea contrastului local mediu
+#    - entropy            : entropia histogramei nivelurilor de gri (biti)
+#    - saturated_fraction : pixelii cu cel putin un canal la 255
+#    - black_fraction     : pixelii cu cel putin un canal la 0
+#    - visible_edge_ratio : muchiile vizibile noi, relativ la cele din
+#                           imaginea cu ceata (indicatorul "e" al lui Hautiere)
+#
+#  Exemplu:
+#      python dehaze_quality.py poza.jpg --budget 2 -o poza_auto.png
+
+import argparse
+import sys
+import time
+
+import cv2
+import numpy as np
+
+from dehaze_morphology import (
+    PRECISIONS,
+    decode_image,
+    dehaze_image,
+    downscale_image,
+    histogram_256,
+    preview_kernel_size,
+)
+from dehaze_sweep import sweep
+
+# fereastra (pixeli) pentru contrastul local
+CONTRAST_WINDOW = 7
+# contrastul relativ minim al unei muchii vizibile (5%, ca la Hautiere)
+EDGE_CONTRAST = 0.05
+
+# ponderile metricilor in scorul folosit la alegerea parametrilor
+# (entropia are pondere mare: la valori t_min / omega prea agresive contrastul
+# mai creste putin, dar histograma se goleste si apar artefacte)
+DEFAULT_WEIGHTS = {
+    "contrast_gain": 1.0,       # pe scara logaritmica
+    "entropy": 4.0,             # impartita la 8 biti
+    "visible_edge_ratio": 0.5,
+    "saturated_fraction": -5.0,
+    "black_fraction": -5.0,
+}
+
+# grila implicita pentru alegerea automata a parametrilor; kernel-urile sunt
+# incercate in aceasta ordine (cel implicit intai), ca la un buget mic sa
+# fie evaluate intai valorile cele mai probabile
+AUTO_KERNEL_SIZES = (15, 7, 31)
+AUTO_OMEGAS = (0.95, 0.9, 0.8, 0.7)
+AUTO_T_MINS = (0.85, 0.7, 0.5, 0.3, 0.1)
+
+
+def _gray(img, channel_order="BGR"):
+    code = cv2.COLOR_RGB2GRAY if channel_order.upper() == "RGB" else cv2.COLOR_BGR2GRAY
+    return cv2.cvtColor(img, code)
+
+
+def _contrast_and_edges(gray):
+    """
+    Contrastul local mediu (deviatia standard locala / media locala) si
+    numarul de muchii vizibile (gradient Sobel peste EDGE_CONTRAST din media
+    locala), calculate cu aceleasi medii locale.
+    """
+    g = gray.astype(np.float32)
+    window = (CONTRAST_WINDOW, CONTRAST_WINDOW)
+    mean = cv2.blur(g, window)
+    variance = cv2.blur(g * g, window)
+    variance -= mean * mean
+    np.maximum(variance, 0, out=variance)
+    mean += 1.0  # evitam impartirea la 0 in zonele negre
+    contrast = float(np.mean(np.sqrt(variance) / mean))
+
+    # pentru o treapta de inaltime h, gradientul Sobel 3x3 este 4 * h
+    magnitude = cv2.magnitude(cv2.Sobel(g, cv2.CV_32F, 1, 0), cv2.Sobel(g, cv2.CV_32F, 0, 1))
+    edges = int(np.count_nonzero(magnitude > (4 * EDGE_CONTRAST) * mean))
+    return contrast, edges
+
+
+def hazy_reference(hazy_gray, dark_channel=None):
+    """
+    Statisticile imaginii cu ceata de care au nevoie metricile, calculate o
+    singura data pe imagine (nu pentru fiecare set de parametri incercat).
+
+    Parametri:
+        hazy_gray   : imaginea cu ceata in tonuri de gri (uint8), ex. ImgGray
+                      din rezultatul algoritmului
+        dark_channel: canalul intunecat (in [0, 1]), optional; media lui este
+                      o estimare a densitatii cetii
+    """
+    contrast, edges = _contrast_and_edges(hazy_gray)
+    return {
+        "contrast": contrast,
+        "edges": edges,
+        "haze_density": None if dark_channel is None else float(np.mean(dark_channel)),
+    }
+
+
+def quality_metrics(restored, reference, channel_order="BGR"):
+    """
+    Metricile fara referinta ale imaginii restaurate (uint8), fata de
+    statisticile imaginii cu ceata intoarse de hazy_reference().
+    """
+    gray = _gray(restored, channel_order)
+    contrast, edges = _contrast_and_edges(gray)
+
+    counts = histogram_256(gray)
+    p = counts[counts > 0] / gray.size
+    entropy = float(-np.sum(p * np.log2(p)))
+
+    num_pixels = restored.shape[0] * restored.shape[1]
+    saturated = np.count_nonzero(np.max(restored, axis=2) == 255) / num_pixels
+    black = np.count_nonzero(np.min(restored, axis=2) == 0) / num_pixels
+
+    return {
+        "contrast_gain": contrast / reference["contrast"] if reference["contrast"] > 0 else 1.0,
+        "entropy": entropy,
+        "saturated_fraction": saturated,
+        "black_fraction": black,
+        "visible_edge_ratio": (edges - reference["edges"]) / max(reference["edges"], 1),
+        "haze_density": reference["haze_density"],
+    }
+
+
+def quality_score(metrics, weights=None):
+    """Scorul (mai mare = mai bine) folosit pentru compararea parametrilor."""
+    weights = DEFAULT_WEIGHTS if weights is None else weights
+    values = {
+        "contrast_gain": np.log(max(metrics["contrast_gain"], 1e-6)),
+        "entropy": metrics["entropy"] / 8.0,
+        "visible_edge_ratio": metrics["visible_edge_ratio"],
+        "saturated_fraction": metrics["saturated_fraction"],
+        "black_fraction": metrics["black_fraction"],
+    }
+    return float(sum(weights.get(name, 0.0) * value for name, value in values.items()))
+
+
+def result_quality(result):
+    """
+    Metricile pentru un rezultat al algoritmului (DehazeResult), folosind
+    rezultatele intermediare deja calculate (ImgGray, dark_channel).
+    """
+    reference = hazy_reference(result.ImgGray, result.dark_channel)
+    return quality_metrics(result.restored, reference, result.channel_order)
+
+
+def auto_tune(image, time_budget=2.0, proxy_side=512, kernel_sizes=AUTO_KERNEL_SIZES,
+              omegas=AUTO_OMEGAS, t_mins=AUTO_T_MINS, precision="float32",
+              channel_order="BGR", weights=None, apply=True):
+    """
+    Alege automat parametrii (kernel_size, omega, t_min) care maximizeaza
+    quality_score() si, optional, ii aplica la rezolutie completa.
+
+    Cautarea se face pe o copie micsorata a imaginii (latura maxima
+    `proxy_side`, kernel-ul scalat proportional, vezi preview_kernel_size()),
+    cu motorul de explorare dehaze_sweep.sweep(), pana la epuizarea
+    bugetului de timp `time_budget` (secunde; cel putin o combinatie este
+    evaluata intotdeauna).
+
+    Returneaza un dictionar cu:
+        params    - parametrii castigatori (kernel_size la rezolutie completa)
+        score     - scorul lor
+        metrics   - metricile lor, pe copia micsorata
+        evaluated - numarul de combinatii evaluate
+        elapsed   - timpul cautarii (s)
+        restored  - imaginea restaurata la rezolutie completa, in ordinea
+                    `channel_order` (doar daca apply=True)
+    """
+    start = time.perf_counter()
+    ImgIn = decode_image(image, channel_order)
+    scale = min(proxy_side / max(ImgIn.shape[:2]), 1.0)
+    proxy = downscale_image(ImgIn, scale)
+
+    # kernel-urile la scara copiei; mai multe kernel-uri pot ajunge la aceeasi valoare
+    full_kernel = {}
+    for k in kernel_sizes:
+        full_kernel.setdefault(preview_kernel_size(k, scale), k)
+
+    reference = hazy_reference(_gray(proxy))
+    best, evaluated = None, 0
+    for record in sweep([proxy], list(full_kernel), omegas, t_mins, precision):
+        metrics = quality_metrics(record["restored"], reference)
+        score = quality_score(metrics, weights)
+        evaluated += 1
+        if best is None or score > best["score"]:
+            best = {
+                "params": {"kernel_size": full_kernel[record["kernel_size"]],
+                           "omega": record["omega"], "t_min": record["t_min"]},
+                "score": score,
+                "metrics": metrics,
+            }
+        if time.perf_counter() - start > time_budget:
+            break
+
+    best["evaluated"] = evaluated
+    best["elapsed"] = time.perf_counter() - start
+    if apply:
+        # ImgIn este deja decodat (BGR), nu il mai decodam inca o data
+        restored = dehaze_image(ImgIn, precision=precision, keep=(), **best["params"]).restored
+        if channel_order.upper() == "RGB":
+            restored = cv2.cvtColor(restored, cv2.COLOR_BGR2RGB)
+        best["restored"] = restored
+    return best
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Alegerea automata a parametrilor de dehazing (metrici fara referinta).")
+    parser.add_argument("input", help="imaginea cu ceata")
+    parser.add_argument("-o", "--output", help="imaginea restaurata cu parametrii alesi")
+    parser.add_argument("--budget", type=float, default=2.0, help="bugetul de timp (s)")
+    parser.add_argument("--proxy-side", type=int, default=512,
+                        help="latura maxima a copiei micsorate pe care se cauta")
+    parser.add_argument("--precision", choices=PRECISIONS, default="float32")
+    args = parser.parse_args(argv)
+
+    best = auto_tune(args.input, args.budget, args.proxy_side, precision=args.precision,
+                     apply=args.output is not None)
+    params = best["params"]
+    print(f"kernel_size={params['kernel_size']} omega={params['omega']:g} "
+          f"t_min={params['t_min']:g} scor={best['score']:.3f} "
+          f"({best['evaluated']} combinatii in {best['elapsed']:.2f} s)")
+    for name, value in best["metrics"].items():
+        if value is not None:
+            print(f"  {name}: {value:.4f}")
+    if args.output:
+        if not cv2.imwrite(args.output, best["restored"]):
+            print(f"Imaginea nu a putut fi scrisa: {args.output}", file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
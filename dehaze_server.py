@@ -0,0 +1,538 @@
+#  Serviciu HTTP local pentru dehazing, cu fire de lucru "calde"
+#
+#  Procesul ramane pornit, deci importurile (numpy, OpenCV) si bufferele de
+#  lucru se platesc o singura data, nu la fiecare script. Cererile asteapta
+#  intr-o coada limitata (cand este plina serviciul raspunde 503, ca
+#  apelantul sa revina mai tarziu); cererile cu aceeasi dimensiune si
+#  aceiasi parametri sosite impreuna sunt grupate (micro-batching) si
+#  procesate de acelasi fir, cu acelasi spatiu de lucru, intr-un singur apel
+#  vectorizat (dehaze_stack.py). Optional, rezultatele sunt pastrate intr-un
+#  cache pe disc (dehaze_cache.py), comun mai multor procese.
+#
+#  Rute:
+#      POST /dehaze?kernel_size=15&omega=0.95&t_min=0.85&refinement=morph&format=png
+#           corpul: imaginea codata (JPEG, PNG, ...) sau un tablou .npy
+#           (Content-Type: application/x-npy, H x W x 3 uint8; optional
+#           channel_order=RGB); raspunsul are acelasi tip ca cererea
+#      GET  /stats    - JSON: cereri, erori, adancimea cozii, loturi,
+#                       percentilele latentei, timpii pe etape
+#      GET  /metrics  - timpii pe etape in format text Prometheus
+#      GET  /health
+#
+#  Exemplu:
+#      python dehaze_server.py --port 8765 --workers 4 --cache ~/.cache/dehaze
+#      curl --data-binary @poza.jpg "http://127.0.0.1:8765/dehaze?omega=0.9" -o rezultat.png
+
+import argparse
+import io
+import json
+import os
+import sys
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+import cv2
+import numpy as np
+
+from dehaze_cache import ResultCache
+from dehaze_metrics import StageMetrics
+from dehaze_morphology import (
+    ATMOSPHERIC_LIGHT_METHODS,
+    MORPHOLOGY_ENGINES,
+    PRECISIONS,
+    REFINEMENT_ENGINES,
+    DehazeResult,
+    DehazeWorkspace,
+    decode_image,
+    dehaze_image,
+    odd_kernel_size,
+)
+from dehaze_stack import dehaze_stack
+
+NPY_CONTENT_TYPE = "application/x-npy"
+
+# dimensiunea maxima a corpului unei cereri
+MAX_BODY_BYTES = 256 << 20
+
+# parametrii algoritmului acceptati in query string si conversia lor
+_PARAM_TYPES = {
+    "kernel_size": int,
+    "omega": float,
+    "t_min": float,
+    "precision": str,
+    "light_method": str,
+    "morphology": str,
+    "refinement": str,
+}
+
+_PERCENTILES = (50, 90, 99)
+
+
+class QueueFull(Exception):
+    """Coada serviciului este plina; cererea trebuie reluata mai tarziu."""
+
+
+class _BatchQueue:
+    """
+    Coada limitata de cereri din care firele de lucru iau loturi: prima
+    cerere in asteptare plus, in fereastra `window` (s), celelalte cereri cu
+    aceeasi cheie (dimensiune si parametri), pana la `max_batch`.
+    """
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._jobs = deque()
+        self._cond = threading.Condition()
+        self._closed = False
+
+    def __len__(self):
+        with self._cond:
+            return len(self._jobs)
+
+    def put(self, job):
+        with self._cond:
+            if len(self._jobs) >= self.maxsize:
+                raise QueueFull()
+            self._jobs.append(job)
+            self._cond.notify_all()
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def _take_matching(self, key, batch, max_batch):
+        # fara deque.remove(): ar compara cererile ca dictionare (cu tot cu imagini)
+        remaining = deque()
+        for job in self._jobs:
+            if len(batch) < max_batch and job["key"] == key:
+                batch.append(job)
+            else:
+                remaining.append(job)
+        self._jobs = remaining
+
+    def take_batch(self, max_batch, window):
+        """Urmatorul lot (lista de cereri) sau None dupa close()."""
+        with self._cond:
+            while not self._jobs:
+                if self._closed:
+                    return None
+                self._cond.wait()
+            batch = [self._jobs.popleft()]
+            key = batch[0]["key"]
+            deadline = time.perf_counter() + window
+            while True:
+                self._take_matching(key, batch, max_batch)
+                remaining = deadline - time.perf_counter()
+                if len(batch) >= max_batch or remaining <= 0 or self._closed:
+                    return batch
+                self._cond.wait(remaining)
+
+
+class DehazeService:
+    """
+    Pool de fire de lucru care aplica dehaze_image() pe cererile din coada
+    (dehaze_stack() pe loturile de mai multe cereri). Fiecare fir are
+    propriul DehazeWorkspace, refolosit intre cereri.
+
+    Parametri:
+        workers     : numarul de fire de lucru (implicit numarul de procesoare)
+        queue_size  : numarul maxim de cereri in asteptare
+        max_batch   : numarul maxim de cereri dintr-un lot
+        batch_window: cat asteapta un fir (s) alte cereri compatibile cu prima
+        latency_window: pe cate cereri recente se calculeaza percentilele
+        cache       : un ResultCache optional, folosit de dehaze()
+    """
+
+    def __init__(self, workers=None, queue_size=32, max_batch=8, batch_window=0.005,
+                 latency_window=1024, cache=None):
+        self.workers = workers or os.cpu_count() or 1
+        self.cache = cache
+        self.max_batch = max_batch
+        self.batch_window = batch_window
+        self.metrics = StageMetrics()
+        self._queue = _BatchQueue(queue_size)
+        self._threads = []
+        self._lock = threading.Lock()
+        self._latency = deque(maxlen=latency_window)
+        self._queue_wait = deque(maxlen=latency_window)
+        self._counters = {"requests": 0, "errors": 0, "rejected": 0, "batches": 0,
+                          "batched_requests": 0, "stacked_requests": 0}
+        self._started = None
+
+    def start(self, warmup=True):
+        """Porneste firele de lucru (si, optional, ruleaza o imagine mica de incalzire)."""
+        if warmup:
+            # primele apeluri OpenCV / numpy initializeaza tabele interne
+            dehaze_image(np.full((32, 32, 3), 128, dtype=np.uint8), keep=())
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._work, name=f"dehaze-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        self._started = time.time()
+
+    def stop(self):
+        """Opreste firele dupa ce termina cererile deja preluate."""
+        self._queue.close()
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+
+    def submit(self, image, params, channel_order="BGR", timeout=None):
+        """
+        Pune o imagine (ndarray) in coada si asteapta rezultatul: imaginea
+        restaurata (uint8, in ordinea `channel_order`).
+
+        Ridica QueueFull daca coada este plina, TimeoutError daca rezultatul
+        nu este gata in `timeout` secunde, iar erorile algoritmului (ex.
+        ValueError pentru parametri invalizi) sunt ridicate mai departe.
+        """
+        return self._submit(image, params, channel_order, timeout).restored
+
+    def dehaze(self, source, params, channel_order="BGR", timeout=None):
+        """
+        Ca submit(), dar `source` poate fi si o imagine codata (bytes), iar
+        rezultatul este cautat intai in cache (fara decodare si fara sa
+        astepte in coada); rezultatele noi sunt pastrate in cache.
+        """
+        key = None
+        if self.cache is not None:
+            cached, key, source = self.cache.lookup(source, channel_order=channel_order, **params)
+            if cached is not None:
+                return cached.restored
+        image = source if isinstance(source, np.ndarray) else decode_image(source)
+        result = self._submit(image, params, channel_order, timeout)
+        if key is not None:
+            self.cache.store(key, result)
+        return result.restored
+
+    def _submit(self, image, params, channel_order, timeout):
+        key = (image.shape, channel_order, tuple(sorted(params.items())))
+        job = {"image": image, "params": params, "channel_order": channel_order, "key": key,
+               "done": threading.Event(), "result": None, "error": None,
+               "enqueued": time.perf_counter()}
+        try:
+            self._queue.put(job)
+        except QueueFull:
+            with self._lock:
+                self._counters["rejected"] += 1
+            raise
+        if not job["done"].wait(timeout):
+            raise TimeoutError("Rezultatul nu a fost gata la timp")
+        if job["error"] is not None:
+            raise job["error"]
+        return job["result"]
+
+    def _work(self):
+        workspace = DehazeWorkspace()
+        while True:
+            batch = self._queue.take_batch(self.max_batch, self.batch_window)
+            if batch is None:
+                return
+            started = time.perf_counter()
+            try:
+                stacked = self._run_batch(batch, workspace)
+            except Exception as e:
+                # o eroare neprevazuta nu trebuie sa opreasca firul de lucru:
+                # cererile ramase fara rezultat o primesc ca eroare
+                stacked = False
+                for job in batch:
+                    if job["result"] is None and job["error"] is None:
+                        job["error"] = e
+                    job["image"] = None
+            finished = time.perf_counter()
+            with self._lock:
+                self._counters["batches"] += 1
+                self._counters["batched_requests"] += len(batch)
+                self._counters["stacked_requests"] += len(batch) if stacked else 0
+                for job in batch:
+                    self._counters["requests"] += 1
+                    self._counters["errors"] += job["error"] is not None
+                    self._queue_wait.append(started - job["enqueued"])
+                    self._latency.append(finished - job["enqueued"])
+            for job in batch:
+                job["done"].set()
+
+    def _run_batch(self, batch, workspace):
+        """
+        Proceseaza un lot de cereri (aceeasi forma si aceiasi parametri).
+        Intoarce True daca lotul a fost procesat vectorizat, intr-un singur apel.
+        """
+        first = batch[0]
+        params = dict(first["params"])
+        image = first["image"]
+        # dehaze_stack() stie doar selectia implicita a lui A, rafinarea
+        # morfologica si imagini cu 3 canale
+        if (len(batch) > 1 and params.pop("light_method", "select") == "select"
+                and params.pop("refinement", "morph") == "morph"
+                and image.ndim == 3 and image.shape[2] == 3 and image.dtype == np.uint8):
+            try:
+                out, A = dehaze_stack([job["image"] for job in batch],
+                                      channel_order=first["channel_order"],
+                                      instrument=self.metrics, workspace=workspace, **params)
+            except Exception:
+                # ex. parametri invalizi: fiecare cerere isi primeste eroarea mai jos
+                pass
+            else:
+                order = first["channel_order"].upper()
+                for job, restored, light in zip(batch, out, A):
+                    job["result"] = DehazeResult(restored, light, order, {})
+                    job["image"] = None
+                return True
+
+        for job in batch:
+            try:
+                job["result"] = dehaze_image(job["image"], channel_order=job["channel_order"],
+                                             keep=(), workspace=workspace,
+                                             instrument=self.metrics, **job["params"])
+            except Exception as e:
+                job["error"] = e
+            finally:
+                job["image"] = None
+        return False
+
+    def stats(self):
+        """Statisticile serviciului (dictionar serializabil JSON)."""
+        with self._lock:
+            counters = dict(self._counters)
+            latency = np.array(self._latency)
+            queue_wait = np.array(self._queue_wait)
+
+        def percentiles(values):
+            if not values.size:
+                return None
+            return {f"p{p}": float(v) for p, v in zip(_PERCENTILES,
+                                                      np.percentile(values, _PERCENTILES))}
+
+        return {
+            "uptime_s": time.time() - self._started if self._started else 0.0,
+            "workers": self.workers,
+            "queue_depth": len(self._queue),
+            "queue_size": self._queue.maxsize,
+            **counters,
+            "mean_batch_size": (counters["batched_requests"] / counters["batches"]
+                                if counters["batches"] else 0.0),
+            "latency_s": percentiles(latency),
+            "queue_wait_s": percentiles(queue_wait),
+            "stages": self.metrics.summary(),
+            **({"cache": self.cache.stats()} if self.cache is not None else {}),
+        }
+
+
+def parse_params(query):
+    """Parametrii algoritmului din query string; ValueError pentru valori invalide."""
+    params = {}
+    for name, value in parse_qsl(query):
+        if name not in _PARAM_TYPES:
+            continue
+        try:
+            params[name] = _PARAM_TYPES[name](value)
+        except ValueError:
+            raise ValueError(f"Valoare invalida pentru {name}: {value}") from None
+    if "kernel_size" in params:
+        # ne asiguram ca kernel-ul este impar (la fel ca in interfata grafica)
+        params["kernel_size"] = odd_kernel_size(params["kernel_size"])
+        if params["kernel_size"] < 1:
+            raise ValueError("kernel_size trebuie sa fie pozitiv")
+    for name, choices in (("precision", PRECISIONS),
+                          ("light_method", ATMOSPHERIC_LIGHT_METHODS),
+                          ("morphology", MORPHOLOGY_ENGINES),
+                          ("refinement", REFINEMENT_ENGINES)):
+        if name in params and params[name] not in choices:
+            raise ValueError(f"Valoare necunoscuta pentru {name}: {params[name]} "
+                             f"(posibil: {', '.join(choices)})")
+    return params
+
+
+def parse_output_format(query):
+    """
+    Formatul imaginii de raspuns din query string: (extensie, parametrii de
+    codare OpenCV); ValueError pentru un format necunoscut sau o calitate
+    invalida.
+    """
+    query = dict(parse_qsl(query))
+    fmt = "." + query.get("format", "png").lstrip(".").lower()
+    if not cv2.haveImageWriter("x" + fmt):
+        raise ValueError(f"Format de iesire necunoscut: {fmt[1:]}")
+    if "quality" not in query:
+        return fmt, []
+    try:
+        quality = int(query["quality"])
+    except ValueError:
+        raise ValueError(f"Valoare invalida pentru quality: {query['quality']}") from None
+    if not 0 <= quality <= 100:
+        raise ValueError("quality trebuie sa fie intre 0 si 100")
+    if fmt in (".jpg", ".jpeg"):
+        return fmt, [cv2.IMWRITE_JPEG_QUALITY, quality]
+    if fmt == ".webp":
+        return fmt, [cv2.IMWRITE_WEBP_QUALITY, quality]
+    return fmt, []
+
+
+class DehazeRequestHandler(BaseHTTPRequestHandler):
+    """Cererile HTTP ale serviciului (self.server.service este un DehazeService)."""
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def _send(self, status, body, content_type="application/json", headers=()):
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in headers:
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_error(self, status, message, headers=()):
+        self._send(status, json.dumps({"error": message}), headers=headers)
+
+    def do_GET(self):
+        path = urlsplit(self.path).path
+        service = self.server.service
+        if path == "/stats":
+            self._send(200, json.dumps(service.stats(), indent=2))
+        elif path == "/metrics":
+            self._send(200, service.metrics.to_prometheus(), "text/plain; version=0.0.4")
+        elif path == "/health":
+            self._send(200, json.dumps({"status": "ok"}))
+        else:
+            self._send_error(404, f"Ruta necunoscuta: {path}")
+
+    def do_POST(self):
+        url = urlsplit(self.path)
+        if url.path != "/dehaze":
+            self._send_error(404, f"Ruta necunoscuta: {url.path}")
+            return
+        header = self.headers.get("Content-Length") or "0"
+        try:
+            length = int(header)
+        except ValueError:
+            length = -1
+        if length < 0:
+            # fara o lungime valida corpul cererii nu poate fi delimitat
+            self._send_error(400, f"Content-Length invalid: {header!r}")
+            self.close_connection = True
+            return
+        if length > MAX_BODY_BYTES:
+            self._send_error(413, f"Imaginea depaseste {MAX_BODY_BYTES} octeti")
+            self.close_connection = True
+            return
+        body = self.rfile.read(length)
+        query = dict(parse_qsl(url.query))
+        raw = self.headers.get("Content-Type", "").split(";")[0].strip() == NPY_CONTENT_TYPE
+
+        # decodarea si codarea se fac in firul conexiunii, in paralel cu
+        # calculul altor cereri; firele de lucru fac doar dehazing-ul
+        try:
+            params = parse_params(url.query)
+            if raw:
+                channel_order = query.get("channel_order", "BGR").upper()
+                image = np.load(io.BytesIO(body), allow_pickle=False)
+                if image.dtype != np.uint8 or image.ndim != 3 or image.shape[2] != 3:
+                    raise ValueError(f"Tabloul trebuie sa fie H x W x 3 uint8, "
+                                     f"nu {image.shape} {image.dtype}")
+            else:
+                # formatul raspunsului se verifica inainte de calcul
+                fmt, encode_params = parse_output_format(url.query)
+                # imaginea codata este decodata de service.dehaze(), doar daca
+                # rezultatul nu este deja in cache
+                channel_order, image = "BGR", body
+        except (ValueError, OSError) as e:
+            self._send_error(400, str(e))
+            return
+
+        try:
+            restored = self.server.service.dehaze(image, params, channel_order,
+                                                  self.server.timeout_s)
+        except QueueFull:
+            self._send_error(503, "Coada este plina", headers=(("Retry-After", "1"),))
+            return
+        except TimeoutError as e:
+            self._send_error(504, str(e))
+            return
+        except ValueError as e:
+            self._send_error(400, str(e))
+            return
+        except Exception as e:
+            self._send_error(500, f"{type(e).__name__}: {e}")
+            return
+
+        if raw:
+            buf = io.BytesIO()
+            np.save(buf, restored, allow_pickle=False)
+            self._send(200, buf.getvalue(), NPY_CONTENT_TYPE)
+            return
+        try:
+            ok, buf = cv2.imencode(fmt, restored, encode_params)
+        except cv2.error:
+            ok = False
+        if not ok:
+            self._send_error(400, f"Imaginea nu a putut fi codata ca {fmt}")
+            return
+        self._send(200, buf.tobytes(), f"image/{fmt[1:].replace('jpg', 'jpeg')}")
+
+
+class _DehazeHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # conexiunile in asteptare la nivelul socket-ului (implicit doar 5); limita
+    # reala a cererilor in asteptare este coada serviciului
+    request_queue_size = 128
+
+
+def make_server(service, host="127.0.0.1", port=8765, timeout_s=60.0, verbose=False):
+    """Serverul HTTP (inca nepornit) pentru un DehazeService deja pornit."""
+    server = _DehazeHTTPServer((host, port), DehazeRequestHandler)
+    server.service = service
+    server.timeout_s = timeout_s
+    server.verbose = verbose
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serviciu HTTP local pentru dehazing.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--workers", type=int, default=None,
+                        help="fire de lucru (implicit numarul de procesoare)")
+    parser.add_argument("--queue-size", type=int, default=32,
+                        help="cereri in asteptare, cel mult (peste -> 503)")
+    parser.add_argument("--max-batch", type=int, default=8,
+                        help="cereri compatibile procesate intr-un lot, cel mult")
+    parser.add_argument("--batch-window-ms", type=float, default=5.0,
+                        help="cat se asteapta alte cereri compatibile pentru un lot")
+    parser.add_argument("--timeout", type=float, default=60.0,
+                        help="timpul maxim de asteptare a unui rezultat (s)")
+    parser.add_argument("--cache", metavar="DIR", help="cache pe disc pentru rezultate")
+    parser.add_argument("--cache-size-mb", type=int, default=1024,
+                        help="dimensiunea maxima a cache-ului (MiB)")
+    parser.add_argument("-v", "--verbose", action="store_true", help="afiseaza fiecare cerere")
+    args = parser.parse_args(argv)
+
+    cache = None if args.cache is None else ResultCache(args.cache, args.cache_size_mb << 20)
+    service = DehazeService(args.workers, args.queue_size, args.max_batch,
+                            args.batch_window_ms / 1000.0, cache=cache)
+    service.start()
+    server = make_server(service, args.host, args.port, args.timeout, args.verbose)
+    print(f"Serviciul asculta pe http://{args.host}:{server.server_address[1]} "
+          f"({service.workers} fire de lucru)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
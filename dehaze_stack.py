@@ -0,0 +1,324 @@
+#  Dehazing vectorizat pentru un lot de imagini de aceeasi rezolutie
+#
+#  Pentru rafale de cadre mici, un apel dehaze_image() pe cadru este dominat
+#  de costul fix (Python, selectia lui A, apeluri OpenCV mici). Aici lotul
+#  este prelucrat ca un singur tablou N x H x W x 3:
+#    - minimul pe canale, normalizarea prin A-ul fiecarui cadru, pragul
+#      t_min si restaurarea sunt operatii numpy pe tot lotul
+#    - A este ales pentru toate cadrele intr-o singura trecere
+#    - morfologia ruleaza o singura data, pe cadrele asezate unul sub altul
+#      si despartite de linii cu valoarea neutra a operatiei (cel putin cat
+#      raza celei mai mari ferestre), deci niciun cadru nu vede pixelii
+#      vecinului
+#  Lotul este parcurs in bucati de cel mult CHUNK_PIXELS pixeli, ca
+#  tablourile de lucru ale unei bucati sa ramana in cache (un lot mare
+#  prelucrat dintr-odata ar fi limitat de memorie, nu de calcul).
+#  Rezultatele sunt identice cu cele ale dehaze_image() pe fiecare cadru.
+#
+#  Exemplu:
+#      python dehaze_stack.py cadre/*.png -o cadre_fara_ceata/ --compare
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+from dehaze_batch import write_image
+from dehaze_filters import dilate_rect, erode_rect
+from dehaze_morphology import (
+    PRECISIONS,
+    _buffer,
+    _check_precision,
+    _timed,
+    decode_image,
+    dehaze_image,
+    odd_kernel_size,
+    transmission_from_dark,
+)
+
+# pixelii (toate cadrele) prelucrati impreuna; peste aceasta dimensiune
+# costul fix pe cadru nu mai conteaza, iar tablourile ies din cache
+CHUNK_PIXELS = 1 << 17
+
+
+def _as_stack(images, channel_order):
+    """Lotul ca tablou N x H x W x 3 uint8, vazut in ordinea BGR (fara copie daca se poate)."""
+    order = channel_order.upper()
+    if order not in ("BGR", "RGB"):
+        raise ValueError(f"Ordine a canalelor necunoscuta: {channel_order}")
+    if not isinstance(images, np.ndarray):
+        images = list(images)
+        shapes = {image.shape for image in images}
+        if len(shapes) != 1:
+            raise ValueError(f"Imaginile lotului trebuie sa aiba aceeasi forma, nu {sorted(shapes)}")
+        images = np.stack(images)
+    if images.ndim != 4 or images.shape[3] != 3 or images.dtype != np.uint8:
+        raise ValueError(f"Lotul trebuie sa fie N x H x W x 3 uint8, nu {images.shape} {images.dtype}")
+    return images[..., ::-1] if order == "RGB" else images
+
+
+def _frames(workspace, name, capacity, count, shape, dtype):
+    """
+    Bufferul pentru `count` cadre de forma `shape`. In spatiul de lucru este
+    alocat pentru `capacity` cadre (o bucata intreaga), deci ultima bucata,
+    mai mica, il refoloseste in loc sa il realoce.
+    """
+    buf = _buffer(workspace, name, (capacity, *shape), dtype)
+    return np.empty((count, *shape), dtype=dtype) if buf is None else buf[:count]
+
+
+def _min_channels(image, out):
+    """Minimul pe cele 3 canale (mai rapid decat np.min pe axa canalelor, acelasi rezultat)."""
+    np.minimum(image[..., 0], image[..., 1], out=out)
+    return np.minimum(out, image[..., 2], out=out)
+
+
+def _morph(tall, height, neutral, operation, size, morphology):
+    """Aplica `operation` pe toate cadrele, cu separatoarele aduse la valoarea neutra."""
+    tall[:, height:] = neutral
+    flat = tall.reshape(-1, tall.shape[2])
+    operation(flat, size, morphology, dst=flat)
+    return tall
+
+
+def _neutral(dtype):
+    """Valorile neutre (pentru minim, pentru maxim) ale tipului `dtype`."""
+    if np.dtype(dtype).kind == "f":
+        return np.inf, -np.inf
+    info = np.iinfo(dtype)
+    return info.max, info.min
+
+
+def estimate_atmospheric_light_stack(work, dark):
+    """
+    Lumina atmosferica A (N x 3, BGR, in [0, 1]) pentru fiecare cadru, aleasa
+    exact ca estimate_atmospheric_light(method="select"): dintre cei mai
+    luminosi 0.1% pixeli ai canalului intunecat, cel cu B+G+R maxim (la
+    egalitate, cel cu canalul intunecat mai mic, apoi primul in imagine).
+    """
+    count, height, width = dark.shape
+    flat_dc = dark.reshape(count, -1)
+    size = flat_dc.shape[1]
+    num_brightest = int(max(size * 0.001, 1))
+
+    # pragul fiecarui cadru = a num_brightest-a cea mai mare valoare
+    threshold = np.partition(flat_dc, size - num_brightest, axis=1)[:, size - num_brightest]
+    above_frames, above_indices = np.nonzero(flat_dc > threshold[:, None])
+    # dintre pixelii egali cu pragul, o sortare stabila i-ar pastra pe ultimii
+    tie_frames, tie_indices = np.nonzero(flat_dc == threshold[:, None])
+    needed = num_brightest - np.bincount(above_frames, minlength=count)
+    tie_counts = np.bincount(tie_frames, minlength=count)
+    tie_starts = np.concatenate(([0], np.cumsum(tie_counts)[:-1]))
+    rank = np.arange(len(tie_frames)) - tie_starts[tie_frames]
+    kept = rank >= (tie_counts - needed)[tie_frames]
+
+    frames = np.concatenate((above_frames, tie_frames[kept]))
+    indices = np.concatenate((above_indices, tie_indices[kept]))
+    rows, cols = np.divmod(indices, width)
+    candidate_pixels = work[frames, rows, cols]
+    brightness = np.sum(candidate_pixels, axis=1).astype(np.float64)
+
+    # primul candidat al fiecarui cadru dupa (luminozitate desc., canal intunecat, pozitie)
+    order = np.lexsort((indices, flat_dc[frames, indices], -brightness, frames))
+    first = order[np.flatnonzero(np.diff(frames[order], prepend=-1))]
+    A = candidate_pixels[first]
+    if work.dtype == np.uint8:
+        A = A / 255.0
+    return A
+
+
+def dehaze_stack(images, kernel_size=15, omega=0.95, t_min=0.85, channel_order="BGR",
+                 precision="float64", atmospheric_light=None, morphology="auto",
+                 instrument=None, workspace=None, out=None, chunk_pixels=CHUNK_PIXELS):
+    """
+    Aplica algoritmul de dehazing pe un lot de imagini de aceeasi rezolutie,
+    vectorizat pe tot lotul. Rezultatul fiecarui cadru este identic cu cel al
+    dehaze_image() cu aceiasi parametri.
+
+    Parametri:
+        images       : ndarray N x H x W x 3 (uint8) sau lista de imagini
+                       H x W x 3 de aceeasi forma (copiate intr-un singur tablou)
+        kernel_size, omega, t_min, precision, morphology: ca la dehaze_image()
+        channel_order: ordinea canalelor intrarii; iesirea are aceeasi ordine
+        atmospheric_light: A fix (3 valori BGR) sau cate unul pe cadru (N x 3);
+                       implicit A este estimat pentru fiecare cadru
+        instrument   : ca la dehaze_image(); etapele sunt raportate o data
+                       pentru fiecare bucata a lotului
+        workspace    : un DehazeWorkspace refolosit intre loturi de aceeasi forma
+        out          : tabloul de iesire (N x H x W x 3, uint8); implicit unul nou
+        chunk_pixels : cati pixeli (din toate cadrele) se prelucreaza impreuna,
+                       vezi CHUNK_PIXELS; cel putin un cadru
+
+    Returneaza:
+        J_restored - imaginile restaurate (tabloul `out`)
+        A          - lumina atmosferica a fiecarui cadru (N x 3, BGR)
+    """
+    _check_precision(precision)
+    stack = _as_stack(images, channel_order)
+    rgb = channel_order.upper() == "RGB"
+    count, height, width = stack.shape[:3]
+    if out is None:
+        out = np.empty(stack.shape, dtype=np.uint8)
+    elif out.shape != stack.shape or out.dtype != np.uint8:
+        raise ValueError(f"Tabloul de iesire trebuie sa fie {stack.shape} uint8, "
+                         f"nu {out.shape} {out.dtype}")
+    if atmospheric_light is not None:
+        atmospheric_light = np.broadcast_to(
+            np.asarray(atmospheric_light, dtype=np.float64).reshape(-1, 3), (count, 3))
+
+    A = np.empty((count, 3), dtype=np.float64)
+    step = max(chunk_pixels // (height * width), 1)
+    for i in range(0, count, step):
+        chunk = slice(i, min(i + step, count))
+        A[chunk] = _dehaze_chunk(
+            stack[chunk], out[chunk], step, kernel_size, omega, t_min, rgb, precision,
+            None if atmospheric_light is None else atmospheric_light[chunk],
+            morphology, instrument, workspace)
+    return out, A
+
+
+def _dehaze_chunk(stack, out, capacity, kernel_size, omega, t_min, rgb, precision,
+                  atmospheric_light, morphology, instrument, workspace):
+    """Algoritmul pe o bucata a lotului (BGR), scris in `out`; intoarce A (cadre x 3)."""
+    count, height, width = stack.shape[:3]
+    shape = (height, width)
+
+    # imaginea de lucru (BGR): double in [0, 1], sau chiar uint8 in modul float32
+    if precision == "float64":
+        work = _timed(instrument, "float", lambda: np.divide(
+            stack, 255.0, out=_frames(workspace, "stack_float", capacity, count,
+                                      stack.shape[1:], np.float64)))
+        dtype = np.float64
+    else:
+        work = stack
+        dtype = np.float32
+    # separatoarele acopera raza celei mai mari ferestre (2 * kernel_size - 1)
+    tall = (height + kernel_size - 1, width)
+
+    # Pasii 1-2 – canalul intunecat si A, pentru toate cadrele
+    if atmospheric_light is None:
+        def dark_channel():
+            dark = _frames(workspace, "stack_dark", capacity, count, tall, work.dtype)
+            _min_channels(work, dark[:, :height])
+            return _morph(dark, height, _neutral(work.dtype)[0], erode_rect, kernel_size,
+                          morphology)[:, :height]
+
+        dark = _timed(instrument, "dark", dark_channel)
+        A = _timed(instrument, "A", lambda: estimate_atmospheric_light_stack(work, dark))
+    else:
+        A = atmospheric_light
+
+    # Pasul 3 – transmisia initiala (normalizare canal cu canal, ca in
+    # normalized_dark_channel(), cu factorii fiecarui cadru)
+    def transmission():
+        if work.dtype == np.uint8:
+            scale = (1.0 / (255.0 * A)).astype(np.float32)
+            normalize = np.multiply
+        else:
+            scale = A
+            normalize = np.divide
+        t = _frames(workspace, "stack_t", capacity, count, tall, dtype)
+        body = t[:, :height]
+        normalize(work[..., 0], scale[:, 0, None, None], out=body)
+        channel = _frames(workspace, "stack_channel", capacity, count, shape, dtype)
+        for c in (1, 2):
+            np.minimum(body, normalize(work[..., c], scale[:, c, None, None], out=channel),
+                       out=body)
+        _morph(t, height, np.inf, erode_rect, kernel_size, morphology)
+        return transmission_from_dark(t, omega)
+
+    t = _timed(instrument, "t1", transmission)
+
+    # Pasul 4 – close -> open (vezi close_open_rect()), cu separatoarele
+    # readuse la valoarea neutra inaintea fiecarei operatii, apoi pragul t_min
+    def refine():
+        _morph(t, height, -np.inf, dilate_rect, kernel_size, morphology)
+        if kernel_size % 2 == 0:
+            # fara combinare pentru kernel par, vezi close_open_rect()
+            _morph(t, height, np.inf, erode_rect, kernel_size, morphology)
+            _morph(t, height, np.inf, erode_rect, kernel_size, morphology)
+        else:
+            _morph(t, height, np.inf, erode_rect, 2 * kernel_size - 1, morphology)
+        _morph(t, height, -np.inf, dilate_rect, kernel_size, morphology)
+        return np.maximum(t, np.asarray(t_min, dtype=dtype), out=t)[:, :height]
+
+    t_refined = _timed(instrument, "refined", refine)
+
+    # Pasul 5 – restaurarea, direct in ordinea canalelor ceruta
+    def restore():
+        if work.dtype == np.uint8:
+            A32 = A.astype(np.float32)
+            channel = _frames(workspace, "stack_channel", capacity, count, shape, np.float32)
+            for c in range(3):
+                J = np.multiply(work[..., c], np.float32(1.0 / 255.0), out=channel)
+                J -= A32[:, c, None, None]
+                J /= t_refined
+                J += A32[:, c, None, None]
+                J *= np.float32(255.0)
+                np.clip(J, 0, 255, out=J)
+                # atribuirea trunchiaza la uint8, la fel ca astype()
+                out[..., 2 - c if rgb else c] = J
+            return out
+
+        img, light = (work[..., ::-1], A[:, ::-1]) if rgb else (work, A)
+        light = light[:, None, None, :]
+        J = np.subtract(img, light, out=_frames(workspace, "stack_restore", capacity, count,
+                                                stack.shape[1:], np.float64))
+        J /= t_refined[..., None]
+        J += light
+        J *= 255
+        np.clip(J, 0, 255, out=J)
+        np.copyto(out, J, casting="unsafe")
+        return out
+
+    _timed(instrument, "restore", restore)
+    return A
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Dehazing vectorizat pentru un lot de imagini de aceeasi rezolutie.")
+    parser.add_argument("inputs", nargs="+", help="imaginile lotului (aceeasi rezolutie)")
+    parser.add_argument("-o", "--output-dir", help="directorul pentru imaginile restaurate")
+    parser.add_argument("--kernel-size", type=int, default=15)
+    parser.add_argument("--omega", type=float, default=0.95)
+    parser.add_argument("--t-min", type=float, default=0.85)
+    parser.add_argument("--precision", choices=PRECISIONS, default="float64")
+    parser.add_argument("--compare", action="store_true",
+                        help="masoara si apelurile dehaze_image() pe rand si verifica rezultatele")
+    args = parser.parse_args(argv)
+
+    # ne asiguram ca kernel-ul este impar (la fel ca in interfata grafica)
+    kernel_size = odd_kernel_size(args.kernel_size)
+    params = {"kernel_size": kernel_size, "omega": args.omega, "t_min": args.t_min,
+              "precision": args.precision}
+    images = np.stack([decode_image(path) for path in args.inputs])
+
+    start = time.perf_counter()
+    restored, _ = dehaze_stack(images, **params)
+    elapsed = time.perf_counter() - start
+    print(f"{len(images)} imagini {images.shape[2]}x{images.shape[1]}: {elapsed:.3f} s "
+          f"({len(images) / elapsed:.1f} imagini/s)")
+
+    if args.compare:
+        start = time.perf_counter()
+        single = [dehaze_image(image, keep=(), **params).restored for image in images]
+        loop = time.perf_counter() - start
+        identical = all(np.array_equal(a, b) for a, b in zip(restored, single))
+        print(f"dehaze_image() pe rand: {loop:.3f} s (x{loop / elapsed:.1f}), "
+              f"rezultate {'identice' if identical else 'DIFERITE'}")
+        if not identical:
+            return 1
+
+    if args.output_dir:
+        os.makedirs(args.output_dir, exist_ok=True)
+        for path, image in zip(args.inputs, restored):
+            name = os.path.splitext(os.path.basename(path))[0] + ".png"
+            write_image(os.path.join(args.output_dir, name), image)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
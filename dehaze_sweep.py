@@ -0,0 +1,226 @@
+#  Explorarea unei grile de parametri (kernel_size, omega, t_min) pe una sau mai multe imagini
+#
+#  Rezultatele intermediare sunt calculate o singura data pentru toate
+#  combinatiile care le impart:
+#    - pe imagine: decodarea, conversia in double, minimul pe canale
+#    - pe kernel_size: canalul intunecat, A, I_min si toata morfologia
+#      (closing/opening pe t1 = 1 - omega * I_min este exact
+#      1 - omega * opening/closing pe I_min, deci nu depinde de omega)
+#    - pe (kernel_size, omega): harta de transmisie rafinata
+#    - pe t_min: doar pragul si restaurarea, calculate vectorizat pentru
+#      toate valorile t_min odata
+#  Rezultatele sunt identice cu cele ale dehaze_image() pentru fiecare combinatie.
+#
+#  Exemplu:
+#      python dehaze_sweep.py poza.jpg --kernel-sizes 7 15 31 --omegas 0.8 0.95 \
+#          --t-mins 0.1 0.5 0.85 -o explorare
+
+import argparse
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+from dehaze_batch import collect_inputs, write_image
+from dehaze_filters import erode_rect, open_close_rect
+from dehaze_morphology import (
+    PRECISIONS,
+    _check_precision,
+    decode_image,
+    estimate_atmospheric_light,
+    normalized_dark_channel,
+    odd_kernel_size,
+    structuring_element,
+    transmission_from_dark,
+)
+
+# memoria maxima (octeti) folosita de restaurarea vectorizata pe o banda de linii
+_BAND_BYTES = 64 << 20
+
+
+def restore_many(img, A, t_morph, t_mins, channel_order="BGR"):
+    """
+    Restaureaza imaginea pentru mai multe praguri t_min odata: diferenta
+    I - A este calculata o singura data, iar impartirea la transmisie se face
+    vectorizat pentru toate pragurile, pe benzi de linii (memorie limitata).
+
+    Rezultatele (uint8, in ordinea `channel_order`) sunt identice cu
+    restore_image(img, A, np.maximum(t_morph, t_min), channel_order).
+    """
+    height, width = img.shape[:2]
+    dtype = t_morph.dtype
+    thresholds = np.asarray(t_mins, dtype=dtype)[:, None, None]
+    outputs = [np.empty(img.shape, dtype=np.uint8) for _ in t_mins]
+
+    rgb = channel_order.upper() == "RGB"
+    if img.dtype == np.uint8:
+        A_work = np.asarray(A, dtype=np.float32)
+    else:
+        A_work = np.asarray(A, dtype=np.float64)
+        if rgb:
+            # ca in restore_image(): lucram pe vederi cu canalele inversate
+            img = img[..., ::-1]
+            A_work = A_work[::-1]
+
+    row_bytes = len(t_mins) * width * 3 * np.dtype(A_work.dtype).itemsize
+    band = max(_BAND_BYTES // row_bytes, 1)
+    for r0 in range(0, height, band):
+        rows = slice(r0, min(r0 + band, height))
+        # pragul t_min pentru toate valorile odata: T x b x W
+        t = np.maximum(t_morph[None, rows], thresholds)
+
+        if img.dtype == np.uint8:
+            for c in range(3):
+                # aceeasi succesiune de operatii float32 ca in restore_image()
+                D = img[rows, :, c] * np.float32(1.0 / 255.0)
+                D -= A_work[c]
+                J = D / t
+                J += A_work[c]
+                J *= np.float32(255.0)
+                np.clip(J, 0, 255, out=J)
+                for out, J_t in zip(outputs, J):
+                    out[rows, :, 2 - c if rgb else c] = J_t
+        else:
+            D = img[rows] - A_work
+            J = D / t[..., None]
+            J += A_work
+            J *= 255
+            np.clip(J, 0, 255, out=J)
+            for out, J_t in zip(outputs, J):
+                out[rows] = J_t
+    return outputs
+
+
+def _image_name(index, source):
+    if isinstance(source, (str, os.PathLike)):
+        return str(source)
+    return f"imagine_{index}"
+
+
+def sweep(images, kernel_sizes=(15,), omegas=(0.95,), t_mins=(0.85,), precision="float64",
+          channel_order="BGR", light_method="select", morphology="auto"):
+    """
+    Generator: ruleaza algoritmul pentru toate combinatiile
+    (imagine, kernel_size, omega, t_min) si produce cate un dictionar pe
+    combinatie, pe masura ce sunt gata:
+        image, kernel_size, omega, t_min, A
+        restored - imaginea restaurata (uint8, in ordinea `channel_order`)
+        timings  - timpul fiecarei etape (s); etapele comune mai multor
+                   combinatii sunt impartite egal intre ele
+        seconds  - suma timpilor de mai sus
+
+    Parametri:
+        images: surse acceptate de decode_image() (cai, bytes, ndarray)
+        kernel_sizes, omegas, t_mins: valorile de explorat
+        ceilalti: ca la dehaze_image()
+    """
+    _check_precision(precision)
+    kernel_sizes, omegas, t_mins = list(kernel_sizes), list(omegas), list(t_mins)
+    per_image = len(kernel_sizes) * len(omegas) * len(t_mins)
+
+    for index, source in enumerate(images):
+        name = _image_name(index, source)
+        clock = time.perf_counter()
+
+        # etapele comune tuturor combinatiilor imaginii
+        ImgIn = decode_image(source, channel_order)
+        if precision == "float64":
+            ImgWork = ImgIn.astype(np.float64) / 255.0
+        else:
+            ImgWork = ImgIn
+        # minimul pe canale nu depinde de kernel, doar eroziunea de dupa
+        min_channel = np.min(ImgWork, axis=2)
+        image_time = (time.perf_counter() - clock) / per_image
+
+        for kernel_size in kernel_sizes:
+            per_kernel = len(omegas) * len(t_mins)
+            kernel_morph = structuring_element(kernel_size)
+            clock = time.perf_counter()
+            dark = erode_rect(min_channel, kernel_size, morphology)
+            A = estimate_atmospheric_light(ImgWork, dark, light_method)
+            del dark
+            # toata morfologia pe transmisie, o singura data pentru toate valorile omega
+            I_min = normalized_dark_channel(ImgWork, A, kernel_morph, morphology)
+            I_morph = open_close_rect(I_min, kernel_size, morphology, dst=I_min)
+            kernel_time = (time.perf_counter() - clock) / per_kernel
+
+            for omega in omegas:
+                clock = time.perf_counter()
+                t_morph = transmission_from_dark(I_morph.copy(), omega)
+                omega_time = (time.perf_counter() - clock) / len(t_mins)
+
+                clock = time.perf_counter()
+                restored = restore_many(ImgWork, A, t_morph, t_mins, channel_order)
+                restore_time = (time.perf_counter() - clock) / len(t_mins)
+
+                for t_min, J_restored in zip(t_mins, restored):
+                    timings = {
+                        "image": image_time,
+                        "kernel": kernel_time,
+                        "omega": omega_time,
+                        "restore": restore_time,
+                    }
+                    yield {
+                        "image": name,
+                        "kernel_size": kernel_size,
+                        "omega": omega,
+                        "t_min": t_min,
+                        "A": A,
+                        "restored": J_restored,
+                        "timings": timings,
+                        "seconds": sum(timings.values()),
+                    }
+
+
+def output_name(record, suffix=".png"):
+    """Numele fisierului de iesire pentru o combinatie, ex. poza_k15_w0.95_t0.85.png."""
+    stem = Path(record["image"]).stem
+    return (f"{stem}_k{record['kernel_size']}_w{record['omega']:g}"
+            f"_t{record['t_min']:g}{suffix}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Explorarea parametrilor algoritmului de dehazing.")
+    parser.add_argument("inputs", nargs="+", help="directoare, fisiere sau modele glob")
+    parser.add_argument("--kernel-sizes", type=int, nargs="+", default=[15])
+    parser.add_argument("--omegas", type=float, nargs="+", default=[0.95])
+    parser.add_argument("--t-mins", type=float, nargs="+", default=[0.85])
+    parser.add_argument("--precision", choices=PRECISIONS, default="float64")
+    parser.add_argument("-o", "--output",
+                        help="directorul pentru imaginile rezultate si sweep.json (timpii)")
+    parser.add_argument("--format", default="png", help="formatul imaginilor de iesire")
+    args = parser.parse_args(argv)
+
+    # ne asiguram ca fiecare kernel este impar (la fel ca in interfata grafica)
+    kernel_sizes = sorted({odd_kernel_size(k) for k in args.kernel_sizes})
+    inputs = [str(src) for src, _ in collect_inputs(args.inputs)]
+    if not inputs:
+        print("Nu a fost gasita nicio imagine.", file=sys.stderr)
+        return 1
+
+    records = []
+    start = time.perf_counter()
+    for record in sweep(inputs, kernel_sizes, args.omegas, args.t_mins, args.precision):
+        J_restored = record.pop("restored")
+        if args.output:
+            write_image(Path(args.output) / output_name(record, "." + args.format.lstrip(".")),
+                        J_restored)
+        record["A"] = [float(a) for a in record["A"]]
+        records.append(record)
+        print(f"{Path(record['image']).name} k={record['kernel_size']:<3} "
+              f"omega={record['omega']:<5g} t_min={record['t_min']:<5g} "
+              f"{record['seconds'] * 1000:8.1f} ms")
+    elapsed = time.perf_counter() - start
+
+    print(f"{len(records)} combinatii in {elapsed:.2f} s")
+    if args.output:
+        with open(Path(args.output) / "sweep.json", "w", encoding="utf-8") as f:
+            json.dump({"elapsed": elapsed, "results": records}, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,201 @@
+#  Dehazing pe blocuri (tiles) pentru imagini foarte mari (ortomozaicuri, gigapixeli)
+#
+#  Imaginea nu este niciodata convertita integral in double: fiecare bloc este
+#  prelucrat separat, cu o margine (halo) suficient de mare pentru ca eroziunile
+#  si closing/opening sa dea exact acelasi rezultat ca pe imaginea intreaga.
+#  Memoria ocupata depinde de dimensiunea blocului, nu de cea a imaginii.
+
+import numpy as np
+
+from dehaze_morphology import (
+    _check_precision,
+    _to_bgr,
+    _top_indices,
+    compute_dark_channel,
+    decode_image,
+    initial_transmission,
+    refine_transmission,
+    restore_image,
+    structuring_element,
+    threshold_transmission,
+)
+
+
+def _tiles(height, width, tile_size):
+    """Blocurile (r0, r1, c0, c1) care acopera imaginea, fara suprapunere."""
+    for r0 in range(0, height, tile_size):
+        for c0 in range(0, width, tile_size):
+            yield r0, min(r0 + tile_size, height), c0, min(c0 + tile_size, width)
+
+
+def _read_region(image, r0, r1, c0, c1, channel_order, precision):
+    """Citeste o regiune si o aduce la formatul de lucru (double in [0, 1] sau uint8)."""
+    region = _to_bgr(np.ascontiguousarray(image[r0:r1, c0:c1]), channel_order)
+    if precision == "float64":
+        return region.astype(np.float64) / 255.0
+    return region
+
+
+def _open_image(image, channel_order):
+    """
+    Sursa de pixeli: un fisier .npy este deschis ca memmap (fara a fi citit
+    in memorie), un ndarray / memmap este folosit direct, iar orice alta
+    sursa este decodata cu decode_image().
+    """
+    if isinstance(image, np.ndarray):
+        return image, channel_order
+    if str(image).lower().endswith(".npy"):
+        return np.load(str(image), mmap_mode="r"), channel_order
+    # formatele clasice (JPEG, PNG, ...) nu pot fi decodate pe bucati
+    return decode_image(image), "BGR"
+
+
+def estimate_atmospheric_light_tiled(image, kernel_size=15, tile_size=1024,
+                                     channel_order="BGR", precision="float64"):
+    """
+    Estimeaza lumina atmosferica A pe intreaga imagine, intr-o singura trecere
+    pe blocuri.
+
+    Din fiecare bloc pastram doar cei mai buni candidati (0.1% din numarul
+    total de pixeli) si ii combinam cu cei gasiti pana atunci. Ordinea
+    (valoare DCP, pozitie) este totala, deci candidatii finali si A sunt
+    aceiasi ca la estimate_atmospheric_light() pe imaginea intreaga.
+    """
+    _check_precision(precision)
+
+    image, channel_order = _open_image(image, channel_order)
+    height, width = image.shape[:2]
+    kernel_morph = structuring_element(kernel_size)
+    num_brightest = int(max(height * width * 0.001, 1))
+
+    best = None
+    for r0, r1, c0, c1 in _tiles(height, width, tile_size):
+        candidates = _tile_candidates(image, r0, r1, c0, c1, kernel_morph, num_brightest,
+                                      channel_order, precision)
+        best = _merge_candidates(best, candidates, num_brightest)
+    return _light_from_candidates(best)
+
+
+def _tile_candidates(image, r0, r1, c0, c1, kernel_morph, num_brightest, channel_order,
+                     precision, morphology="auto"):
+    """
+    Candidatii pentru A dintr-un bloc: cei mai mari `num_brightest` pixeli
+    din canalul intunecat al blocului, ca (valori, pozitii in imagine, pixeli).
+    """
+    height, width = image.shape[:2]
+    # pentru canalul intunecat ajunge o margine de o raza a kernel-ului
+    halo = kernel_morph.shape[0] // 2
+    hr0, hr1 = max(r0 - halo, 0), min(r1 + halo, height)
+    hc0, hc1 = max(c0 - halo, 0), min(c1 + halo, width)
+    region = _read_region(image, hr0, hr1, hc0, hc1, channel_order, precision)
+    dark = compute_dark_channel(region, kernel_morph, morphology)
+
+    # doar zona centrala a blocului (fara halo)
+    core = (slice(r0 - hr0, r1 - hr0), slice(c0 - hc0, c1 - hc0))
+    dark_core = np.ascontiguousarray(dark[core]).ravel()
+    local = _top_indices(dark_core, min(num_brightest, dark_core.size))
+    rows, cols = np.divmod(local, c1 - c0)
+    return dark_core[local], (rows + r0) * width + (cols + c0), region[core][rows, cols]
+
+
+def _merge_candidates(best, candidates, num_brightest):
+    """
+    Combina candidatii unui bloc cu cei gasiti pana atunci si ii pastreaza
+    pe primii num_brightest dupa (valoare, pozitie).
+    """
+    values, index, pixels = candidates
+    if best is not None:
+        values = np.concatenate((best[0], values))
+        index = np.concatenate((best[1], index))
+        pixels = np.concatenate((best[2], pixels))
+    order = np.lexsort((index, values))[-num_brightest:]
+    return values[order], index[order], pixels[order]
+
+
+def _light_from_candidates(best):
+    """A = candidatul cu luminozitatea (B+G+R) maxima, in [0, 1]."""
+    pixels = best[2]
+    brightness = np.sum(pixels, axis=1)
+    A = pixels[np.argmax(brightness)]
+    if A.dtype == np.uint8:
+        A = A / 255.0
+    return A
+
+
+def _restore_tile(image, out, r0, r1, c0, c1, A, kernel_morph, omega, t_min, channel_order,
+                  precision, morphology="auto"):
+    """Pasii 3-5 pentru un bloc, scrisi direct in out[r0:r1, c0:c1]."""
+    height, width = image.shape[:2]
+    # t1 are nevoie de o raza a kernel-ului, iar closing + opening de inca
+    # patru (dilatare, eroziune, eroziune, dilatare) -> 5 raze in total
+    halo = 5 * (kernel_morph.shape[0] // 2)
+    hr0, hr1 = max(r0 - halo, 0), min(r1 + halo, height)
+    hc0, hc1 = max(c0 - halo, 0), min(c1 + halo, width)
+    region = _read_region(image, hr0, hr1, hc0, hc1, channel_order, precision)
+
+    # Pasii 3-4 pe bloc (cu halo), apoi pragul t_min
+    t1 = initial_transmission(region, A, omega, kernel_morph, morphology)
+    t_refined = refine_transmission(t1, kernel_morph, morphology)
+    core = (slice(r0 - hr0, r1 - hr0), slice(c0 - hc0, c1 - hc0))
+    t_core = threshold_transmission(t_refined[core], t_min)
+
+    # Pasul 5 – restauram doar zona centrala a blocului
+    target = out[r0:r1, c0:c1]
+    if target.flags.c_contiguous:
+        restore_image(np.ascontiguousarray(region[core]), A, t_core, channel_order, out=target)
+    else:
+        target[...] = restore_image(np.ascontiguousarray(region[core]), A, t_core, channel_order)
+
+
+def dehaze_tiled(image, kernel_size=15, omega=0.95, t_min=0.85, tile_size=1024,
+                 out=None, channel_order="BGR", precision="float64",
+                 atmospheric_light=None):
+    """
+    Aplica algoritmul de dehazing pe blocuri, pentru imagini care nu incap in
+    memorie impreuna cu rezultatele intermediare.
+
+    Parametri:
+        image        : ndarray / np.memmap H x W x 3 (uint8), cale catre un
+                       fisier .npy (deschis ca memmap) sau orice sursa
+                       acceptata de decode_image()
+        kernel_size  : dimensiunea elementului structurant (impar)
+        omega        : parametru (0-1) care controleaza cat de agresiv se scoate ceata
+        t_min        : transmisia minima (0-1), previne intunecarea excesiva
+        tile_size    : latura unui bloc (fara halo), in pixeli
+        out          : tabloul de iesire (ndarray / memmap H x W x 3, uint8) sau
+                       calea unui fisier .npy creat ca memmap; implicit un
+                       tablou nou in memorie
+        channel_order: ordinea canalelor intrarii; iesirea are aceeasi ordine
+        precision    : "float64" (implicit) sau "float32", vezi PRECISIONS
+        atmospheric_light: A fix / estimat anterior (3 valori BGR in [0, 1])
+
+    Returneaza:
+        J_restored - imaginea restaurata (tabloul `out`)
+        A          - lumina atmosferica folosita (BGR)
+    """
+    _check_precision(precision)
+
+    image, channel_order = _open_image(image, channel_order)
+    height, width = image.shape[:2]
+
+    # Pasul 2 – A se estimeaza global, intr-o trecere separata
+    if atmospheric_light is None:
+        A = estimate_atmospheric_light_tiled(image, kernel_size, tile_size,
+                                             channel_order, precision)
+    else:
+        A = np.asarray(atmospheric_light, dtype=np.float64).reshape(3)
+
+    if out is None:
+        out = np.empty((height, width, 3), dtype=np.uint8)
+    elif not isinstance(out, np.ndarray):
+        out = np.lib.format.open_memmap(str(out), mode="w+", dtype=np.uint8,
+                                        shape=(height, width, 3))
+
+    kernel_morph = structuring_element(kernel_size)
+    for r0, r1, c0, c1 in _tiles(height, width, tile_size):
+        _restore_tile(image, out, r0, r1, c0, c1, A, kernel_morph, omega, t_min,
+                      channel_order, precision)
+
+    if isinstance(out, np.memmap):
+        out.flush()
+    return out, A
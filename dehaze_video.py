@@ -0,0 +1,313 @@
+#  Dehazing pentru fluxuri video (fisiere video, camere, iteratoare de cadre)
+#
+#  Intre cadre consecutive lumina atmosferica A si harta de transmisie se
+#  schimba foarte putin, asa ca nu le recalculam la fiecare cadru:
+#    - A este reestimat doar la fiecare `reestimate_every` cadre sau la o
+#      schimbare de scena, si este netezit in timp;
+#    - transmisia este recalculata doar in zonele in care imaginea s-a
+#      schimbat (cu o margine suficienta pentru operatiile morfologice).
+#
+#  Exemplu:
+#      python dehaze_video.py intrare.mp4 iesire.mp4 --kernel-size 15
+
+import argparse
+import sys
+import time
+
+import cv2
+import numpy as np
+
+from dehaze_morphology import (
+    PRECISIONS,
+    DehazeWorkspace,
+    _check_precision,
+    compute_dark_channel,
+    decode_image,
+    estimate_atmospheric_light,
+    initial_transmission,
+    refine_transmission,
+    restore_image,
+    structuring_element,
+    threshold_transmission,
+)
+
+# dimensiunea miniaturii folosite pentru detectia schimbarii de scena
+_SIGNATURE_SIZE = (64, 36)
+
+
+class DehazeStream:
+    """
+    Procesor de cadre cu refolosirea lui A si a transmisiei intre cadre.
+
+    Parametri:
+        kernel_size, omega, t_min, precision: ca la dehaze_image()
+        reestimate_every  : A se reestimeaza cel mult o data la atatea cadre
+        light_smoothing   : ponderea valorii vechi a lui A la reestimare
+                            (0 = fara netezire)
+        light_stride      : pas de subesantionare pentru estimarea lui A
+        scene_change_threshold: diferenta medie (niveluri de gri, pe miniatura)
+                            peste care consideram ca scena s-a schimbat
+        reuse_transmission: recalculeaza transmisia doar in zonele care s-au
+                            schimbat fata de cadrul de referinta
+        static_threshold  : diferenta maxima pe canal (niveluri de intensitate)
+                            pana la care un pixel este considerat static
+                            (toleranta la zgomot)
+        block_size        : latura blocurilor pentru detectia zonelor statice
+        channel_order     : ordinea canalelor cadrelor ("BGR" sau "RGB");
+                            cadrele de iesire au aceeasi ordine
+    """
+
+    def __init__(self, kernel_size=15, omega=0.95, t_min=0.85, precision="float32",
+                 reestimate_every=30, light_smoothing=0.8, light_stride=2,
+                 scene_change_threshold=25.0, reuse_transmission=True,
+                 static_threshold=8, block_size=32, channel_order="BGR"):
+        _check_precision(precision)
+        self.kernel_size = kernel_size
+        self.omega = omega
+        self.t_min = t_min
+        self.precision = precision
+        self.reestimate_every = reestimate_every
+        self.light_smoothing = light_smoothing
+        self.light_stride = light_stride
+        self.scene_change_threshold = scene_change_threshold
+        self.reuse_transmission = reuse_transmission
+        self.static_threshold = static_threshold
+        self.block_size = block_size
+        self.channel_order = channel_order
+
+        self.kernel_morph = structuring_element(kernel_size)
+        # dependenta transmisiei rafinate de vecinatate: eroziunea din t1 plus
+        # closing + opening -> 5 raze ale kernel-ului
+        self.halo = 5 * (kernel_size // 2)
+        # bufferele refolosite de la un cadru la altul (aceeasi rezolutie)
+        self.workspace = DehazeWorkspace()
+        self.reset()
+
+    def reset(self):
+        """Uita starea (A, transmisia, cadrul de referinta), ca la un flux nou."""
+        self.A = None
+        self._frames_since_estimate = 0
+        self._prev_signature = None
+        self._t_morph = None
+        self._ref_frame = None
+        self.stats = {
+            "frames": 0,
+            "light_estimates": 0,
+            "scene_changes": 0,
+            "transmission_full": 0,
+            "transmission_partial": 0,
+            "transmission_reused": 0,
+        }
+
+    def _update_light(self, work, gray):
+        """Reestimeaza A daca este cazul. Intoarce True daca A s-a schimbat."""
+        signature = cv2.resize(gray, _SIGNATURE_SIZE, interpolation=cv2.INTER_AREA).astype(np.float32)
+        scene_change = (
+            self._prev_signature is not None
+            and float(np.mean(np.abs(signature - self._prev_signature))) > self.scene_change_threshold
+        )
+        self._prev_signature = signature
+
+        due = self.A is None or self._frames_since_estimate >= self.reestimate_every
+        if not (due or scene_change):
+            self._frames_since_estimate += 1
+            return False
+
+        dark = compute_dark_channel(work, self.kernel_morph, workspace=self.workspace)
+        A_new = estimate_atmospheric_light(work, dark, stride=self.light_stride)
+        if self.A is None or scene_change:
+            # scena noua: nu amestecam cu valoarea veche
+            self.A = A_new
+        else:
+            self.A = self.light_smoothing * self.A + (1.0 - self.light_smoothing) * A_new
+        if scene_change:
+            self.stats["scene_changes"] += 1
+        self.stats["light_estimates"] += 1
+        self._frames_since_estimate = 1
+        return True
+
+    def _changed_box(self, frame):
+        """
+        Dreptunghiul (r0, r1, c0, c1) care contine blocurile schimbate fata de
+        cadrul de referinta, sau None daca tot cadrul este static.
+
+        Comparatia se face canal cu canal: o schimbare de culoare care pastreaza
+        luminanta schimba totusi canalul intunecat, deci si transmisia.
+        """
+        height, width = frame.shape[:2]
+        bs = self.block_size
+        ws = self.workspace
+        padded = ws.get("moving", (-(-height // bs) * bs, -(-width // bs) * bs), bool)
+        padded[height:] = False
+        padded[:height, width:] = False
+        # pixelii care difera de referinta, pe cel putin un canal, peste pragul
+        # de zgomot
+        diff = cv2.absdiff(frame, self._ref_frame, dst=ws.get("diff", frame.shape, np.uint8))
+        diff_max = np.max(diff, axis=2, out=ws.get("diff_max", (height, width), np.uint8))
+        moving = np.greater(diff_max, self.static_threshold, out=padded[:height, :width])
+        if not moving.any():
+            return None
+
+        # un bloc este "in miscare" daca are macar un pixel schimbat
+        blocks = padded.reshape(padded.shape[0] // bs, bs, padded.shape[1] // bs, bs).any(axis=(1, 3))
+
+        rows = np.flatnonzero(blocks.any(axis=1))
+        cols = np.flatnonzero(blocks.any(axis=0))
+        return (rows[0] * bs, min((rows[-1] + 1) * bs, height),
+                cols[0] * bs, min((cols[-1] + 1) * bs, width))
+
+    def _transmission(self, work, frame, light_changed):
+        """Harta de transmisie rafinata (inainte de t_min), refolosita unde se poate."""
+        full = (
+            light_changed
+            or not self.reuse_transmission
+            or self._t_morph is None
+            or self._t_morph.shape != frame.shape[:2]
+        )
+        box = None if full else self._changed_box(frame)
+
+        if not full and box is None:
+            self.stats["transmission_reused"] += 1
+            return self._t_morph
+
+        height, width = frame.shape[:2]
+        if not full:
+            # zona in care transmisia se poate schimba: dreptunghiul schimbat
+            # extins cu halo; pentru a o calcula exact mai adaugam un halo
+            r0, r1, c0, c1 = box
+            r0, r1 = max(r0 - self.halo, 0), min(r1 + self.halo, height)
+            c0, c1 = max(c0 - self.halo, 0), min(c1 + self.halo, width)
+            # daca zona afectata este mare, nu merita calculul pe regiune
+            full = (r1 - r0) * (c1 - c0) > 0.5 * height * width
+
+        if full:
+            t1 = initial_transmission(work, self.A, self.omega, self.kernel_morph,
+                                      workspace=self.workspace)
+            self._t_morph = refine_transmission(t1, self.kernel_morph, workspace=self.workspace)
+            if self._ref_frame is None or self._ref_frame.shape != frame.shape:
+                self._ref_frame = frame.copy()
+            else:
+                np.copyto(self._ref_frame, frame)
+            self.stats["transmission_full"] += 1
+            return self._t_morph
+
+        hr0, hr1 = max(r0 - self.halo, 0), min(r1 + self.halo, height)
+        hc0, hc1 = max(c0 - self.halo, 0), min(c1 + self.halo, width)
+        t1 = initial_transmission(np.ascontiguousarray(work[hr0:hr1, hc0:hc1]),
+                                  self.A, self.omega, self.kernel_morph)
+        t_region = refine_transmission(t1, self.kernel_morph)
+        self._t_morph[r0:r1, c0:c1] = t_region[r0 - hr0:r1 - hr0, c0 - hc0:c1 - hc0]
+        self._ref_frame[r0:r1, c0:c1] = frame[r0:r1, c0:c1]
+        self.stats["transmission_partial"] += 1
+        return self._t_morph
+
+    def process(self, frame, out=None):
+        """
+        Elimina ceata dintr-un cadru si intoarce cadrul restaurat (uint8).
+
+        Daca `out` (H x W x 3, uint8) este dat, cadrul restaurat este scris in
+        el; cu acelasi `out` la fiecare cadru, dupa primul cadru nu se mai
+        aloca niciun tablou de dimensiunea imaginii.
+        """
+        ws = self.workspace
+        ImgIn = decode_image(frame, self.channel_order)
+        if self.precision == "float64":
+            work = np.divide(ImgIn, 255.0, out=ws.get("float", ImgIn.shape, np.float64))
+        else:
+            work = ImgIn
+
+        gray = cv2.cvtColor(ImgIn, cv2.COLOR_BGR2GRAY, dst=ws.get("gray", ImgIn.shape[:2], np.uint8))
+        light_changed = self._update_light(work, gray)
+        t_morph = self._transmission(work, ImgIn, light_changed)
+
+        # impunem pragul minim si restauram cadrul
+        t_refined = threshold_transmission(t_morph, self.t_min, ws)
+        J_restored = restore_image(work, self.A, t_refined, self.channel_order, out, ws)
+        self.stats["frames"] += 1
+        return J_restored
+
+    __call__ = process
+
+
+def read_video_frames(source):
+    """Genereaza cadrele (BGR) dintr-un fisier video sau de la o camera (index)."""
+    capture = cv2.VideoCapture(source)
+    if not capture.isOpened():
+        raise FileNotFoundError(f"Fluxul video nu a putut fi deschis: {source}")
+    try:
+        while True:
+            ok, frame = capture.read()
+            if not ok:
+                break
+            yield frame
+    finally:
+        capture.release()
+
+
+def dehaze_stream(frames, **params):
+    """
+    Generator lenes: primeste un iterator de cadre (sau calea unui fisier
+    video) si produce cadrele fara ceata, pe masura ce sunt cerute.
+
+    Parametri:
+        frames: iterator de cadre (ndarray) sau sursa pentru read_video_frames()
+        params: parametrii DehazeStream
+    """
+    if isinstance(frames, (str, int)):
+        frames = read_video_frames(frames)
+    stream = DehazeStream(**params)
+    for frame in frames:
+        yield stream.process(frame)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Eliminarea cetii dintr-un fisier video.")
+    parser.add_argument("input", help="fisierul video de intrare")
+    parser.add_argument("output", help="fisierul video de iesire (ex. .mp4 / .avi)")
+    parser.add_argument("--kernel-size", type=int, default=15)
+    parser.add_argument("--omega", type=float, default=0.95)
+    parser.add_argument("--t-min", type=float, default=0.85)
+    parser.add_argument("--precision", choices=PRECISIONS, default="float32")
+    parser.add_argument("--reestimate-every", type=int, default=30)
+    parser.add_argument("--fourcc", default="mp4v", help="codec-ul video de iesire")
+    args = parser.parse_args(argv)
+
+    capture = cv2.VideoCapture(args.input)
+    if not capture.isOpened():
+        print(f"Fluxul video nu a putut fi deschis: {args.input}", file=sys.stderr)
+        return 1
+    fps = capture.get(cv2.CAP_PROP_FPS) or 25.0
+    capture.release()
+
+    stream = DehazeStream(
+        kernel_size=args.kernel_size,
+        omega=args.omega,
+        t_min=args.t_min,
+        precision=args.precision,
+        reestimate_every=args.reestimate_every,
+    )
+    writer = None
+    J_restored = None
+    start = time.perf_counter()
+    try:
+        for frame in read_video_frames(args.input):
+            # cadrul este scris imediat, deci putem refolosi tabloul de iesire
+            J_restored = stream.process(frame, out=J_restored)
+            if writer is None:
+                height, width = J_restored.shape[:2]
+                writer = cv2.VideoWriter(args.output, cv2.VideoWriter_fourcc(*args.fourcc),
+                                         fps, (width, height))
+            writer.write(J_restored)
+    finally:
+        if writer is not None:
+            writer.release()
+    elapsed = time.perf_counter() - start
+
+    frames = stream.stats["frames"]
+    print(f"Cadre: {frames}, {elapsed:.2f} s, {frames / elapsed if elapsed else 0:.1f} cadre/s")
+    print(stream.stats)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
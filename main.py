@@ -1,18 +1,47 @@
+import json
+import os
+import time
+
+# momentul pornirii, pentru masurarea timpului pana la prima fereastra
+_T0 = time.perf_counter()
+
+import queue
+import threading
 import tkinter as tk  #Interfata grafica (Tkinter)
 from tkinter import ttk, filedialog, messagebox
 
-import matplotlib
-matplotlib.use("TkAgg")  # backend pentru integrarea Matplotlib in Tkinter
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-from matplotlib.figure import Figure
+# Matplotlib, numpy / OpenCV si modulul de algoritm se importa abia dupa ce
+# fereastra este afisata (vezi finish_startup()), ca aplicatia sa apara
+# imediat; restul importurilor din metode sunt apoi doar cautari in sys.modules.
+
+# variabila de mediu pentru masurarea pornirii (dehaze_bench.py --startup-command):
+# daca este setata, timpii se scriu ca JSON in fisierul indicat si aplicatia se inchide
+STARTUP_PROBE_ENV = "DEHAZE_STARTUP_PROBE"
+
+# intarzierea (ms) dupa ultima modificare a unui parametru pana la reprocesare
+DEBOUNCE_MS = 300
+# intervalul (ms) la care verificam rezultatele venite de la firul de lucru
+POLL_MS = 50
+# latura maxima (pixeli) a previzualizarii afisate inainte de rezultatul complet;
+# pentru imagini mai mici de doua ori decat atat nu facem previzualizare
+PREVIEW_MAX_SIDE = 960
+
+# numele afisate pentru etapele algoritmului (in bara de stare)
+STAGE_LABELS = {
+    "rgb": "conversii",
+    "gray": "conversii",
+    "float": "conversii",
+    "dark": "canalul intunecat",
+    "A": "lumina atmosferica",
+    "t1": "transmisia initiala",
+    "refined": "rafinarea transmisiei",
+    "dark_float": "canalul intunecat",
+    "restore": "restaurarea imaginii",
+}
+
 
-# importam functiile de prelucrare si de afisare din modulul de algoritm
-from dehaze_morphology import (
-    dehaze_with_morphology,
-    plot_morph_ops,
-    plot_gray_hist,
-    plot_dehaze_results,
-)
+class _JobCancelled(Exception):
+    """Ridicata in firul de lucru cand procesarea curenta a fost inlocuita de una noua."""
 
 
 # Clasa principala a aplicatiei ( creaza fereastra Tkinter, construirea layout-ului, citirea parametrilor din interfata, apelearea functiilor din dehaze_morphology)
@@ -29,8 +58,42 @@ class DehazeGUI:
 
         # calea imaginii selectate din calculator
         self.img_path = None
+        # imaginea decodata (BGR) pentru fisierul selectat; o pastram in memorie
+        # ca reprocesarea sa nu mai citeasca / decodeze fisierul de fiecare data
+        self.img_bgr = None
+        # pipeline-ul pe etape memoreaza rezultatele intermediare, astfel ca la
+        # schimbarea lui t_min / omega se recalculeaza doar etapele afectate
+        # (creat in finish_startup(), dupa afisarea ferestrei)
+        self.pipeline = None
+        self.img_key = None
+        # la schimbarea imaginii golim cache-ul, dar doar cand nu ruleaza nimic
+        self._cache_stale = False
+
+        # procesarea ruleaza pe un fir separat; rezultatele vin printr-o coada
+        # citita periodic din firul Tkinter (root.after)
+        self._job_id = 0            # id-ul ultimei cereri de procesare
+        self._worker = None         # firul de lucru curent
+        self._pending = None        # cererea care asteapta terminarea firului curent
+        self._results_queue = queue.Queue()
+        self._debounce_id = None
+        self._poll_id = None
+        self._job_started = None
+        self._job_stage = None
+        self._job_preview = False   # previzualizarea cererii curente e afisata
         # dictionar in care memoram rezultatele ultimei procesari
         self.results = None
+        # figurile deja construite pentru rezultatele curente si ferestrele
+        # in care sunt afisate, dupa nume
+        self._figures = {}
+        self._figure_windows = {}
+        # artistii imaginilor din panoul din dreapta (creati o singura data si
+        # apoi actualizati cu set_data) si cheia imaginii originale afisate
+        self._im_orig = None
+        self._im_rest = None
+        self._shown_orig_key = None
+        # copia la rezolutia de afisare a originalului, pe firul de lucru:
+        # ((cheie imagine, latura), imagine)
+        self._orig_display = None
 
         # definim stilurile grafice pentru widget-urile ttk
         self._setup_style()
@@ -225,7 +288,22 @@ class DehazeGUI:
         )
         self.omega_var = tk.DoubleVar(value=0.95)
         ent_omega = ttk.Entry(frame, textvariable=self.omega_var, justify="center")
-        ent_omega.pack(fill=tk.X, pady=(0, 12))
+        ent_omega.pack(fill=tk.X, pady=(0, 8))
+
+        # motorul de rafinare a transmisiei (lista completa se completeaza in
+        # finish_startup(), dupa importul algoritmului)
+        ttk.Label(frame, text="Rafinarea transmisiei:", style="Section.TLabel").pack(
+            anchor=tk.W
+        )
+        self.refinement_var = tk.StringVar(value="morph")
+        self.cmb_refinement = ttk.Combobox(
+            frame,
+            textvariable=self.refinement_var,
+            values=("morph",),
+            state="readonly",
+            justify="center",
+        )
+        self.cmb_refinement.pack(fill=tk.X, pady=(0, 12))
 
         # butonul care lanseaza procesarea imaginii selectate
         btn_process = ttk.Button(
@@ -234,7 +312,17 @@ class DehazeGUI:
             style="Primary.TButton",
             command=self.process_image,
         )
-        btn_process.pack(fill=tk.X, pady=(0, 10))
+        btn_process.pack(fill=tk.X, pady=(0, 6))
+
+        # indicator de progres si timp scurs pentru procesarea curenta
+        self.progress = ttk.Progressbar(frame, mode="indeterminate")
+        self.progress.pack(fill=tk.X, pady=(0, 2))
+        self.lbl_status = ttk.Label(frame, text="", style="Text.TLabel")
+        self.lbl_status.pack(anchor=tk.W, pady=(0, 6))
+
+        # orice modificare a parametrilor relanseaza procesarea (cu debounce)
+        for var in (self.tmin_var, self.kernel_var, self.omega_var, self.refinement_var):
+            var.trace_add("write", self.schedule_processing)
 
         ttk.Separator(frame).pack(fill=tk.X, pady=(10, 10))
 
@@ -301,6 +389,31 @@ class DehazeGUI:
             font=("Segoe UI", 11, "bold"),
         ).pack(anchor=tk.W, pady=(0, 5))
 
+        # figura Matplotlib se creeaza in finish_startup(); pana atunci panoul
+        # arata doar un mesaj
+        self._plot_frame = frame
+        self.canvas = None
+        self._lbl_loading = ttk.Label(frame, text="Se incarca...", style="Text.TLabel")
+        self._lbl_loading.pack(expand=True)
+
+    def finish_startup(self):
+        """
+        Importa dependentele grele (Matplotlib, algoritmul) si creeaza figura
+        din panoul din dreapta. Se apeleaza dupa ce fereastra a fost afisata.
+        """
+        import matplotlib
+        matplotlib.use("TkAgg")  # backend pentru integrarea Matplotlib in Tkinter
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+        from matplotlib.figure import Figure
+
+        from dehaze_morphology import REFINEMENT_ENGINES, DehazePipeline
+
+        self.cmb_refinement.config(values=list(REFINEMENT_ENGINES))
+
+        # pipeline-ul pe etape memoreaza rezultatele intermediare, astfel ca la
+        # schimbarea lui t_min / omega se recalculeaza doar etapele afectate
+        self.pipeline = DehazePipeline()
+
         # cream o figura Matplotlib cu 2 subplots
         self.fig = Figure(figsize=(7.5, 4.8))
         self.ax_orig = self.fig.add_subplot(1, 2, 1)
@@ -312,10 +425,12 @@ class DehazeGUI:
         self.ax_rest.axis("off")
 
         # atasam figura la un widget Tkinter prin FigureCanvasTkAgg
-        canvas = FigureCanvasTkAgg(self.fig, master=frame)
+        self._lbl_loading.destroy()
+        canvas = FigureCanvasTkAgg(self.fig, master=self._plot_frame)
         canvas_widget = canvas.get_tk_widget()
         canvas_widget.pack(fill=tk.BOTH, expand=True, pady=(5, 0))
         self.canvas = canvas
+        canvas.draw()
 
     #  functii utilitare
     def _update_tmin_label(self, _event=None):
@@ -334,106 +449,342 @@ class DehazeGUI:
             filetypes=filetypes,
         )
         if path:
+            from dehaze_morphology import decode_image
+
+            # decodam imaginea o singura data, la selectie
+            try:
+                img_bgr = decode_image(path)
+            except Exception as e:
+                messagebox.showerror("Eroare la citire", str(e))
+                return
             self.img_path = path
+            self.img_bgr = img_bgr
+            # rezultatele intermediare ale imaginii anterioare nu mai sunt utile;
+            # amprenta noii imagini se calculeaza in firul de lucru
+            self._cache_stale = True
+            self.img_key = None
             messagebox.showinfo("Imagine selectata", f"Ai ales:\n{path}")
+            self.process_image()
 
     #  logica de procesare
     def process_image(self):
 
-        # Citeste parametrii din interfata, apeleaza algoritmul de dehazing
-        # si actualizeaza afisarea (plus butoanele pentru figuri).
+        # Porneste imediat procesarea cu parametrii curenti (butonul "Proceseaza").
+        # Algoritmul ruleaza pe un fir separat, deci fereastra ramane activa.
 
-        if not self.img_path:
+        if self.img_bgr is None:
             messagebox.showwarning("Atentie", "Mai intai alege o imagine.")
             return
 
-        try:
-            # citim parametrii din interfata
-            t_min = float(self.tmin_var.get())
-            omega = float(self.omega_var.get())
-            kernel_size = int(self.kernel_var.get())
+        if self._debounce_id is not None:
+            self.root.after_cancel(self._debounce_id)
+            self._debounce_id = None
+        self._start_job(show_errors=True)
 
-            # ne asiguram ca kernel-ul este impar
-            if kernel_size % 2 == 0:
-                kernel_size += 1
-                self.kernel_var.set(kernel_size)
+    def schedule_processing(self, *_args):
+        """Reproceseaza automat la scurt timp dupa ultima modificare a parametrilor."""
+        if self.img_bgr is None:
+            return
+        if self._debounce_id is not None:
+            self.root.after_cancel(self._debounce_id)
+        self._debounce_id = self.root.after(DEBOUNCE_MS, self._debounced_start)
+
+    def _debounced_start(self):
+        self._debounce_id = None
+        self._start_job(show_errors=False)
+
+    def _read_params(self):
+        """Citeste parametrii din interfata (poate ridica ValueError / TclError)."""
+        t_min = float(self.tmin_var.get())
+        omega = float(self.omega_var.get())
+        kernel_size = int(self.kernel_var.get())
+
+        # ne asiguram ca kernel-ul este impar
+        if kernel_size % 2 == 0:
+            kernel_size += 1
+            self.kernel_var.set(kernel_size)
+        if kernel_size < 1:
+            raise ValueError("Dimensiunea kernel-ului trebuie sa fie pozitiva.")
+        return {"kernel_size": kernel_size, "omega": omega, "t_min": t_min,
+                "refinement": self.refinement_var.get()}
+
+    def _start_job(self, show_errors):
+        try:
+            params = self._read_params()
+        except (ValueError, tk.TclError) as e:
+            # la editarea unui camp valorile intermediare pot fi invalide
+            if show_errors:
+                messagebox.showerror("Eroare la procesare", f"Parametri invalizi: {e}")
+            else:
+                self.lbl_status.config(text="Parametri invalizi")
+            return
 
-            # apelam algoritmul de dehazing din modulul dehaze_morphology
-            ImgRGB, ImgGray, dark_channel, t1, t_refined, J_restored_rgb = dehaze_with_morphology(
-                self.img_path,
-                kernel_size=kernel_size,
-                omega=omega,
-                t_min=t_min,
-            )
-
-            # salvam rezultatele intr-un dictionar pentru a le putea folosi ulterior
-            self.results = {
-                "ImgRGB": ImgRGB,
-                "ImgGray": ImgGray,
-                "dark_channel": dark_channel,
-                "t1": t1,
-                "t_refined": t_refined,
-                "J_restored_rgb": J_restored_rgb,
-                "kernel_size": kernel_size,
-                "t_min": t_min,
-            }
-
-            # activam butoanele pentru figurile 1, 2 si 3
-            self.btn_fig1.config(state="normal")
-            self.btn_fig2.config(state="normal")
-            self.btn_fig3.config(state="normal")
-
-            # actualizam subplots-urile din dreapta cu imaginile curente
-            self.ax_orig.clear()
-            self.ax_rest.clear()
-
-            self.ax_orig.imshow(ImgRGB)
-            self.ax_orig.set_title("Imagine originala")
-            self.ax_orig.axis("off")
-
-            self.ax_rest.imshow(J_restored_rgb)
-            self.ax_rest.set_title("Imagine restaurata (fara ceata)")
-            self.ax_rest.axis("off")
+        # o cerere noua face ca toate cererile anterioare sa devina invechite
+        self._job_id += 1
+        job = (self._job_id, self.img_bgr, self.img_key, params, self._display_side())
+        if self._worker is not None and self._worker.is_alive():
+            # firul curent se opreste la urmatoarea etapa; pornim dupa el
+            self._pending = job
+        else:
+            self._spawn_worker(job)
+
+        self._job_started = time.perf_counter()
+        self._job_stage = None
+        self._job_preview = False
+        self.progress.start(15)
+        if self._poll_id is None:
+            self._poll_id = self.root.after(POLL_MS, self._poll_results)
+
+    def _spawn_worker(self, job):
+        # apelat doar cand niciun fir nu foloseste pipeline-ul
+        if self._cache_stale:
+            self.pipeline.clear()
+            self._cache_stale = False
+        self._worker = threading.Thread(target=self._run_job, args=job, daemon=True)
+        self._worker.start()
+
+    def _display_side(self):
+        # latura (pixeli) a zonei in care se deseneaza o imagine in panoul din
+        # dreapta; imaginile afisate nu au nevoie de o rezolutie mai mare
+        bbox = self.ax_rest.get_window_extent()
+        return max(int(max(bbox.width, bbox.height)), 1)
+
+    def _run_job(self, job_id, img_bgr, img_key, params, display_side):
+        # ruleaza pe firul de lucru: nu atinge widget-urile Tkinter, doar coada
+        from dehaze_morphology import display_image, image_digest
+
+        def progress(stage):
+            if job_id != self._job_id:
+                raise _JobCancelled()
+            self._results_queue.put(("stage", job_id, stage))
 
-            self.canvas.draw()
+        try:
+            if img_key is None:
+                img_key = image_digest(img_bgr)
+
+            # pentru imagini mari afisam intai o previzualizare rapida, la
+            # rezolutie redusa, cu aceiasi parametri (kernel-ul scalat)
+            scale = PREVIEW_MAX_SIDE / max(img_bgr.shape[:2])
+            if scale < 0.5:
+                preview = self.pipeline.run(img_bgr, image_key=img_key, progress=progress,
+                                            preview_scale=scale, keep=("ImgRGB", "J_restored_rgb"),
+                                            **params)
+                # rezultatele se calculeaza la cerere -> le cerem aici, pe firul de lucru
+                self._results_queue.put(("preview", job_id, (
+                    img_key, img_bgr.shape,
+                    display_image(preview.ImgRGB, display_side),
+                    display_image(preview.J_restored_rgb, display_side))))
 
+            # apelam algoritmul de dehazing din modulul dehaze_morphology
+            # pe imaginea deja decodata (fara acces la disc), refolosind
+            # etapele care nu depind de parametrii modificati
+            result = tuple(self.pipeline.run(img_bgr, image_key=img_key, progress=progress, **params))
+
+            # copiile la rezolutia de afisare se fac tot aici, nu in firul Tkinter;
+            # originalul se micsoreaza o singura data pentru fiecare imagine
+            display_key = (img_key, display_side)
+            if self._orig_display is None or self._orig_display[0] != display_key:
+                self._orig_display = (display_key, display_image(result[0], display_side))
+            display = (self._orig_display[1], display_image(result[5], display_side))
+            self._results_queue.put(("done", job_id, (img_bgr, img_key, params, result, display)))
+        except _JobCancelled:
+            self._results_queue.put(("cancelled", job_id, None))
         except Exception as e:
-            # daca ceva nu merge, afisam eroarea intr-un messagebox
-            messagebox.showerror("Eroare la procesare", str(e))
+            self._results_queue.put(("error", job_id, e))
+
+    def _poll_results(self):
+        # citeste mesajele venite de la firul de lucru (in firul Tkinter)
+        self._poll_id = None
+        while True:
+            try:
+                kind, job_id, payload = self._results_queue.get_nowait()
+            except queue.Empty:
+                break
+            if job_id != self._job_id:
+                continue  # rezultat invechit, il ignoram
+            if kind == "stage":
+                self._job_stage = STAGE_LABELS.get(payload, payload)
+            elif kind == "preview":
+                img_key, shape, orig_display, rest_display = payload
+                self._draw_images(img_key, shape, orig_display, rest_display,
+                                  "Imagine restaurata (previzualizare)")
+                self._job_preview = True
+            elif kind == "done":
+                self._show_results(*payload)
+                self._job_started = None
+            elif kind == "error":
+                self._job_started = None
+                # daca ceva nu merge, afisam eroarea intr-un messagebox
+                messagebox.showerror("Eroare la procesare", str(payload))
+                self.lbl_status.config(text="Eroare la procesare")
+
+        worker_busy = self._worker is not None and self._worker.is_alive()
+        if not worker_busy and self._pending is not None:
+            job, self._pending = self._pending, None
+            self._spawn_worker(job)
+            worker_busy = True
+
+        if self._job_started is not None:
+            elapsed = time.perf_counter() - self._job_started
+            stage = f" – {self._job_stage}" if self._job_stage else ""
+            what = "Rezolutie completa" if self._job_preview else "Se proceseaza"
+            self.lbl_status.config(text=f"{what}{stage}... {elapsed:.1f} s")
+
+        if worker_busy or not self._results_queue.empty():
+            self._poll_id = self.root.after(POLL_MS, self._poll_results)
+        else:
+            self.progress.stop()
+
+    def _show_results(self, img_bgr, img_key, params, result, display):
+        # actualizeaza afisarea cu rezultatul unei procesari terminate
+        ImgRGB, ImgGray, dark_channel, t1, t_refined, J_restored_rgb = result
+        if img_bgr is self.img_bgr:
+            self.img_key = img_key
+        elapsed = time.perf_counter() - self._job_started
+
+        # salvam rezultatele intr-un dictionar pentru a le putea folosi ulterior
+        self.results = {
+            "ImgRGB": ImgRGB,
+            "ImgGray": ImgGray,
+            "dark_channel": dark_channel,
+            "t1": t1,
+            "t_refined": t_refined,
+            "J_restored_rgb": J_restored_rgb,
+            "kernel_size": params["kernel_size"],
+            "t_min": params["t_min"],
+        }
+        # figurile construite pentru rezultatele vechi nu mai sunt valabile
+        # (ferestrele deja deschise raman, cu rezultatele vechi)
+        self._figures = {}
+        self._figure_windows = {}
+
+        # activam butoanele pentru figurile 1, 2 si 3
+        self.btn_fig1.config(state="normal")
+        self.btn_fig2.config(state="normal")
+        self.btn_fig3.config(state="normal")
+
+        self._draw_images(img_key, img_bgr.shape, *display, "Imagine restaurata (fara ceata)")
+        self.lbl_status.config(text=f"Gata in {elapsed:.2f} s")
+
+    @staticmethod
+    def _update_image(ax, artist, img, extent):
+        # creeaza artistul imaginii la prima folosire, apoi doar ii schimba datele;
+        # intoarce artistul si daca este nevoie de o redesenare completa
+        if artist is None:
+            # imaginile sunt deja micsorate la rezolutia de afisare (INTER_AREA),
+            # deci nu mai este nevoie de filtrarea (lenta) facuta de Matplotlib
+            return ax.imshow(img, extent=extent, interpolation="nearest"), True
+        artist.set_data(img)
+        if tuple(artist.get_extent()) != extent:
+            artist.set_extent(extent)
+            return artist, True
+        return artist, False
+
+    def _draw_images(self, orig_key, shape, orig_display, rest_display, title_restored):
+        # actualizam subplots-urile din dreapta cu imaginile curente (copii la
+        # rezolutia de afisare). Extinderea este in pixelii imaginii complete,
+        # deci previzualizarea si rezultatul final ocupa exact aceeasi zona.
+        height, width = shape[:2]
+        extent = (-0.5, width - 0.5, height - 0.5, -0.5)
+
+        full_redraw = False
+        if orig_key != self._shown_orig_key:
+            # imagine noua: actualizam si originalul
+            self._im_orig, _ = self._update_image(self.ax_orig, self._im_orig, orig_display, extent)
+            self._shown_orig_key = orig_key
+            full_redraw = True
+        self._im_rest, changed = self._update_image(self.ax_rest, self._im_rest, rest_display, extent)
+        full_redraw |= changed
+        if self.ax_rest.get_title() != title_restored:
+            self.ax_rest.set_title(title_restored)
+            full_redraw = True
+
+        if full_redraw:
+            self.canvas.draw()
+        else:
+            # doar imaginea restaurata s-a schimbat: o redesenam numai pe ea (blitting)
+            self.ax_rest.draw_artist(self._im_rest)
+            self.canvas.blit(self.ax_rest.bbox)
 
     #  actiunile butoanelor pentru figuri
-    def show_morph_ops(self):
-        #Deschide Figura 1 – operatii morfologice de baza pe imaginea gri
+    def _show_figure(self, name, title, build):
+        # figura este construita o singura data pentru fiecare rezultat si
+        # afisata interactiv (zoom, deplasare, salvare) intr-o fereastra proprie;
+        # la urmatoarele click-uri fereastra deja deschisa este adusa in fata
         if not self.results:
             messagebox.showinfo("Info", "Proceseaza mai intai o imagine.")
             return
-        plot_morph_ops(self.results["ImgGray"], self.results["kernel_size"])
+        window = self._figure_windows.get(name)
+        if window is not None and window.winfo_exists():
+            window.deiconify()
+            window.lift()
+            return
+        fig = self._figures.get(name)
+        if fig is None:
+            fig = self._figures[name] = build(self.results)
+
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
+
+        window = self._figure_windows[name] = tk.Toplevel(self.root)
+        window.title(title)
+        # figura 3 are 18 x 10 inci: o micsoram (cu acelasi raport) ca sa
+        # incapa pe ecran, cu tot cu bara de instrumente
+        width, height = fig.get_size_inches() * fig.dpi
+        scale = min(0.9 * window.winfo_screenwidth() / width,
+                    0.8 * window.winfo_screenheight() / height, 1.0)
+        fig.set_size_inches(width * scale / fig.dpi, height * scale / fig.dpi)
+
+        canvas = FigureCanvasTkAgg(fig, master=window)
+        toolbar = NavigationToolbar2Tk(canvas, window, pack_toolbar=False)
+        toolbar.update()
+        toolbar.pack(side=tk.BOTTOM, fill=tk.X)
+        canvas.get_tk_widget().pack(side=tk.TOP, fill=tk.BOTH, expand=True)
+        canvas.draw()
+
+    def show_morph_ops(self):
+        #Deschide Figura 1 – operatii morfologice de baza pe imaginea gri
+        from dehaze_plots import figure_morph_ops
+        self._show_figure("morph_ops", "Figura 1 – Operatii morfologice",
+                          lambda r: figure_morph_ops(r["ImgGray"], r["kernel_size"]))
 
     def show_gray_hist(self):
         # Deschide Figura 2 – imagine gri + histograma ei.
-        if not self.results:
-            messagebox.showinfo("Info", "Proceseaza mai intai o imagine.")
-            return
-        plot_gray_hist(self.results["ImgGray"])
+        from dehaze_plots import figure_gray_hist
+        self._show_figure("gray_hist", "Figura 2 – Histograma",
+                          lambda r: figure_gray_hist(r["ImgGray"]))
 
     def show_dehaze_plots(self):
         #Deschide Figura 3 – rezultatele intermediare ale algoritmului de dehazing.
-        if not self.results:
-            messagebox.showinfo("Info", "Proceseaza mai intai o imagine.")
-            return
-        r = self.results
-        plot_dehaze_results(
-            r["ImgRGB"],
-            r["dark_channel"],
-            r["t1"],
-            r["t_refined"],
-            r["J_restored_rgb"],
-            r["t_min"],
-        )
+        from dehaze_plots import figure_dehaze_results
+        self._show_figure("dehaze_results", "Figura 3 – Rezultate intermediare",
+                          lambda r: figure_dehaze_results(
+                              r["ImgRGB"],
+                              r["dark_channel"],
+                              r["t1"],
+                              r["t_refined"],
+                              r["J_restored_rgb"],
+                              r["t_min"],
+                          ))
 
 
 if __name__ == "__main__":
     # punctul de intrare in aplicatie: cream fereastra principala si lansam bucla Tkinter
     root = tk.Tk()
     app = DehazeGUI(root)
-    root.mainloop()
+    # afisam fereastra (doar Tkinter) inainte de importurile grele
+    root.update()
+    first_window = (time.perf_counter() - _T0, time.time())
+    app.finish_startup()
+    root.update()
+    ready = (time.perf_counter() - _T0, time.time())
+
+    probe = os.environ.get(STARTUP_PROBE_ENV)
+    if probe:
+        # *_s: de la inceputul executiei main.py; *_at: ceasul sistemului, ca
+        # cel care a lansat aplicatia sa includa si pornirea interpretorului
+        with open(probe, "w") as f:
+            json.dump({"first_window_s": first_window[0], "first_window_at": first_window[1],
+                       "ready_s": ready[0], "ready_at": ready[1]}, f)
+        root.destroy()
+    else:
+        root.mainloop()
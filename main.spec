@@ -10,7 +10,12 @@ a = Analysis(
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
-    excludes=[],
+    # backend-urile si pachetele optionale pe care Matplotlib / numpy le-ar
+    # putea trage in executabil; aplicatia foloseste doar TkAgg, deci ele ar
+    # mari doar arhiva dezarhivata la fiecare pornire (onefile)
+    excludes=['PyQt5', 'PyQt6', 'PySide2', 'PySide6', 'wx', 'gi', 'IPython',
+              'jupyter_client', 'notebook', 'pandas', 'scipy', 'tornado', 'sphinx',
+              'pytest'],
     noarchive=False,
     optimize=0,
 )
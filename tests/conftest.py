@@ -0,0 +1,8 @@
+#  Testele importa modulele proiectului direct din directorul radacina
+
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
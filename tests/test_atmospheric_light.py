@@ -0,0 +1,68 @@
+#  Estimarea luminii atmosferice: selectia O(n) trebuie sa aleaga exact
+#  candidatii unei sortari stabile, inclusiv la multe valori egale
+
+import numpy as np
+import pytest
+
+from dehaze_morphology import _top_indices, dehaze_image, estimate_atmospheric_light
+
+
+def _images(dtype):
+    # putine niveluri distincte -> foarte multe egalitati in canalul intunecat
+    rng = np.random.default_rng(0)
+    img = rng.integers(250, 256, (97, 131, 3), dtype=np.uint8)
+    dark = rng.integers(250, 256, (97, 131), dtype=np.uint8)
+    if dtype == np.uint8:
+        return img, dark
+    return img / 255.0, dark / 255.0
+
+
+def _reference_light(img, dark):
+    num_brightest = int(max(dark.size * 0.001, 1))
+    indices = np.argsort(dark.ravel(), kind="stable")[-num_brightest:]
+    candidates = img.reshape(-1, 3)[indices]
+    A = candidates[np.argmax(np.sum(candidates, axis=1))]
+    return A / 255.0 if img.dtype == np.uint8 else A
+
+
+@pytest.mark.parametrize("dtype", [np.uint8, np.float64])
+def test_top_indices_match_stable_sort(dtype):
+    _, dark = _images(dtype)
+    flat = dark.ravel()
+    for num_brightest in (1, 7, 12, 500, flat.size):
+        expected = np.argsort(flat, kind="stable")[-num_brightest:]
+        assert np.array_equal(_top_indices(flat, num_brightest), expected), num_brightest
+
+
+@pytest.mark.parametrize("dtype", [np.uint8, np.float64])
+def test_select_matches_stable_sort(dtype):
+    img, dark = _images(dtype)
+    A = estimate_atmospheric_light(img, dark, method="select")
+    assert np.array_equal(A, _reference_light(img, dark))
+
+
+@pytest.mark.parametrize("dtype", [np.uint8, np.float64])
+@pytest.mark.parametrize("stride", [2, 3, 5])
+def test_stride_uses_the_subsampled_grid(dtype, stride):
+    img, dark = _images(dtype)
+    A = estimate_atmospheric_light(img, dark, stride=stride)
+    assert np.array_equal(A, _reference_light(img[::stride, ::stride], dark[::stride, ::stride]))
+
+
+@pytest.mark.parametrize("precision", ["float64", "float32"])
+def test_fixed_light_skips_the_estimate(precision):
+    rng = np.random.default_rng(1)
+    ImgIn = rng.integers(0, 256, (64, 80, 3), dtype=np.uint8)
+    estimated = dehaze_image(ImgIn, kernel_size=5, precision=precision, keep=())
+
+    stages = []
+    fixed = dehaze_image(ImgIn, kernel_size=5, precision=precision, keep=(),
+                         atmospheric_light=estimated.A,
+                         instrument=lambda stage, seconds, value: stages.append(stage))
+    assert "A" not in stages and "dark" not in stages
+    assert np.array_equal(fixed.A, estimated.A)
+    assert np.array_equal(fixed.restored, estimated.restored)
+
+    other = dehaze_image(ImgIn, kernel_size=5, precision=precision, keep=(),
+                         atmospheric_light=[0.9, 0.8, 0.7])
+    assert np.array_equal(other.A, [0.9, 0.8, 0.7])
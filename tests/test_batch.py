@@ -0,0 +1,128 @@
+#  Maparea imaginilor de intrare pe fisierele de iesire si banda de productie
+
+import cv2
+import numpy as np
+import pytest
+
+import dehaze_batch
+from dehaze_batch import collect_inputs, main, output_paths, run_pipeline
+from dehaze_morphology import decode_image, dehaze_image
+
+
+def _write(path):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    cv2.imwrite(str(path), np.full((16, 16, 3), 180, np.uint8))
+
+
+def _outputs(out, pattern="*.jpg"):
+    return sorted(p.relative_to(out).as_posix() for p in out.rglob(pattern))
+
+
+def test_same_name_from_different_directories(tmp_path):
+    for cam in ("cam1", "cam2"):
+        _write(tmp_path / cam / "f.jpg")
+    _write(tmp_path / "cam1" / "sub" / "g.jpg")
+    inputs = collect_inputs([str(tmp_path / "cam1"), str(tmp_path / "cam2" / "*.jpg")],
+                            recursive=True)
+    out = tmp_path / "out"
+    assert output_paths(inputs, out, None) == [out / "cam1" / "f.jpg",
+                                               out / "cam1" / "sub" / "g.jpg",
+                                               out / "cam2" / "f.jpg"]
+
+    argv = [str(tmp_path / "cam1"), str(tmp_path / "cam2"), "-o", str(out),
+            "--workers", "1", "--quiet"]
+    assert main(argv) == 0
+    assert _outputs(out) == ["cam1/f.jpg", "cam2/f.jpg"]
+
+
+def test_mapping_does_not_depend_on_other_inputs(tmp_path):
+    # o intrare adaugata la reluare nu schimba iesirile deja scrise
+    _write(tmp_path / "cam1" / "f.jpg")
+    out = tmp_path / "out"
+    assert main([str(tmp_path / "cam1"), "-o", str(out), "--workers", "1", "--quiet"]) == 0
+    assert _outputs(out) == ["cam1/f.jpg"]
+
+    _write(tmp_path / "cam2" / "f.jpg")
+    inputs = collect_inputs([str(tmp_path / "cam1"), str(tmp_path / "cam2")])
+    assert output_paths(inputs, out, None)[0] == out / "cam1" / "f.jpg"
+    assert main([str(tmp_path / "cam1"), str(tmp_path / "cam2"), "-o", str(out),
+                 "--workers", "1", "--quiet"]) == 0
+    assert _outputs(out) == ["cam1/f.jpg", "cam2/f.jpg"]
+
+
+def test_unresolvable_duplicates_are_rejected(tmp_path):
+    # a.jpg si a.png din acelasi director, ambele exportate ca PNG
+    _write(tmp_path / "in" / "a.jpg")
+    _write(tmp_path / "in" / "a.png")
+    inputs = collect_inputs([str(tmp_path / "in")])
+    with pytest.raises(ValueError):
+        output_paths(inputs, tmp_path / "out", "png")
+    assert main([str(tmp_path / "in"), "-o", str(tmp_path / "out"), "--format", "png"]) == 1
+
+
+def _write_noise(path, seed, shape=(24, 32, 3)):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    cv2.imwrite(str(path), rng.integers(0, 256, size=shape, dtype=np.uint8))
+
+
+def _pipeline(inputs, out, **kwargs):
+    lines = []
+    summary = run_pipeline(inputs, out, {"kernel_size": 5}, fmt="png", log=lines.append,
+                           **kwargs)
+    return summary, lines
+
+
+def test_pipeline_order_and_results(tmp_path):
+    # dimensiuni diferite: spatiul de lucru este realocat intre imagini
+    for i in range(7):
+        _write_noise(tmp_path / "in" / f"{i}.png", i, (20 + 3 * i, 30, 3))
+    inputs = collect_inputs([str(tmp_path / "in")])
+    out = tmp_path / "out"
+    summary, lines = _pipeline(inputs, out, readers=3, writers=3, prefetch=2,
+                               pending_writes=1)
+    assert summary["processed"] == 7 and summary["failed"] == []
+    # rezultatele sunt raportate in ordinea intrarilor
+    assert lines == [f"[{n}/7] {src}" for n, (src, _) in enumerate(inputs, 1)]
+    for (src, _), dst in zip(inputs, output_paths(inputs, out, "png")):
+        expected = dehaze_image(decode_image(str(src)), kernel_size=5, keep=()).restored
+        assert np.array_equal(decode_image(str(dst)), expected)
+
+
+def test_pipeline_resume(tmp_path):
+    for i in range(3):
+        _write_noise(tmp_path / "in" / f"{i}.png", i)
+    out = tmp_path / "out"
+    summary, _ = _pipeline(collect_inputs([str(tmp_path / "in")]), out)
+    assert summary["processed"] == 3
+    written = {p: p.stat().st_mtime_ns for p in out.rglob("*.png")}
+
+    for i in range(3, 5):
+        _write_noise(tmp_path / "in" / f"{i}.png", i)
+    summary, lines = _pipeline(collect_inputs([str(tmp_path / "in")]), out)
+    assert (summary["processed"], summary["skipped"]) == (2, 3)
+    assert [line.rsplit("/", 1)[-1] for line in lines] == ["3.png", "4.png"]
+    # imaginile deja scrise nu sunt rescrise
+    assert all(p.stat().st_mtime_ns == mtime for p, mtime in written.items())
+
+
+def test_pipeline_reports_reader_and_writer_errors(tmp_path, monkeypatch):
+    for i in range(4):
+        _write_noise(tmp_path / "in" / f"{i}.png", i)
+    (tmp_path / "in" / "1.png").write_bytes(b"nu este o imagine")
+    write_image = dehaze_batch.write_image
+
+    def failing_write(path, img_bgr, quality=None):
+        if path.endswith("2.png"):
+            raise OSError("disc plin")
+        write_image(path, img_bgr, quality)
+
+    monkeypatch.setattr(dehaze_batch, "write_image", failing_write)
+    out = tmp_path / "out"
+    summary, lines = _pipeline(collect_inputs([str(tmp_path / "in")]), out)
+    failed = {src.rsplit("/", 1)[-1]: error for src, error in summary["failed"]}
+    assert sorted(failed) == ["1.png", "2.png"]
+    assert failed["2.png"] == "OSError: disc plin"
+    assert summary["processed"] == 2
+    assert _outputs(out, "*.png") == ["in/0.png", "in/3.png"]
+    assert sum("EROARE" in line for line in lines) == 2
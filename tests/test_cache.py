@@ -0,0 +1,95 @@
+#  Cache-ul de rezultate: potriviri, campuri pastrate, intrari corupte si LRU
+
+import os
+
+import numpy as np
+import pytest
+
+from dehaze_cache import ResultCache
+from dehaze_morphology import dehaze_image
+
+
+def _image(seed=0):
+    return np.random.default_rng(seed).integers(0, 256, (24, 32, 3), dtype=np.uint8)
+
+
+def _assert_same(result, expected, keep):
+    assert np.array_equal(result.restored, expected.restored)
+    assert np.array_equal(result.A, expected.A)
+    for name in keep:
+        assert np.array_equal(getattr(result, name), getattr(expected, name)), name
+
+
+def test_hit_after_miss(tmp_path):
+    cache = ResultCache(tmp_path)
+    keep = ("dark_channel", "t1", "t_refined")
+    expected = dehaze_image(_image(), kernel_size=5, omega=0.9, keep=keep)
+    _assert_same(cache.dehaze(_image(), keep=keep, kernel_size=5, omega=0.9), expected, keep)
+    assert (cache.hits, cache.misses, cache.stores) == (0, 1, 1)
+    _assert_same(cache.dehaze(_image(), keep=keep, kernel_size=5, omega=0.9), expected, keep)
+    assert (cache.hits, cache.misses, cache.stores) == (1, 1, 1)
+    # alti parametri: alta intrare
+    cache.dehaze(_image(), keep=keep, kernel_size=7, omega=0.9)
+    assert cache.misses == 2
+
+
+def test_keep_superset_recomputes_and_merges(tmp_path):
+    cache = ResultCache(tmp_path)
+    cache.dehaze(_image(), keep=("t1",))
+    cache.dehaze(_image(), keep=("t1", "dark_channel"))
+    assert (cache.hits, cache.misses) == (0, 2)
+    cache.dehaze(_image(), keep=("t_refined",))
+    assert (cache.hits, cache.misses) == (0, 3)
+    # campurile pastrate anterior nu se pierd la recalculare
+    keep = ("t1", "dark_channel", "t_refined")
+    result = cache.dehaze(_image(), keep=keep)
+    assert (cache.hits, cache.misses, cache.stats()["entries"]) == (1, 3, 1)
+    _assert_same(result, dehaze_image(_image(), keep=keep), keep)
+
+
+@pytest.mark.parametrize("content", [b"", b"nu este un npz", "truncated"])
+def test_corrupted_entry_is_a_miss(tmp_path, content):
+    cache = ResultCache(tmp_path)
+    cache.dehaze(_image(), keep=("t1",))
+    _, key, _ = cache.lookup(_image())
+    path = cache._path(key)
+    if content == "truncated":
+        content = path.read_bytes()[:-100]
+    path.write_bytes(content)
+
+    cache = ResultCache(tmp_path)
+    expected = dehaze_image(_image(), keep=("t1",))
+    _assert_same(cache.dehaze(_image(), keep=("t1",)), expected, ("t1",))
+    assert (cache.hits, cache.misses, cache.stores) == (0, 1, 1)
+    # intrarea corupta a fost inlocuita
+    _assert_same(cache.dehaze(_image(), keep=("t1",)), expected, ("t1",))
+    assert cache.hits == 1
+
+
+def test_lru_eviction_order(tmp_path):
+    arrays = {"restored": np.zeros(10000, np.uint8), "A": np.zeros(3)}
+    cache = ResultCache(tmp_path)
+    cache.put("aa", arrays)
+    entry_bytes = cache._path("aa").stat().st_size
+    cache = ResultCache(tmp_path, max_bytes=int(3.5 * entry_bytes))
+    for age, key in enumerate(["aa", "bb", "cc"]):
+        cache.put(key, arrays)
+        os.utime(cache._path(key), (1000 + age, 1000 + age))
+    # citirea marcheaza intrarea "aa" ca folosita recent
+    assert cache.get("aa") is not None
+    cache.put("dd", arrays)
+    assert cache.evictions == 1
+    assert not cache._path("bb").exists()
+    assert all(cache._path(key).exists() for key in ("aa", "cc", "dd"))
+    cache.put("ee", arrays)
+    assert not cache._path("cc").exists()
+    assert cache.stats()["bytes"] <= cache.max_bytes
+
+
+def test_entry_larger_than_limit_is_skipped(tmp_path):
+    cache = ResultCache(tmp_path, max_bytes=1000)
+    expected = dehaze_image(_image(), keep=())
+    _assert_same(cache.dehaze(_image()), expected, ())
+    assert cache.stores == 0 and cache.stats()["entries"] == 0
+    assert cache.dehaze(_image()).restored.shape == expected.restored.shape
+    assert cache.misses == 2
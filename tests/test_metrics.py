@@ -0,0 +1,93 @@
+#  Instrumentarea pe etape si exportul metricilor
+
+import json
+import time
+
+import numpy as np
+import pytest
+
+from dehaze_metrics import StageMetrics
+from dehaze_morphology import RESULT_FIELDS, DehazePipeline, dehaze_image
+
+STAGES = {"decode", "dark", "A", "t1", "refined", "restore"}
+
+
+def _image():
+    return np.random.default_rng(0).integers(0, 256, (60, 80, 3), dtype=np.uint8)
+
+
+@pytest.mark.parametrize("precision, extra", [("float64", {"float"}), ("float32", set())])
+def test_reported_stages(precision, extra):
+    metrics = StageMetrics()
+    dehaze_image(_image(), kernel_size=5, precision=precision, keep=(), instrument=metrics)
+    assert set(metrics.summary()) == STAGES | extra
+
+    # campurile de diagnostic adauga doar etapele lor
+    metrics.reset()
+    result = dehaze_image(_image(), kernel_size=5, precision=precision, instrument=metrics)
+    for name in RESULT_FIELDS:
+        getattr(result, name)
+    diagnostics = {"rgb", "gray"} | ({"dark_float"} if precision == "float32" else set())
+    assert set(metrics.summary()) == STAGES | extra | diagnostics
+
+
+def test_pipeline_reports_only_computed_stages():
+    metrics = StageMetrics()
+    pipeline = DehazePipeline()
+    pipeline.run(_image(), kernel_size=5, keep=(), instrument=metrics)
+    metrics.reset()
+    # doar t_min s-a schimbat: restul etapelor vin din cache
+    pipeline.run(_image(), kernel_size=5, t_min=0.5, keep=(), instrument=metrics)
+    assert set(metrics.summary()) <= {"decode", "digest", "restore"}
+
+
+@pytest.mark.parametrize("refinement", ["morph", "guided"])
+def test_stage_times_sum_to_at_most_wall_time(refinement):
+    metrics = StageMetrics()
+    start = time.perf_counter()
+    result = dehaze_image(_image(), kernel_size=5, refinement=refinement,
+                          keep=("ImgGray",), instrument=metrics)
+    result.ImgGray
+    wall = time.perf_counter() - start
+    summary = metrics.summary()
+    assert sum(s["seconds_total"] for s in summary.values()) <= wall
+
+
+def test_prometheus_exposition_format():
+    metrics = StageMetrics(buckets=(0.01, 0.1))
+    metrics("A", 0.005, np.zeros(3))
+    metrics("A", 0.05, None)
+    metrics("t1", 0.5, (np.zeros((2, 2), np.float32), [np.zeros(4, np.uint8)]))
+    assert metrics.to_prometheus() == """\
+# HELP dehaze_stage_seconds Durata etapelor algoritmului de dehazing.
+# TYPE dehaze_stage_seconds histogram
+dehaze_stage_seconds_bucket{stage="A",le="0.01"} 1
+dehaze_stage_seconds_bucket{stage="A",le="0.1"} 2
+dehaze_stage_seconds_bucket{stage="A",le="+Inf"} 2
+dehaze_stage_seconds_sum{stage="A"} 0.055000
+dehaze_stage_seconds_count{stage="A"} 2
+dehaze_stage_seconds_bucket{stage="t1",le="0.01"} 0
+dehaze_stage_seconds_bucket{stage="t1",le="0.1"} 0
+dehaze_stage_seconds_bucket{stage="t1",le="+Inf"} 1
+dehaze_stage_seconds_sum{stage="t1"} 0.500000
+dehaze_stage_seconds_count{stage="t1"} 1
+# HELP dehaze_stage_output_arrays_total Tablourile produse de fiecare etapa.
+# TYPE dehaze_stage_output_arrays_total counter
+dehaze_stage_output_arrays_total{stage="A"} 1
+dehaze_stage_output_arrays_total{stage="t1"} 2
+# HELP dehaze_stage_output_bytes_total Octetii alocati pentru rezultatele fiecarei etape.
+# TYPE dehaze_stage_output_bytes_total counter
+dehaze_stage_output_bytes_total{stage="A"} 24
+dehaze_stage_output_bytes_total{stage="t1"} 20
+"""
+
+
+def test_export(tmp_path):
+    metrics = StageMetrics()
+    metrics("A", 0.002, np.zeros(3))
+    metrics.export(tmp_path / "dehaze.json")
+    metrics.export(tmp_path / "dehaze.prom")
+    summary = json.loads((tmp_path / "dehaze.json").read_text())
+    assert summary["A"]["count"] == 1 and summary["A"]["last_shape"] == [3]
+    assert (tmp_path / "dehaze.prom").read_text() == metrics.to_prometheus()
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["dehaze.json", "dehaze.prom"]
@@ -0,0 +1,68 @@
+#  Operatiile morfologice combinate trebuie sa dea exact rezultatul OpenCV,
+#  inclusiv pentru kernel-uri de dimensiune para (ancora necentrata)
+
+import os
+
+import cv2
+import numpy as np
+import pytest
+
+from conftest import ROOT
+from dehaze_filters import (
+    _VHGW_MIN_SIZE_FLOAT64,
+    MORPHOLOGY_ENGINES,
+    close_open_rect,
+    open_close_rect,
+)
+from dehaze_morphology import dehaze_image
+
+# ferestre mici, plus cele din jurul pragului de la care "auto" trece la
+# van Herk / Gil-Werman (pe double)
+SIZES = [*range(1, 12), *range(_VHGW_MIN_SIZE_FLOAT64 - 1, _VHGW_MIN_SIZE_FLOAT64 + 4)]
+
+
+def _rect(size):
+    return cv2.getStructuringElement(cv2.MORPH_RECT, (size, size))
+
+
+def _reference_dehaze(ImgIn, kernel_size, omega=0.95, t_min=0.85):
+    """Algoritmul initial, scris direct cu OpenCV (t_refined si imaginea restaurata)."""
+    ImgFloat = ImgIn.astype(np.float64) / 255.0
+    kernel_morph = _rect(kernel_size)
+    dark_channel = cv2.erode(np.min(ImgFloat, axis=2), kernel_morph)
+    num_brightest = int(max(dark_channel.size * 0.001, 1))
+    indices = np.argsort(dark_channel.ravel())[-num_brightest:]
+    candidate_pixels = ImgFloat.reshape(-1, 3)[indices]
+    A = candidate_pixels[np.argmax(np.sum(candidate_pixels, axis=1))]
+    I_min = cv2.erode(np.min(ImgFloat / A, axis=2), kernel_morph)
+    t1 = 1.0 - (omega * I_min)
+    t2 = cv2.morphologyEx(t1, cv2.MORPH_CLOSE, kernel_morph)
+    t_refined = np.maximum(cv2.morphologyEx(t2, cv2.MORPH_OPEN, kernel_morph), t_min)
+    J = (ImgFloat - A) / t_refined[..., None] + A
+    return t_refined, (np.clip(J * 255, 0, 255)).astype(np.uint8)
+
+
+@pytest.mark.parametrize("dtype", [np.uint8, np.float32, np.float64])
+@pytest.mark.parametrize("engine", MORPHOLOGY_ENGINES)
+def test_close_open_matches_opencv(dtype, engine):
+    rng = np.random.default_rng(0)
+    img = (rng.random((57, 83)) * 255).astype(dtype)
+    for size in SIZES:
+        kernel = _rect(size)
+        close_open = cv2.morphologyEx(cv2.morphologyEx(img, cv2.MORPH_CLOSE, kernel),
+                                      cv2.MORPH_OPEN, kernel)
+        open_close = cv2.morphologyEx(cv2.morphologyEx(img, cv2.MORPH_OPEN, kernel),
+                                      cv2.MORPH_CLOSE, kernel)
+        assert np.array_equal(close_open_rect(img, size, engine), close_open), size
+        assert np.array_equal(open_close_rect(img, size, engine), open_close), size
+
+
+@pytest.mark.parametrize("kernel_size", [2, 3, 4, 10, 15])
+def test_dehaze_matches_reference(kernel_size):
+    ImgIn = cv2.resize(cv2.imread(os.path.join(ROOT, "poza_ex1.jpg")), (300, 192),
+                       interpolation=cv2.INTER_AREA)
+    t_refined, restored = _reference_dehaze(ImgIn, kernel_size)
+    *_, result_t_refined, result_rgb = dehaze_image(ImgIn, kernel_size=kernel_size,
+                                                    light_method="sort")
+    assert np.array_equal(result_t_refined, t_refined)
+    assert np.array_equal(result_rgb, cv2.cvtColor(restored, cv2.COLOR_BGR2RGB))
@@ -0,0 +1,55 @@
+#  Benzile paralele (fire sau procese) trebuie sa dea exact rezultatul dehaze_image()
+
+import os
+
+import cv2
+import numpy as np
+import pytest
+
+import dehaze_parallel
+from conftest import ROOT
+from dehaze_morphology import PRECISIONS, decode_image, dehaze_image
+from dehaze_parallel import PARALLEL_MODES, dehaze_parallel as run_parallel
+
+
+def _image():
+    return cv2.resize(decode_image(os.path.join(ROOT, "poza_ex2.jpg")), (83, 150),
+                      interpolation=cv2.INTER_AREA)
+
+
+@pytest.fixture
+def thin_bands(monkeypatch):
+    # benzi de o linie: mult mai subtiri decat marginea (halo) kernel-ului
+    bands = dehaze_parallel._bands
+    monkeypatch.setattr(dehaze_parallel, "_bands",
+                        lambda height, count: bands(height, count, min_rows=1))
+
+
+@pytest.mark.parametrize("mode", PARALLEL_MODES)
+@pytest.mark.parametrize("precision", PRECISIONS)
+@pytest.mark.parametrize("kernel_size", [4, 15])
+def test_bands_match_dehaze_image(mode, precision, kernel_size):
+    ImgIn = _image()
+    expected = dehaze_image(ImgIn, kernel_size=kernel_size, precision=precision, keep=())
+    out, A = run_parallel(ImgIn, kernel_size=kernel_size, workers=3, mode=mode,
+                          precision=precision)
+    assert np.array_equal(A, expected.A)
+    assert np.array_equal(out, expected.restored)
+
+
+@pytest.mark.parametrize("mode", PARALLEL_MODES)
+@pytest.mark.parametrize("channel_order", ["BGR", "RGB"])
+def test_more_bands_than_rows(thin_bands, mode, channel_order):
+    ImgIn = _image()[:12]
+    if channel_order == "RGB":
+        ImgIn = np.ascontiguousarray(ImgIn[..., ::-1])
+    # mai multe fire decat linii: cel mult o banda pe linie
+    assert dehaze_parallel._bands(12, 64) == [(r, r + 1) for r in range(12)]
+    workers = 64 if mode == "thread" else 4
+    for kernel_size in (4, 5):
+        expected = dehaze_image(ImgIn, kernel_size=kernel_size, channel_order=channel_order,
+                                keep=())
+        out, A = run_parallel(ImgIn, kernel_size=kernel_size, workers=workers, mode=mode,
+                              channel_order=channel_order)
+        assert np.array_equal(A, expected.A)
+        assert np.array_equal(out, expected.restored)
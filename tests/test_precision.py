@@ -0,0 +1,21 @@
+#  Modul float32 trebuie sa dea practic aceeasi imagine ca modul float64
+
+import glob
+import os
+
+import numpy as np
+import pytest
+
+from conftest import ROOT
+from dehaze_morphology import decode_image, dehaze_image
+
+SAMPLES = sorted(glob.glob(os.path.join(ROOT, "poza_ex*")))
+
+
+@pytest.mark.parametrize("path", SAMPLES, ids=os.path.basename)
+def test_float32_matches_float64(path):
+    ImgIn = decode_image(path)
+    restored64 = dehaze_image(ImgIn, precision="float64", keep=()).restored
+    restored32 = dehaze_image(ImgIn, precision="float32", keep=()).restored
+    # cel mult un nivel de gri diferenta, din rotunjire
+    assert np.abs(restored64.astype(np.int16) - restored32).max() <= 1
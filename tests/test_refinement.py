@@ -0,0 +1,83 @@
+#  Motoarele de rafinare a transmisiei ("morph", "box", "guided")
+
+import cv2
+import numpy as np
+import pytest
+
+from dehaze_morphology import (
+    PRECISIONS,
+    REFINEMENT_ENGINES,
+    DehazePipeline,
+    dehaze_image,
+    refine_transmission_guided,
+    structuring_element,
+)
+
+T_MIN = 0.3
+
+
+def _image():
+    rng = np.random.default_rng(3)
+    # ceata neuniforma peste zgomot, ca transmisia sa varieze
+    haze = np.linspace(60, 200, 64)[None, :, None]
+    return np.clip(rng.integers(0, 56, (48, 64, 3)) + haze, 0, 255).astype(np.uint8)
+
+
+@pytest.mark.parametrize("precision", PRECISIONS)
+@pytest.mark.parametrize("refinement", REFINEMENT_ENGINES)
+def test_engine_range_and_shape(refinement, precision):
+    ImgIn = _image()
+    result = dehaze_image(ImgIn, kernel_size=5, t_min=T_MIN, precision=precision,
+                          refinement=refinement)
+    assert result.restored.shape == ImgIn.shape and result.restored.dtype == np.uint8
+    assert result.t_refined.shape == ImgIn.shape[:2]
+    assert result.t_refined.dtype == result.t1.dtype
+    t_min = result.t1.dtype.type(T_MIN)
+    assert result.t_refined.min() >= t_min and result.t_refined.max() <= 1
+
+
+@pytest.mark.parametrize("precision", PRECISIONS)
+@pytest.mark.parametrize("kernel_size", [4, 5, 15])
+def test_morph_is_the_previous_default(kernel_size, precision):
+    ImgIn = _image()
+    default = dehaze_image(ImgIn, kernel_size=kernel_size, t_min=T_MIN, precision=precision)
+    morph = dehaze_image(ImgIn, kernel_size=kernel_size, t_min=T_MIN, precision=precision,
+                         refinement="morph")
+    assert np.array_equal(morph.restored, default.restored)
+    # closing urmat de opening pe transmisia initiala, ca inaintea motoarelor
+    kernel = structuring_element(kernel_size)
+    t_morph = cv2.morphologyEx(cv2.morphologyEx(morph.t1, cv2.MORPH_CLOSE, kernel),
+                               cv2.MORPH_OPEN, kernel)
+    assert np.array_equal(morph.t_refined, np.maximum(t_morph, morph.t1.dtype.type(T_MIN)))
+
+
+def test_box_and_guided_filters():
+    ImgIn = _image()
+    kernel = structuring_element(5)
+    box = dehaze_image(ImgIn, kernel_size=5, t_min=T_MIN, refinement="box")
+    assert np.array_equal(box.t_refined,
+                          np.maximum(cv2.boxFilter(box.t1, -1, (5, 5)), T_MIN))
+    guided = dehaze_image(ImgIn, kernel_size=5, t_min=T_MIN, refinement="guided")
+    expected = refine_transmission_guided(guided.t1, guided.ImgGray, kernel)
+    assert np.array_equal(guided.t_refined, np.maximum(expected, T_MIN))
+    morph = dehaze_image(ImgIn, kernel_size=5, t_min=T_MIN)
+    assert not np.array_equal(box.t_refined, morph.t_refined)
+    assert not np.array_equal(guided.t_refined, morph.t_refined)
+
+
+def test_pipeline_memo_separates_engines():
+    ImgIn = _image()
+    pipeline = DehazePipeline()
+    for refinement in ["morph", "box", "guided", "morph", "box", "guided"]:
+        stages = []
+        result = pipeline.run(ImgIn, kernel_size=5, t_min=T_MIN, refinement=refinement,
+                              image_key="img", progress=stages.append, keep=())
+        expected = dehaze_image(ImgIn, kernel_size=5, t_min=T_MIN, refinement=refinement,
+                                keep=())
+        assert np.array_equal(result.restored, expected.restored), refinement
+        # etapele de dinaintea rafinarii sunt comune tuturor motoarelor
+        assert "dark" not in stages or refinement == "morph"
+        assert "t1" not in stages or refinement == "morph"
+    # fiecare motor are propria rafinare si restaurare in cache
+    refined = [key for key in pipeline._cache if key[1] == "refined"]
+    assert sorted(key[-1] for key in refined) == ["box", "guided", "morph"]
@@ -0,0 +1,117 @@
+#  Serviciul de dehazing: coada, firele de lucru si validarea cererilor
+
+import http.client
+import json
+import threading
+import time
+from contextlib import contextmanager
+
+import cv2
+import numpy as np
+import pytest
+
+from dehaze_morphology import dehaze_image
+from dehaze_server import DehazeService, make_server, parse_output_format
+
+
+def _image(seed):
+    return np.random.default_rng(seed).integers(0, 256, (24, 32, 3), dtype=np.uint8)
+
+
+def test_same_size_images_are_batched_together():
+    # a doua cerere (alti parametri) ramane in coada intre cele doua imagini
+    # compatibile, care ajung in acelasi lot
+    service = DehazeService(workers=1, max_batch=4, batch_window=0.05)
+    requests = [(_image(0), {"kernel_size": 3}), (_image(1), {"kernel_size": 5}),
+                (_image(2), {"kernel_size": 3})]
+    results = {}
+
+    def submit(i):
+        image, params = requests[i]
+        results[i] = service.submit(image, params, timeout=10)
+
+    threads = []
+    for i in range(len(requests)):
+        threads.append(threading.Thread(target=submit, args=(i,)))
+        threads[-1].start()
+        while len(service._queue) <= i:
+            time.sleep(0.001)
+    service.start(warmup=False)
+    try:
+        for thread in threads:
+            thread.join()
+    finally:
+        service.stop()
+
+    for i, (image, params) in enumerate(requests):
+        assert np.array_equal(results[i], dehaze_image(image, keep=(), **params).restored)
+    stats = service.stats()
+    assert stats["batches"] == 2 and stats["errors"] == 0
+
+
+def test_worker_survives_unexpected_errors(monkeypatch):
+    service = DehazeService(workers=1)
+    service.start(warmup=False)
+    try:
+        def broken(batch, workspace):
+            raise RuntimeError("defect")
+
+        monkeypatch.setattr(service, "_run_batch", broken)
+        with pytest.raises(RuntimeError):
+            service.submit(_image(0), {}, timeout=5)
+        monkeypatch.undo()
+        assert service.submit(_image(0), {}, timeout=5).shape == (24, 32, 3)
+    finally:
+        service.stop()
+    assert service.stats()["errors"] == 1
+
+
+def test_parse_output_format():
+    assert parse_output_format("format=jpg&quality=80") == (
+        ".jpg", [cv2.IMWRITE_JPEG_QUALITY, 80])
+    assert parse_output_format("") == (".png", [])
+    for query in ("format=xyz", "format=jpg&quality=mare", "format=webp&quality=101"):
+        with pytest.raises(ValueError):
+            parse_output_format(query)
+
+
+@contextmanager
+def _serve():
+    service = DehazeService(workers=1)
+    service.start(warmup=False)
+    server = make_server(service, port=0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield server, service
+    finally:
+        server.shutdown()
+        server.server_close()
+        service.stop()
+
+
+@pytest.mark.parametrize("query", ["format=xyz", "format=jpg&quality=mare"])
+def test_invalid_output_format_is_rejected_before_queueing(query):
+    with _serve() as (server, service):
+        body = cv2.imencode(".png", _image(0))[1].tobytes()
+        connection = http.client.HTTPConnection(*server.server_address, timeout=10)
+        connection.request("POST", f"/dehaze?{query}", body)
+        response = connection.getresponse()
+        assert response.status == 400
+        assert "error" in json.loads(response.read())
+        connection.close()
+    assert service.stats()["requests"] == 0
+
+
+@pytest.mark.parametrize("length", ["mare", "-5", "1.5"])
+def test_invalid_content_length_is_rejected(length):
+    with _serve() as (server, service):
+        connection = http.client.HTTPConnection(*server.server_address, timeout=10)
+        connection.putrequest("POST", "/dehaze")
+        connection.putheader("Content-Length", length)
+        connection.endheaders()
+        response = connection.getresponse()
+        assert response.status == 400
+        assert "Content-Length" in json.loads(response.read())["error"]
+        connection.close()
+    assert service.stats()["requests"] == 0
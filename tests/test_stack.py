@@ -0,0 +1,34 @@
+#  Lotul vectorizat trebuie sa dea, cadru cu cadru, exact rezultatul
+#  dehaze_image(), inclusiv pentru kernel-uri de dimensiune para
+
+import glob
+import os
+
+import cv2
+import numpy as np
+import pytest
+
+from conftest import ROOT
+from dehaze_filters import MORPHOLOGY_ENGINES
+from dehaze_morphology import PRECISIONS, decode_image, dehaze_image
+from dehaze_stack import dehaze_stack
+
+
+def _stack():
+    paths = sorted(glob.glob(os.path.join(ROOT, "poza_ex*")))
+    return np.stack([cv2.resize(decode_image(p), (160, 120), interpolation=cv2.INTER_AREA)
+                     for p in paths])
+
+
+@pytest.mark.parametrize("precision", PRECISIONS)
+@pytest.mark.parametrize("engine", MORPHOLOGY_ENGINES)
+@pytest.mark.parametrize("kernel_size", [2, 3, 4, 15])
+def test_stack_matches_dehaze_image(precision, engine, kernel_size):
+    stack = _stack()
+    out, A = dehaze_stack(stack, kernel_size=kernel_size, precision=precision,
+                          morphology=engine, chunk_pixels=2 * 160 * 120)
+    for i, img in enumerate(stack):
+        result = dehaze_image(img, kernel_size=kernel_size, precision=precision,
+                              morphology=engine, keep=())
+        assert np.array_equal(result.A, A[i])
+        assert np.array_equal(result.restored, out[i]), i
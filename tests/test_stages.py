@@ -0,0 +1,55 @@
+#  Ordinea etapelor si timpii raportati de instrumentare
+
+import time
+from collections import Counter
+
+import numpy as np
+import pytest
+
+from dehaze_bench import _run_once
+from dehaze_morphology import RESULT_FIELDS, DehazePipeline, dehaze_image
+
+
+def _image():
+    rng = np.random.default_rng(0)
+    return rng.integers(0, 256, (120, 160, 3), dtype=np.uint8)
+
+
+def test_progress_reports_dark_before_light():
+    stages = []
+    DehazePipeline().run(_image(), kernel_size=5, progress=stages.append)
+    assert stages.index("dark") < stages.index("A")
+
+
+def test_stage_times_are_exclusive():
+    reported = []
+    start = time.perf_counter()
+    dehaze_image(_image(), kernel_size=5, refinement="guided", keep=("ImgGray",),
+                 instrument=lambda stage, seconds, value: reported.append((stage, seconds)))
+    total = time.perf_counter() - start
+    assert [stage for stage, _ in reported].count("gray") == 1
+    assert sum(seconds for _, seconds in reported) <= total
+
+
+def test_bench_stage_times_are_exclusive():
+    params = dict(kernel_size=5, omega=0.95, t_min=0.85, precision="float64",
+                  refinement="guided")
+    stages = _run_once(_image(), params, trace=True)
+    total, peak_total = stages.pop("total")
+    assert sum(elapsed for elapsed, _ in stages.values()) <= total
+    assert all(0 <= peak <= peak_total for _, peak in stages.values())
+
+
+@pytest.mark.parametrize("precision", ["float64", "float32"])
+@pytest.mark.parametrize("refinement", ["morph", "guided"])
+def test_kept_fields_reuse_computed_stages(precision, refinement):
+    counts = Counter()
+    result = dehaze_image(_image(), kernel_size=5, precision=precision, refinement=refinement,
+                          instrument=lambda stage, seconds, value: counts.update([stage]))
+    fields = [getattr(result, name) for name in RESULT_FIELDS]
+    assert set(counts.values()) == {1}, counts
+    # campurile sunt chiar rezultatele folosite de algoritm
+    expected = dehaze_image(_image(), kernel_size=5, precision=precision,
+                            refinement=refinement)
+    for name, value in zip(RESULT_FIELDS, fields):
+        assert np.array_equal(value, getattr(expected, name)), name
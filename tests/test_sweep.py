@@ -0,0 +1,46 @@
+#  Fiecare punct al grilei trebuie sa fie identic cu un apel dehaze_image()
+
+import numpy as np
+import pytest
+
+from dehaze_filters import close_open_rect, open_close_rect
+from dehaze_morphology import dehaze_image
+from dehaze_sweep import sweep
+
+KERNEL_SIZES = (4, 5, 15)
+OMEGAS = (0.8, 0.95)
+T_MINS = (0.1, 0.85)
+
+
+def _image():
+    rng = np.random.default_rng(7)
+    return rng.integers(0, 256, size=(48, 64, 3), dtype=np.uint8)
+
+
+@pytest.mark.parametrize("channel_order", ["BGR", "RGB"])
+@pytest.mark.parametrize("precision", ["float64", "float32"])
+def test_grid_matches_dehaze_image(precision, channel_order):
+    image = _image()
+    records = list(sweep([image], KERNEL_SIZES, OMEGAS, T_MINS, precision=precision,
+                         channel_order=channel_order))
+    assert len(records) == len(KERNEL_SIZES) * len(OMEGAS) * len(T_MINS)
+    for record in records:
+        expected = dehaze_image(image, kernel_size=record["kernel_size"],
+                                omega=record["omega"], t_min=record["t_min"],
+                                precision=precision, channel_order=channel_order, keep=())
+        point = (record["kernel_size"], record["omega"], record["t_min"])
+        assert np.array_equal(record["A"], expected.A), point
+        assert np.array_equal(record["restored"], expected.restored), point
+
+
+@pytest.mark.parametrize("engine", ["opencv", "vhgw"])
+@pytest.mark.parametrize("dtype", [np.float32, np.float64])
+@pytest.mark.parametrize("size", [1, 2, 4, 5, 8, 15, 41])
+def test_open_close_duality(size, dtype, engine):
+    rng = np.random.default_rng(size)
+    I_min = rng.random((50, 60)).astype(dtype)
+    for omega in OMEGAS:
+        t = dtype(1.0) - dtype(omega) * I_min
+        expected = close_open_rect(t, size, engine)
+        got = dtype(1.0) - dtype(omega) * open_close_rect(I_min, size, engine)
+        assert np.array_equal(got, expected), omega
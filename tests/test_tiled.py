@@ -0,0 +1,45 @@
+#  Prelucrarea pe blocuri trebuie sa dea exact rezultatul dehaze_image(),
+#  datorita marginilor (halo) de 5 raze ale kernel-ului
+
+import os
+
+import cv2
+import numpy as np
+import pytest
+
+from conftest import ROOT
+from dehaze_morphology import PRECISIONS, decode_image, dehaze_image
+from dehaze_tiled import dehaze_tiled
+
+
+def _image():
+    return cv2.resize(decode_image(os.path.join(ROOT, "poza_ex2.jpg")), (131, 97),
+                      interpolation=cv2.INTER_AREA)
+
+
+@pytest.mark.parametrize("precision", PRECISIONS)
+@pytest.mark.parametrize("kernel_size", [2, 5, 15])
+@pytest.mark.parametrize("channel_order", ["BGR", "RGB"])
+@pytest.mark.parametrize("tile_size", [16, 40, 1024])
+def test_tiled_matches_dehaze_image(precision, kernel_size, channel_order, tile_size):
+    ImgIn = _image()
+    if channel_order == "RGB":
+        ImgIn = cv2.cvtColor(ImgIn, cv2.COLOR_BGR2RGB)
+    expected = dehaze_image(ImgIn, kernel_size=kernel_size, precision=precision,
+                            channel_order=channel_order, keep=())
+    out, A = dehaze_tiled(ImgIn, kernel_size=kernel_size, tile_size=tile_size,
+                          precision=precision, channel_order=channel_order)
+    assert np.array_equal(A, expected.A)
+    assert np.array_equal(out, expected.restored)
+
+
+def test_tiled_memmap_input_and_output(tmp_path):
+    ImgIn = _image()
+    src, dst = tmp_path / "in.npy", tmp_path / "out.npy"
+    np.save(src, ImgIn)
+    expected = dehaze_image(ImgIn, kernel_size=15, keep=())
+    out, A = dehaze_tiled(str(src), kernel_size=15, tile_size=32, out=str(dst))
+    assert isinstance(out, np.memmap)
+    del out
+    assert np.array_equal(np.load(dst), expected.restored)
+    assert np.array_equal(A, expected.A)
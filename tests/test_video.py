@@ -0,0 +1,27 @@
+#  Refolosirea transmisiei intre cadre nu trebuie sa schimbe rezultatul
+
+import cv2
+import numpy as np
+
+from dehaze_video import DehazeStream
+
+
+def _frames():
+    rng = np.random.default_rng(0)
+    first = rng.integers(0, 256, (96, 128, 3), dtype=np.uint8)
+    first[20:60, 30:90] = 128
+    second = first.copy()
+    # aceeasi luminanta, alta culoare: canalul intunecat scade de la 128 la 100
+    second[30:50, 40:80] = (128, 100, 183)
+    gray = cv2.cvtColor(second, cv2.COLOR_BGR2GRAY)
+    assert np.array_equal(gray[30:50, 40:80], cv2.cvtColor(first, cv2.COLOR_BGR2GRAY)[30:50, 40:80])
+    return [first, second]
+
+
+def test_colour_change_recomputes_transmission():
+    params = dict(kernel_size=5, reestimate_every=100)
+    stream = DehazeStream(**params)
+    reference = DehazeStream(reuse_transmission=False, **params)
+    for frame in _frames():
+        assert np.array_equal(stream.process(frame), reference.process(frame))
+    assert stream.stats["transmission_reused"] == 0
@@ -0,0 +1,38 @@
+#  Spatiul de lucru refolosit: acelasi rezultat, fara realocari
+
+import numpy as np
+import pytest
+
+from dehaze_morphology import DehazeWorkspace, dehaze_image
+
+
+def _image(seed):
+    rng = np.random.default_rng(seed)
+    return rng.integers(0, 256, size=(40, 56, 3), dtype=np.uint8)
+
+
+@pytest.mark.parametrize("channel_order", ["BGR", "RGB"])
+@pytest.mark.parametrize("precision", ["float64", "float32"])
+def test_workspace_matches_fresh_call(precision, channel_order):
+    workspace = DehazeWorkspace()
+    out = np.empty((40, 56, 3), dtype=np.uint8)
+    buffers = None
+    for seed in range(3):
+        image = _image(seed)
+        expected = dehaze_image(image, kernel_size=7, precision=precision,
+                                channel_order=channel_order)
+        result = dehaze_image(image, kernel_size=7, precision=precision,
+                              channel_order=channel_order, workspace=workspace, out=out)
+        assert result.restored is out
+        assert np.array_equal(result.restored, expected.restored)
+        assert np.array_equal(result.A, expected.A)
+        # campurile intermediare sunt bufferele spatiului de lucru: se compara
+        # inaintea urmatorului apel, care le suprascrie
+        for name in ("dark_channel", "t1", "t_refined"):
+            assert np.array_equal(getattr(result, name), getattr(expected, name)), name
+        # dupa primul apel nu se mai aloca niciun buffer
+        current = {name: id(buf) for name, buf in workspace._buffers.items()}
+        if buffers is not None:
+            assert current == buffers
+        buffers = current
+    assert buffers